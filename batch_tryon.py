@@ -0,0 +1,206 @@
+# batch_tryon.py
+
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import time
+
+import cv2
+
+from utils.utils import load_makeup_params
+from utils.logging_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Per-process state, created once by _init_worker in every pool worker
+_worker = {}
+
+
+def iter_input_images(input_path):
+    """
+    Lazily yields (image_path, relative_path) pairs for a directory or a glob pattern.
+
+    :param input_path: Directory scanned recursively for images, or a glob pattern.
+    """
+    if os.path.isdir(input_path):
+        for dirpath, dirnames, filenames in os.walk(input_path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    image_path = os.path.join(dirpath, filename)
+                    yield image_path, os.path.relpath(image_path, input_path)
+    else:
+        root = _glob_root(input_path)
+        for image_path in glob.iglob(input_path, recursive=True):
+            if image_path.lower().endswith(IMAGE_EXTENSIONS):
+                yield image_path, os.path.relpath(image_path, root)
+
+
+def _glob_root(pattern):
+    """
+    Returns the leading directory of a glob pattern that contains no wildcards.
+    """
+    parts = []
+    for part in pattern.replace('\\', '/').split('/')[:-1]:
+        if any(char in part for char in '*?['):
+            break
+        parts.append(part)
+    return '/'.join(parts) or '.'
+
+
+def remove_partial_outputs(output_dir):
+    """
+    Deletes the temporary '.partial' files left in the output directory by a run that was
+    killed while writing.
+
+    :return: Number of files deleted
+    """
+    removed = 0
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            root, extension = os.path.splitext(filename)
+            if extension.lower() in IMAGE_EXTENSIONS and root.endswith('.partial'):
+                try:
+                    os.remove(os.path.join(dirpath, filename))
+                except OSError as e:
+                    logger.warning("Failed to remove %s: %s", os.path.join(dirpath, filename), e)
+                    continue
+                removed += 1
+    if removed:
+        logger.info("Removed %s partial outputs of an interrupted run.", removed)
+    return removed
+
+
+def iter_pending(images, output_dir, overwrite=False):
+    """
+    Yields (image_path, output_path) pairs, skipping images whose output already exists.
+    """
+    for image_path, relative_path in images:
+        output_path = os.path.join(output_dir, relative_path)
+        if not overwrite and os.path.exists(output_path):
+            continue
+        yield image_path, output_path
+
+
+def _init_worker(makeup_params, log_level, max_faces):
+    # Imported here so every worker builds its own FaceMesh graph
+    from src.face_detection import FaceDetector
+    from src.makeup_transfer import MakeupTransfer
+
+    configure_logging(log_level)
+    _worker['face_detector'] = FaceDetector(max_faces=max_faces, static_image_mode=True)
+    _worker['face_detector'].warmup(background=False)
+    _worker['makeup_transfer'] = MakeupTransfer()
+    _worker['makeup_params'] = makeup_params
+
+
+def _process_image(task):
+    """
+    Applies the makeup look to one image and writes the result.
+
+    :param task: Tuple (image_path, output_path)
+    :return: Tuple (image_path, status, elapsed seconds) where status is 'ok', 'no_face' or 'error'
+    """
+    image_path, output_path = task
+    start = time.perf_counter()
+    try:
+        image = cv2.imread(image_path)
+        if image is None:
+            logger.error("Failed to read image: %s", image_path)
+            return image_path, 'error', time.perf_counter() - start
+
+        faces_landmarks = _worker['face_detector'].detect_faces(image)
+        if not faces_landmarks:
+            return image_path, 'no_face', time.perf_counter() - start
+
+        image = _worker['makeup_transfer'].apply_makeup_multi(image, faces_landmarks, _worker['makeup_params'])
+
+        # Write to a temporary file first so an interrupted run never leaves a partial output
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        root, extension = os.path.splitext(output_path)
+        temp_path = f"{root}.partial{extension}"
+        if not cv2.imwrite(temp_path, image):
+            logger.error("Failed to write image: %s", output_path)
+            return image_path, 'error', time.perf_counter() - start
+        os.replace(temp_path, output_path)
+        return image_path, 'ok', time.perf_counter() - start
+    except Exception as e:
+        logger.error("Error processing %s: %s", image_path, e)
+        return image_path, 'error', time.perf_counter() - start
+
+
+def run_batch(input_path, params_path, output_dir, workers=None, chunksize=4, overwrite=False,
+              report_interval=5.0, log_level=logging.INFO, max_faces=1):
+    """
+    Renders a makeup look onto every image of a directory or glob using a process pool.
+
+    :param input_path: Input directory or glob pattern.
+    :param params_path: Makeup parameters JSON as written by MakeupApp.save_makeup_parameters.
+    :param output_dir: Directory the rendered images are written to, mirroring the input layout.
+    :param workers: Number of worker processes (defaults to the CPU count).
+    :param chunksize: Number of images handed to a worker at a time.
+    :param overwrite: If False, images that already have an output are skipped (resume).
+    :param report_interval: Seconds between progress reports.
+    :param log_level: Logging level used in the worker processes.
+    :param max_faces: Maximum number of faces made up per image.
+    :return: Dictionary of counts per status plus elapsed time and images per second.
+    """
+    makeup_params = load_makeup_params(params_path)
+    remove_partial_outputs(output_dir)
+    tasks = iter_pending(iter_input_images(input_path), output_dir, overwrite=overwrite)
+    counts = {'ok': 0, 'no_face': 0, 'error': 0}
+
+    start = time.perf_counter()
+    last_report = start
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(makeup_params, log_level, max_faces)) as pool:
+        for image_path, status, elapsed in pool.imap_unordered(_process_image, tasks, chunksize=chunksize):
+            counts[status] += 1
+            if status == 'no_face':
+                logger.warning("No face detected in %s. Skipped.", image_path)
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                done = sum(counts.values())
+                logger.info("Processed %s images (%.1f images/sec).", done, done / (now - start))
+                last_report = now
+
+    total_time = time.perf_counter() - start
+    done = sum(counts.values())
+    summary = dict(counts, elapsed=total_time, images_per_sec=done / total_time if total_time > 0 else 0.0)
+    logger.info(
+        "Batch finished: %s rendered, %s without face, %s failed in %.1fs (%.1f images/sec).",
+        counts['ok'], counts['no_face'], counts['error'], total_time, summary['images_per_sec']
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a saved makeup look to a directory of images.")
+    parser.add_argument('input', help="Input directory or glob pattern (quote it, e.g. 'photos/**/*.jpg').")
+    parser.add_argument('params', help="Makeup parameters JSON saved from the GUI.")
+    parser.add_argument('output', help="Output directory.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument('--chunksize', type=int, default=4, help="Images dispatched to a worker at a time.")
+    parser.add_argument('--max-faces', type=int, default=1, help="Maximum number of faces per image (default: 1).")
+    parser.add_argument('--overwrite', action='store_true', help="Re-render images that already have an output.")
+    parser.add_argument('--log-level', default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args()
+
+    log_level = configure_logging(args.log_level)
+    run_batch(
+        args.input,
+        args.params,
+        args.output,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        overwrite=args.overwrite,
+        log_level=log_level,
+        max_faces=args.max_faces
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_color_overlay.py
+#
+# Compares the former full-frame color overlay blend, a per-layer direct color blend
+# with hard masks and the soft-alpha compositor (src.compositor.fuse_layers), for the
+# makeup types the GUI enables. The last column is the direct blend time divided by the
+# compositor time.
+#
+# Usage: python -m benchmarks.bench_color_overlay [--iterations N]
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from src.compositor import MakeupLayer, region_bbox, build_region_mask, fuse_layers
+from src.makeup_config import MAKEUP_TYPES
+from benchmarks.common import RESOLUTIONS, synthetic_landmarks
+
+GUI_MAKEUP_TYPES = ['Lipstick Upper', 'Lipstick Lower', 'Blush', 'Eyebrow', 'Foundation']
+
+
+def overlay_blend(output, source, mask, bbox, color, intensity):
+    """
+    The previous blend: full-frame constant overlay, 15x15 blur, full-frame addWeighted.
+    """
+    x0, y0, x1, y1 = bbox
+    color_overlay = np.full(source.shape, color, dtype=np.uint8)
+    color_overlay = cv2.GaussianBlur(color_overlay, (15, 15), 0)
+    blended = cv2.addWeighted(color_overlay, intensity, source, 1 - intensity, 0)
+    makeup_mask = mask.astype(bool)
+    output[y0:y1, x0:x1][makeup_mask] = blended[y0:y1, x0:x1][makeup_mask]
+
+
+def direct_blend(output, source, mask, bbox, color, intensity):
+    """
+    One hard-mask blend per layer: per-channel affine transform of the ROI, masked copy.
+    """
+    x0, y0, x1, y1 = bbox
+    blend_matrix = np.zeros((3, 4), dtype=np.float64)
+    blend_matrix[:, :3] = np.eye(3) * (1 - intensity)
+    blend_matrix[:, 3] = np.asarray(color, dtype=np.float64) * intensity
+    blended = cv2.transform(source[y0:y1, x0:x1], blend_matrix)
+    cv2.copyTo(blended, mask, output[y0:y1, x0:x1])
+
+
+def time_blend(blend, frame, layers, iterations):
+    output = frame.copy()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for layer in layers:
+            blend(output, frame, layer.mask, layer.bbox, layer.color, layer.intensity)
+    return (time.perf_counter() - start) / iterations * 1000.0
+
+
+def time_fused(frame, layers, iterations):
+    output = frame.copy()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fuse_layers(output, layers)
+    return (time.perf_counter() - start) / iterations * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the makeup color blend.")
+    parser.add_argument('--iterations', type=int, default=50, help="Frames timed per resolution (default: 50).")
+    args = parser.parse_args()
+
+    print(f"Blend cost per frame for {len(GUI_MAKEUP_TYPES)} makeup types ({', '.join(GUI_MAKEUP_TYPES)})")
+    print(f"{'resolution':>10} {'overlay ms':>12} {'direct ms':>12} {'fused ms':>10} {'vs direct':>10}")
+    rng = np.random.default_rng(0)
+    for name, (width, height) in RESOLUTIONS.items():
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        landmarks = synthetic_landmarks(width, height)
+        layers = []
+        for makeup_type in GUI_MAKEUP_TYPES:
+            point_sets = [landmarks[region.indices] for region in MAKEUP_TYPES[makeup_type].regions]
+            bbox = region_bbox(point_sets, frame.shape)
+            config = MAKEUP_TYPES[makeup_type].config
+            layers.append(MakeupLayer(
+                makeup_type, bbox, build_region_mask(point_sets, bbox), (40, 30, 180), 0.3, config.layer
+            ))
+
+        overlay_ms = time_blend(overlay_blend, frame, layers, args.iterations)
+        direct_ms = time_blend(direct_blend, frame, layers, args.iterations)
+        fused_ms = time_fused(frame, layers, args.iterations)
+        print(f"{name:>10} {overlay_ms:>12.2f} {direct_ms:>12.2f} {fused_ms:>10.2f} "
+              f"{direct_ms / fused_ms:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
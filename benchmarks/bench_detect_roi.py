@@ -0,0 +1,77 @@
+# benchmarks/bench_detect_roi.py
+#
+# Compares FaceDetector on full camera frames against downscaled inference and face-ROI
+# cropping. A bundled reference face is placed on a 720p and a 1080p canvas, moving a few
+# pixels per frame, and each mode is timed in video mode. Also reports the mean landmark
+# distance to the full-resolution, full-frame result.
+#
+# Usage: python -m benchmarks.bench_detect_roi [--frames N]
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from src.face_detection import FaceDetector
+from benchmarks.common import RESOLUTIONS, time_call
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_IMAGE = os.path.join(ROOT, 'assets', 'reference_images', 'sample_makeup.jpeg')
+
+MODES = {
+    'full frame': {},
+    'inference 640': {'inference_size': 640},
+    'roi': {'roi_tracking': True},
+    'roi + inference 256': {'roi_tracking': True, 'inference_size': 256}
+}
+
+
+def synthetic_clip(width, height, frames):
+    """
+    Frames with the reference face, scaled to a third of the frame height, drifting to the right.
+    """
+    face = cv2.imread(REFERENCE_IMAGE)
+    face_h = height // 3
+    face = cv2.resize(face, (round(face.shape[1] * face_h / face.shape[0]), face_h), interpolation=cv2.INTER_AREA)
+    clip = []
+    for index in range(frames):
+        frame = np.full((height, width, 3), 96, dtype=np.uint8)
+        x = width // 3 + 2 * index
+        y = height // 3
+        frame[y:y + face.shape[0], x:x + face.shape[1]] = face
+        clip.append(frame)
+    return clip
+
+
+def run_clip(detector, clip):
+    return [detector.detect_faces(frame) for frame in clip]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face-ROI and downscaled FaceMesh inference.")
+    parser.add_argument('--frames', type=int, default=60, help="Frames per clip (default: 60).")
+    args = parser.parse_args()
+
+    print(f"{'resolution':<12} {'mode':<22} {'ms/frame':>9} {'landmark err px':>16} {'full searches':>14}")
+    for resolution in ('720p', '1080p'):
+        width, height = RESOLUTIONS[resolution]
+        clip = synthetic_clip(width, height, args.frames)
+        reference = None
+        for mode, options in MODES.items():
+            detector = FaceDetector(**options)
+            detector.warmup(background=False)
+            faces = run_clip(detector, clip)
+            detector.reset()
+            total_ms = np.median(time_call(run_clip, detector, clip, iterations=3))
+            if reference is None:
+                reference = faces
+            errors = [np.linalg.norm(found[0] - expected[0], axis=1).mean()
+                      for found, expected in zip(faces, reference) if found and expected]
+            error = f"{np.mean(errors):.2f}" if errors else "n/a"
+            print(f"{resolution:<12} {mode:<22} {total_ms / len(clip):>9.2f} {error:>16} "
+                  f"{detector.stats()['full_searches']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_landmark_filter.py
+#
+# Measures how much LandmarkFilter steadies landmarks and what it costs. Landmarks are
+# either synthetic (a still face with detector-like jitter and integer rounding, then a
+# steady pan) or detected on a recorded session (see webcam_test.py --record). Reports
+# the jitter (RMS distance of each landmark to its centered 5-frame moving average), the
+# share of region masks the mask cache could reuse, and the filter time per frame.
+#
+# Usage: python -m benchmarks.bench_landmark_filter [--session SESSION_DIR] [--frames N]
+
+import argparse
+import time
+
+import numpy as np
+
+from src.landmark_filter import LandmarkFilter
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+from src.makeup_transfer import MakeupTransfer
+from src.mask_cache import MaskCache
+from benchmarks.common import synthetic_landmarks
+
+GUI_MAKEUP_TYPES = ['Lipstick Upper', 'Lipstick Lower', 'Blush', 'Eyebrow', 'Foundation']
+
+
+def synthetic_track(frames, width=1280, height=720, noise=0.8, fps=30.0):
+    """
+    :return: Tuple (frame shape, list of (timestamp, [landmarks])) with the face still for the
+             first half of the frames and panning by 4 pixels per frame afterwards
+    """
+    rng = np.random.default_rng(0)
+    face = synthetic_landmarks(width, height).astype(np.float64)
+    track = []
+    for index in range(frames):
+        shift = (max(0, index - frames // 2) * 4.0, 0.0)
+        points = face + shift + rng.normal(0.0, noise, face.shape)
+        track.append((index / fps, [points.astype(np.int32)]))
+    return (height, width, 3), track
+
+
+def session_track(path):
+    """
+    :return: Tuple (frame shape, list of (timestamp, faces_landmarks)) detected on every recorded frame
+    """
+    from src.face_detection import FaceDetector
+    from src.frame_sources import RecordedSessionSource
+
+    detector = FaceDetector()
+    source = RecordedSessionSource(path, realtime=False).open()
+    track = []
+    shape = None
+    while True:
+        item = source.read()
+        if item is None:
+            break
+        frame, timestamp = item
+        shape = frame.shape
+        track.append((timestamp, detector.detect_faces(frame)))
+    source.release()
+    return shape, track
+
+
+def jitter(track):
+    """
+    RMS distance in pixels of the first face's landmarks to their centered 5-frame moving
+    average, over runs of frames where a face was found.
+    """
+    residuals = []
+    points = [faces[0].astype(np.float64) if faces else None for _, faces in track]
+    for index in range(2, len(points) - 2):
+        window = points[index - 2:index + 3]
+        if any(p is None or p.shape != window[0].shape for p in window):
+            continue
+        residuals.append(((points[index] - np.mean(window, axis=0)) ** 2).sum(axis=1).mean())
+    return float(np.sqrt(np.mean(residuals))) if residuals else float('nan')
+
+
+def mask_reuse(shape, track):
+    cache = MaskCache()
+    transfer = MakeupTransfer(mask_cache=cache)
+    params = {config.name: {'color': config.default_color, 'intensity': config.default_intensity}
+              for config in MAKEUP_TYPES_CONFIG if config.name in GUI_MAKEUP_TYPES}
+    for _, faces in track:
+        for index, landmarks in enumerate(faces):
+            transfer.build_layers(shape, landmarks, params, face_index=index)
+    return cache.stats()['hit_rate']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark landmark jitter with and without LandmarkFilter.")
+    parser.add_argument('--session', help="Recorded session directory (default: synthetic landmarks).")
+    parser.add_argument('--frames', type=int, default=300, help="Synthetic frames (default: 300).")
+    parser.add_argument('--min-cutoff', type=float, default=1.0, help="Filter cutoff of a still landmark in Hz.")
+    parser.add_argument('--beta', type=float, default=0.1, help="Filter cutoff increase per pixel per second.")
+    args = parser.parse_args()
+
+    shape, raw = session_track(args.session) if args.session else synthetic_track(args.frames)
+
+    landmark_filter = LandmarkFilter(min_cutoff=args.min_cutoff, beta=args.beta)
+    filtered = []
+    elapsed = 0.0
+    for timestamp, faces in raw:
+        start = time.perf_counter()
+        filtered.append((timestamp, landmark_filter.filter(faces, timestamp)))
+        elapsed += time.perf_counter() - start
+
+    print(f"{len(raw)} frames from {args.session or 'synthetic landmarks'}")
+    print(f"{'':<10} {'jitter px':>10} {'mask reuse':>11}")
+    for name, track in (('raw', raw), ('filtered', filtered)):
+        print(f"{name:<10} {jitter(track):>10.3f} {mask_reuse(shape, track):>10.1%}")
+    print(f"filter time {elapsed / len(raw) * 1e6:.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_logging.py
+#
+# Measures the per-frame cost of the logging calls made on the render path: eagerly
+# formatted f-strings, deferred %-formatting and the RateLimitedLogger, with the records
+# either filtered out (production, WARNING) or emitted to a discarding handler (INFO).
+#
+# Usage: python -m benchmarks.bench_logging [--frames N]
+
+import argparse
+import logging
+import time
+
+from utils.logging_utils import RateLimitedLogger
+
+MAKEUP_TYPES = ['Lipstick Upper', 'Lipstick Lower', 'Blush', 'Eyebrow', 'Foundation']
+
+
+def eager_frame(logger):
+    # Former style: every message formatted before the level check
+    logger.info(f"Applying makeup types: {MAKEUP_TYPES}")
+    for makeup_type in MAKEUP_TYPES:
+        logger.debug(f"{makeup_type} mask created within ROI {(100, 120, 220, 180)}.")
+    logger.debug(f"Makeup applied for {[name for name in MAKEUP_TYPES]}.")
+    logger.info("Makeup applied.")
+
+
+def deferred_frame(logger):
+    logger.info("Applying makeup types: %s", MAKEUP_TYPES)
+    for makeup_type in MAKEUP_TYPES:
+        logger.debug("%s mask created within ROI %s.", makeup_type, (100, 120, 220, 180))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Makeup applied for %s.", [name for name in MAKEUP_TYPES])
+    logger.info("Makeup applied.")
+
+
+def rate_limited_frame(logger, frame_logger):
+    frame_logger.info("Applying makeup types: %s", MAKEUP_TYPES)
+    for makeup_type in MAKEUP_TYPES:
+        logger.debug("%s mask created within ROI %s.", makeup_type, (100, 120, 220, 180))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Makeup applied for %s.", [name for name in MAKEUP_TYPES])
+    frame_logger.info("Makeup applied.")
+
+
+def time_frames(frame, args, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame(*args)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the logging overhead of the render path.")
+    parser.add_argument('--frames', type=int, default=20000, help="Simulated frames per case (default: 20000).")
+    args = parser.parse_args()
+
+    logger = logging.getLogger('benchmarks.bench_logging')
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    frame_logger = RateLimitedLogger(logger)
+
+    print(f"{'level':<10} {'eager us':>10} {'deferred us':>12} {'rate-limited us':>16}")
+    for level in (logging.WARNING, logging.INFO):
+        logger.setLevel(level)
+        frame_logger.reset()
+        eager = time_frames(eager_frame, (logger,), args.frames)
+        deferred = time_frames(deferred_frame, (logger,), args.frames)
+        limited = time_frames(rate_limited_frame, (logger, frame_logger), args.frames)
+        print(f"{logging.getLevelName(level):<10} {eager:>10.2f} {deferred:>12.2f} {limited:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_multi_face.py
+#
+# Compares rendering several faces with one apply_makeup call per face (one frame copy,
+# composite and edge feathering each) against a single apply_makeup_multi call, for the
+# makeup types the GUI enables.
+#
+# Usage: python -m benchmarks.bench_multi_face [--iterations N] [--max-faces N]
+
+import argparse
+
+import numpy as np
+
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+from src.makeup_transfer import MakeupTransfer
+from benchmarks.common import RESOLUTIONS, synthetic_landmarks, time_call
+
+GUI_MAKEUP_TYPES = ['Lipstick Upper', 'Lipstick Lower', 'Blush', 'Eyebrow', 'Foundation']
+
+
+def synthetic_faces(width, height, count):
+    """
+    Landmarks of count faces side by side, each in its own slot across the frame.
+    """
+    faces = []
+    for index in range(count):
+        # A face-sized box centered in the slot, as synthetic_landmarks does for the whole frame
+        landmarks = synthetic_landmarks(width // count, height, seed=index).astype(np.int64)
+        landmarks[:, 0] += index * (width // count)
+        faces.append(landmarks.astype(np.int32))
+    return faces
+
+
+def per_face(transfer, image, faces, params):
+    for landmarks in faces:
+        image = transfer.apply_makeup(image, landmarks, params)
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-face against batched multi-face rendering.")
+    parser.add_argument('--iterations', type=int, default=20, help="Timed calls per case (default: 20).")
+    parser.add_argument('--max-faces', type=int, default=4, help="Largest number of faces (default: 4).")
+    args = parser.parse_args()
+
+    transfer = MakeupTransfer()
+    params = {config.name: {'color': config.default_color, 'intensity': config.default_intensity}
+              for config in MAKEUP_TYPES_CONFIG if config.name in GUI_MAKEUP_TYPES}
+    rng = np.random.default_rng(0)
+
+    print(f"{'resolution':<12} {'faces':>5} {'per-face ms':>12} {'batched ms':>11}")
+    for resolution, (width, height) in RESOLUTIONS.items():
+        image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        for count in range(1, args.max_faces + 1):
+            faces = synthetic_faces(width, height, count)
+            separate = np.median(time_call(per_face, transfer, image, faces, params, iterations=args.iterations))
+            batched = np.median(time_call(transfer.apply_makeup_multi, image, faces, params,
+                                          iterations=args.iterations))
+            print(f"{resolution:<12} {count:>5} {separate:>12.2f} {batched:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
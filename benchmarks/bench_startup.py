@@ -0,0 +1,81 @@
+# benchmarks/bench_startup.py
+#
+# Measures cold-start latency in fresh interpreters: importing the GUI module and the
+# try-on core, constructing MakeupTryOn, and the first frame (face detection, which waits
+# for the FaceMesh graph, plus makeup rendering) on a bundled reference image.
+#
+# Usage: python -m benchmarks.bench_startup [--runs N]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_IMAGE = os.path.join(ROOT, 'assets', 'reference_images', 'sample_makeup.jpeg')
+
+# Runs in a fresh interpreter so that no module is already imported
+CHILD = """
+import json, logging, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+import interface
+timings = {'import_interface': time.perf_counter() - start}
+
+import cv2
+from main import MakeupTryOn
+from benchmarks.common import synthetic_landmarks
+
+start = time.perf_counter()
+makeup_tryon = MakeupTryOn()
+timings['construct'] = time.perf_counter() - start
+
+image = cv2.imread(%r)
+start = time.perf_counter()
+try:
+    faces_landmarks = makeup_tryon.face_detector.detect_faces(image)
+    timings['first_detect'] = time.perf_counter() - start
+except Exception:
+    faces_landmarks = []
+faces_landmarks = faces_landmarks or [synthetic_landmarks(image.shape[1], image.shape[0])]
+
+start = time.perf_counter()
+makeup_tryon.render_makeup(image, faces_landmarks)
+timings['first_render'] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def measure(runs):
+    """
+    :return: Dictionary of phase names to lists of durations in milliseconds
+    """
+    samples = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', CHILD % REFERENCE_IMAGE], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        for name, seconds in timings.items():
+            samples.setdefault(name, []).append(seconds * 1000.0)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start and first-frame latency.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start (default: 5).")
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    print(f"{'phase':<18} {'median ms':>10} {'max ms':>10}")
+    for name in ('import_interface', 'construct', 'first_detect', 'first_render'):
+        if name in samples:
+            print(f"{name:<18} {np.median(samples[name]):>10.1f} {np.max(samples[name]):>10.1f}")
+    if 'first_detect' not in samples:
+        print("Face detection unavailable (MediaPipe could not be loaded); first_render used synthetic landmarks.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/common.py
+
+import time
+
+import numpy as np
+
+RESOLUTIONS = {'480p': (640, 480), '720p': (1280, 720), '1080p': (1920, 1080)}
+
+
+def synthetic_landmarks(width, height, num_landmarks=478, seed=0):
+    """
+    Random landmarks spread over a face-sized box in the middle of the frame.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(width * 0.35, width * 0.65, num_landmarks)
+    y = rng.uniform(height * 0.2, height * 0.8, num_landmarks)
+    return np.stack([x, y], axis=1).astype(np.int32)
+
+
+def time_call(func, *args, iterations=10, warmup=1):
+    """
+    Calls func(*args) repeatedly and returns the durations in milliseconds.
+    """
+    for _ in range(warmup):
+        func(*args)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def latency_stats(samples):
+    """
+    :param samples: List of durations in milliseconds
+    :return: Dictionary with count, mean, min, p50, p95, p99 (ms) and the matching calls per second
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    mean = float(samples.mean())
+    return {
+        'count': int(len(samples)),
+        'mean_ms': mean,
+        'min_ms': float(samples.min()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'per_sec': 1000.0 / mean if mean > 0 else 0.0
+    }
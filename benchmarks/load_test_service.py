@@ -0,0 +1,100 @@
+# benchmarks/load_test_service.py
+#
+# Load test of a running try-on service (python service.py): a number of concurrent
+# clients, each on its own keep-alive connection, post a bundled reference image to
+# /tryon (or /colors) for a fixed duration. Reports throughput, the share of requests
+# refused with 503, client latency percentiles and the mean server-side stage durations
+# from the Server-Timing headers.
+#
+# Usage: python -m benchmarks.load_test_service [--concurrency N] [--duration S] [--endpoint tryon|colors]
+
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from service_client import ServiceError, TryOnClient
+from benchmarks.common import latency_stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_IMAGE = os.path.join(ROOT, 'assets', 'reference_images', 'sample_makeup.jpeg')
+
+
+def run_client(host, port, body, endpoint, deadline, results, lock):
+    client = TryOnClient(host, port)
+    latencies, timings, statuses = [], [], {}
+    while time.perf_counter() < deadline:
+        try:
+            if endpoint == 'colors':
+                client.extract_colors(body)
+            else:
+                client.tryon(body)
+            status = 200
+            latencies.append(client.last_timings['round_trip'])
+            timings.append(client.last_timings)
+        except ServiceError as e:
+            status = e.status
+            if status == 503:
+                # Back off as the Retry-After header asks, but far shorter so the queue stays full
+                time.sleep(0.01)
+        except OSError:
+            status = 'connection_error'
+            time.sleep(0.1)
+        statuses[status] = statuses.get(status, 0) + 1
+    client.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        results['timings'].extend(timings)
+        for status, count in statuses.items():
+            results['statuses'][status] = results['statuses'].get(status, 0) + count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local try-on service.")
+    parser.add_argument('--host', default='127.0.0.1', help="Service address (default: 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=8080, help="Service port (default: 8080).")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients (default: 16).")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds to run (default: 20).")
+    parser.add_argument('--endpoint', choices=['tryon', 'colors'], default='tryon', help="Endpoint to call.")
+    parser.add_argument('--image', default=REFERENCE_IMAGE, help="Image posted in every request.")
+    parser.add_argument('--width', type=int, default=None, help="Resize the image to this width first.")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if args.width:
+        image = cv2.resize(image, (args.width, round(image.shape[0] * args.width / image.shape[1])))
+    body = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+    results = {'latencies': [], 'timings': [], 'statuses': {}}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=run_client, args=(args.host, args.port, body, args.endpoint, deadline, results, lock))
+               for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(results['statuses'].values())
+    ok = results['statuses'].get(200, 0)
+    print(f"{args.concurrency} clients, {args.duration:.0f}s, {image.shape[1]}x{image.shape[0]} image, /{args.endpoint}")
+    print(f"requests {total}  ok {ok}  ({ok / elapsed:.1f}/s)  refused {results['statuses'].get(503, 0)}  "
+          f"statuses {results['statuses']}")
+    if not results['latencies']:
+        return
+    stats = latency_stats(results['latencies'])
+    print(f"latency ms  mean {stats['mean_ms']:.1f}  p50 {stats['p50_ms']:.1f}  "
+          f"p95 {stats['p95_ms']:.1f}  p99 {stats['p99_ms']:.1f}")
+    names = sorted({name for timings in results['timings'] for name in timings if name != 'round_trip'})
+    for name in names:
+        values = [timings[name] for timings in results['timings'] if name in timings]
+        print(f"  server {name:<8} mean {np.mean(values):>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
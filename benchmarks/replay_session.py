@@ -0,0 +1,57 @@
+# benchmarks/replay_session.py
+#
+# Replays a recorded session (see webcam_test.py --record) through MakeupTryOn so that
+# pipeline changes can be profiled deterministically against the same real frames.
+# Without --realtime every frame is processed, also in pipelined mode.
+#
+# Usage: python -m benchmarks.replay_session SESSION_DIR [--params look.json] [--pipelined] [--realtime]
+
+import argparse
+import json
+import logging
+import time
+
+from main import MakeupTryOn
+from src.frame_sources import RecordedSessionSource
+from utils.utils import load_makeup_params
+from utils.logging_utils import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the try-on pipeline on a recorded session.")
+    parser.add_argument('session', help="Session directory written by SessionRecorder.")
+    parser.add_argument('--params', help="Makeup parameters JSON (default: every type with its default look).")
+    parser.add_argument('--pipelined', action='store_true', help="Use the pipelined capture/detect/render mode.")
+    parser.add_argument('--tracking', action='store_true', help="Track landmarks between detections.")
+    parser.add_argument('--realtime', action='store_true', help="Replay at the recorded cadence instead of flat out.")
+    parser.add_argument('--target-fps', type=float, default=None,
+                        help="Let the quality governor hold this frame rate (default: full quality).")
+    parser.add_argument('--output', help="Write the collected metrics to this JSON file.")
+    args = parser.parse_args()
+
+    # Keep log output out of the measured frame times
+    configure_logging(logging.ERROR)
+
+    makeup_tryon = MakeupTryOn(tracking=args.tracking, metrics_enabled=True, target_fps=args.target_fps)
+    if args.params:
+        makeup_tryon.makeup_params = load_makeup_params(args.params)
+
+    source = RecordedSessionSource(args.session, realtime=args.realtime)
+    start = time.perf_counter()
+    makeup_tryon.start_webcam(None, pipelined=args.pipelined, frame_source=source)
+    elapsed = time.perf_counter() - start
+
+    metrics = makeup_tryon.get_metrics()
+    frames = metrics['pipeline'].get('render', {}).get('count', 0)
+    print(f"Replayed {len(source)} frames, processed {frames} in {elapsed:.2f}s ({frames / elapsed:.1f} FPS).")
+    if metrics['quality']:
+        print(f"Quality level {metrics['quality']['level']} after {metrics['quality']['changes']} changes.")
+    for name, stats in sorted(metrics['stages'].items()):
+        print(f"{name:<40} p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(metrics, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/run_benchmarks.py
+#
+# Camera-free benchmark suite for the try-on pipeline. Drives FaceDetector.detect_faces,
+# MakeupTransfer.extract_makeup_color, MakeupTransfer.apply_makeup, overlay_segmentation and draw_segmentation
+# over the bundled reference images and synthetic frames at 480p/720p/1080p, for every
+# combination of the configured makeup types, and reports latency distributions.
+#
+# Usage:
+#   python -m benchmarks.run_benchmarks --output baseline.json
+#   python -m benchmarks.run_benchmarks --baseline baseline.json --tolerance 0.15
+
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+from src.makeup_transfer import MakeupTransfer
+from utils.visualization import overlay_segmentation, draw_segmentation
+from utils.logging_utils import configure_logging
+from benchmarks.common import RESOLUTIONS, synthetic_landmarks, time_call, latency_stats
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'reference_images')
+GUI_MAKEUP_TYPES = ['Lipstick Upper', 'Lipstick Lower', 'Blush', 'Eyebrow', 'Foundation']
+
+
+def create_detector():
+    """
+    :return: A FaceDetector in static image mode, or None if MediaPipe is unavailable
+    """
+    try:
+        from src.face_detection import FaceDetector
+        detector = FaceDetector(static_image_mode=True)
+        detector.warmup(background=False)
+        return detector
+    except Exception as e:
+        logger.warning("FaceDetector unavailable (%s); using synthetic landmarks and skipping detection.", e)
+        return None
+
+
+def load_frames(reference_dir, detector):
+    """
+    Builds the benchmark frames: every reference image resized to each resolution (with its
+    detected landmarks scaled along) plus one synthetic noise frame per resolution.
+
+    :return: List of (source, resolution, image, landmarks) tuples
+    """
+    frames = []
+    paths = sorted(p for p in glob.glob(os.path.join(reference_dir, '*'))
+                   if p.lower().endswith(('.jpg', '.jpeg', '.png')))
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            logger.warning("Skipping unreadable reference image: %s", path)
+            continue
+        landmarks = None
+        if detector is not None:
+            faces_landmarks = detector.detect_faces(image)
+            landmarks = faces_landmarks[0] if faces_landmarks else None
+            if landmarks is None:
+                logger.warning("No face detected in %s; using synthetic landmarks.", path)
+        height, width = image.shape[:2]
+        for resolution, (target_width, target_height) in RESOLUTIONS.items():
+            resized = cv2.resize(image, (target_width, target_height), interpolation=cv2.INTER_AREA)
+            if landmarks is not None:
+                scale = np.array([target_width / width, target_height / height])
+                scaled = (landmarks * scale).astype(np.int32)
+            else:
+                scaled = synthetic_landmarks(target_width, target_height)
+            frames.append((os.path.basename(path), resolution, resized, scaled))
+
+    rng = np.random.default_rng(0)
+    for resolution, (width, height) in RESOLUTIONS.items():
+        noise = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (5, 5), 0)
+        frames.append(('synthetic', resolution, noise, synthetic_landmarks(width, height)))
+    return frames
+
+
+def makeup_combinations(max_types):
+    names = [config.name for config in MAKEUP_TYPES_CONFIG]
+    for size in range(1, min(max_types, len(names)) + 1):
+        yield from itertools.combinations(names, size)
+
+
+def run_suite(frames, detector, iterations=10, combo_iterations=3, max_types=None):
+    """
+    Runs every benchmark and returns latency statistics keyed by 'function/resolution[/types]'.
+    """
+    transfer = MakeupTransfer()
+    all_types = [config.name for config in MAKEUP_TYPES_CONFIG]
+    params = {config.name: {'color': config.default_color, 'intensity': config.default_intensity}
+              for config in MAKEUP_TYPES_CONFIG}
+    gui_params = {name: params[name] for name in GUI_MAKEUP_TYPES}
+    combos = list(makeup_combinations(max_types or len(all_types)))
+
+    samples = {}
+
+    def add(key, values):
+        samples.setdefault(key, []).extend(values)
+
+    for source, resolution, image, landmarks in frames:
+        logger.info("Benchmarking %s at %s...", source, resolution)
+        if detector is not None and source != 'synthetic':
+            add(f"detect_faces/{resolution}", time_call(detector.detect_faces, image, iterations=iterations))
+
+        add(f"extract_makeup_color/{resolution}",
+            time_call(transfer.extract_makeup_color, image, landmarks, all_types, iterations=iterations))
+        add(f"overlay_segmentation/{resolution}",
+            time_call(overlay_segmentation, image, landmarks, all_types, iterations=iterations))
+        # What the live overlay costs: outlining the layers the frame was just rendered with
+        layers = transfer.build_layers(image.shape, landmarks, params)
+        add(f"draw_segmentation/{resolution}",
+            time_call(draw_segmentation, image.copy(), layers, iterations=iterations))
+
+        for combo in combos:
+            combo_params = {name: params[name] for name in combo}
+            add(f"apply_makeup/{resolution}/{'+'.join(combo)}",
+                time_call(transfer.apply_makeup, image, landmarks, combo_params, iterations=combo_iterations))
+
+        # End-to-end frame: detection (when available) plus the five GUI makeup types
+        def full_frame():
+            faces_landmarks = detector.detect_faces(image) if detector is not None else [landmarks]
+            transfer.apply_makeup_multi(image, faces_landmarks or [landmarks], gui_params)
+
+        add(f"frame/{resolution}", time_call(full_frame, iterations=iterations))
+
+    return {key: latency_stats(values) for key, values in samples.items()}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares p50 latencies against a baseline.
+
+    :return: List of (key, baseline_ms, current_ms, ratio) for benchmarks slower than 1 + tolerance
+    """
+    regressions = []
+    for key, stats in sorted(results.items()):
+        base = baseline.get(key)
+        if not base or base['p50_ms'] <= 0:
+            continue
+        ratio = stats['p50_ms'] / base['p50_ms']
+        if ratio > 1 + tolerance:
+            regressions.append((key, base['p50_ms'], stats['p50_ms'], ratio))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<72} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per sec':>9}")
+    for key, stats in sorted(results.items()):
+        print(f"{key:<72} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+              f"{stats['per_sec']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the camera-free try-on benchmark suite.")
+    parser.add_argument('--reference-dir', default=REFERENCE_DIR, help="Directory of reference images.")
+    parser.add_argument('--iterations', type=int, default=10, help="Timed calls per frame (default: 10).")
+    parser.add_argument('--combo-iterations', type=int, default=3,
+                        help="Timed apply_makeup calls per frame and makeup combination (default: 3).")
+    parser.add_argument('--max-types', type=int, default=None,
+                        help="Only benchmark combinations of at most this many makeup types.")
+    parser.add_argument('--output', help="Write the results to this JSON file (e.g. to use as a baseline).")
+    parser.add_argument('--baseline', help="Compare against a previously saved JSON file.")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed p50 slowdown relative to the baseline (default: 0.15).")
+    args = parser.parse_args()
+
+    configure_logging(logging.WARNING)
+
+    detector = create_detector()
+    frames = load_frames(args.reference_dir, detector)
+    start = time.perf_counter()
+    results = run_suite(frames, detector, args.iterations, args.combo_iterations, args.max_types)
+    print_results(results)
+    print(f"Suite finished in {time.perf_counter() - start:.1f}s.")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': time.time(),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'opencv': cv2.__version__,
+                    'numpy': np.__version__,
+                    'detector': detector is not None
+                },
+                'results': results
+            }, f, indent=2)
+        print(f"Results saved to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for key, base_ms, current_ms, ratio in regressions:
+            print(f"REGRESSION {key}: p50 {base_ms:.2f} -> {current_ms:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.tolerance:.0%}.")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,31 +6,100 @@ from PIL import Image, ImageTk
 import threading
 import cv2
 from main import MakeupTryOn
+from src.color_cache import ColorCache
 import numpy as np
-import torch
-import queue
 import logging
 import time
 from src.makeup_config import MAKEUP_TYPES_CONFIG
+from utils.logging_utils import RateLimitedLogger, configure_logging
+
+logger = logging.getLogger(__name__)
+# Per-frame messages are summarized instead of logged on every frame
+frame_logger = RateLimitedLogger(logger)
+
+
+class FramePresenter:
+    """
+    Shows rendered frames in a Tk label. Frames may be submitted from any thread; only the
+    newest one is kept, and the Tk thread is woken with a virtual event rather than by
+    polling. A single PhotoImage is reused and its pixels replaced with paste().
+    """
+
+    EVENT = '<<FrameReady>>'
+
+    def __init__(self, root, label):
+        """
+        :param root: Tk root window whose event loop presents the frames
+        :param label: Label widget displaying the frames
+        """
+        self.root = root
+        self.label = label
+        self.photo = None
+        self.current_frame = None  # Latest presented RGB frame, kept for snapshots
+        self.presented = 0
+        self.skipped = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self.root.bind(self.EVENT, self._present_pending)
+
+    def submit(self, frame):
+        """
+        Hands over an RGB frame for display. The frame must not be modified afterwards.
+        """
+        with self._lock:
+            wake = self._pending is None
+            if not wake:
+                self.skipped += 1
+            self._pending = frame
+        if wake:
+            try:
+                self.root.event_generate(self.EVENT, when='tail')
+            except (tk.TclError, RuntimeError) as e:
+                # The window is being destroyed, or Tcl cannot be called from this thread. Drop the
+                # frame so that the next submit tries to wake the Tk thread again.
+                with self._lock:
+                    self._pending = None
+                frame_logger.warning("Could not wake the display: %s", e)
+
+    def _present_pending(self, event=None):
+        with self._lock:
+            frame = self._pending
+            self._pending = None
+        if frame is None:
+            return
+        try:
+            self.present(frame)
+        except Exception as e:
+            logger.error("Error presenting frame: %s", e)
+
+    def present(self, frame):
+        """
+        Displays an RGB frame. Must be called on the Tk thread.
+        """
+        image = Image.fromarray(frame)
+        if self.photo is None or (self.photo.width(), self.photo.height()) != image.size:
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.label.configure(image=self.photo)
+        else:
+            self.photo.paste(image)
+        # Rendered frames are fresh arrays, so a reference is enough for snapshots
+        self.current_frame = frame
+        self.presented += 1
+
+    def reset(self):
+        with self._lock:
+            self._pending = None
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # DEBUG for detailed logs
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
 
 class MakeupApp:
     def __init__(self, root):
-        logging.info("Initializing MakeupApp GUI...")
+        logger.info("Initializing MakeupApp GUI...")
         self.root = root
         self.root.title("Real-Time Virtual Makeup Try-On")
         self.root.geometry("1400x900")  # Increased window size for better layout
 
-        # Initialize MakeupTryOn
-        self.makeup_tryon = MakeupTryOn(frame_width=640, frame_height=480)
+        # Initialize MakeupTryOn, lowering the rendering quality automatically when the machine cannot keep up
+        self.makeup_tryon = MakeupTryOn(frame_width=640, frame_height=480, color_cache=ColorCache(), target_fps=24)
 
         # Create a mapping from makeup type to default intensity
         self.default_intensities = {config.name: config.default_intensity for config in MAKEUP_TYPES_CONFIG}
@@ -128,6 +197,7 @@ class MakeupApp:
 
         self.webcam_label = tk.Label(self.webcam_frame)
         self.webcam_label.pack()
+        self.presenter = FramePresenter(self.root, self.webcam_label)
 
         # Controls Frame inside Webcam Feed
         self.controls_frame = tk.Frame(self.webcam_frame)
@@ -144,7 +214,8 @@ class MakeupApp:
         self.visualize_check = tk.Checkbutton(
             self.controls_frame, 
             text="Visualize Segmentation", 
-            variable=self.visualize_var
+            variable=self.visualize_var,
+            command=self.toggle_segmentation
         )
         self.visualize_check.grid(row=1, column=0, columnspan=2, pady=5)
 
@@ -173,8 +244,6 @@ class MakeupApp:
 
         self.thread = None  # Track the thread instance
         self.running = False
-        self.current_frame = None  # To store the latest frame
-        self.update_delay = 30  # milliseconds
 
         # Bind slider and color picker changes to update makeup_params
         for makeup_type in self.makeup_types:
@@ -185,9 +254,6 @@ class MakeupApp:
             btn = self.selected_makeups.get(f"{makeup_type}_btn")
             if btn:
                 btn.config(command=lambda mt=makeup_type: self.pick_makeup_color(mt))
-        
-        # Start the periodic GUI update
-        self.root.after(self.update_delay, self.process_queue)
 
     def update_makeup_controls(self):
         """
@@ -205,19 +271,19 @@ class MakeupApp:
                 slider.config(state=tk.DISABLED)
 
     def upload_image(self):
-        logging.info("Upload Image button clicked.")
+        logger.info("Upload Image button clicked.")
         file_path = filedialog.askopenfilename(
             title="Select Reference Image",
             filetypes=[("Image Files", "*.jpg *.jpeg *.png")]
         )
         if file_path:
             try:
-                logging.info(f"Loading reference image from: {file_path}")
+                logger.info("Loading reference image from: %s", file_path)
                 # Load and process the reference image
                 selected_makeups = [mt for mt, var in self.selected_makeups.items() if mt in self.makeup_types and self.selected_makeups[mt].get()]
                 if not selected_makeups:
                     messagebox.showwarning("No Makeup Selected", "Please select at least one makeup type.")
-                    logging.warning("No makeup type selected for extraction.")
+                    logger.warning("No makeup type selected for extraction.")
                     return
 
                 # Load reference image
@@ -244,19 +310,19 @@ class MakeupApp:
                         canvas = self.color_canvases[makeup_type]
                         canvas.delete("all")  # Clear previous color
                         canvas.create_rectangle(0, 0, 50, 25, fill=color_hex, outline=color_hex)
-                        logging.info(f"Makeup Color Displayed for {makeup_type}: {color_hex}")
+                        logger.info("Makeup Color Displayed for %s: %s", makeup_type, color_hex)
 
                         # Set slider intensity from MakeupTryOn's makeup_params
                         slider = self.selected_makeups.get(f"{makeup_type}_slider")
                         if slider:
                             slider.set(intensity)
-                            logging.info(f"Set default intensity for {makeup_type} to {intensity}")
+                            logger.info("Set default intensity for %s to %s", makeup_type, intensity)
 
                 messagebox.showinfo("Success", "Reference image loaded successfully!")
-                logging.info("Reference image loaded and displayed.")
+                logger.info("Reference image loaded and displayed.")
             except Exception as e:
                 messagebox.showerror("Error", str(e))
-                logging.error(f"Error loading reference image: {e}")
+                logger.error("Error loading reference image: %s", e)
 
     def update_intensity(self, makeup_type, value):
         """
@@ -269,9 +335,9 @@ class MakeupApp:
                     self.makeup_tryon.makeup_params[makeup_type]['intensity'] = intensity
                 else:
                     self.makeup_tryon.makeup_params[makeup_type] = {'intensity': intensity, 'color': (255, 255, 255)}
-            logging.debug(f"Updated intensity for {makeup_type} to {intensity}")
+            logger.debug("Updated intensity for %s to %s", makeup_type, intensity)
         except ValueError:
-            logging.error(f"Invalid intensity value: {value} for {makeup_type}")
+            logger.error("Invalid intensity value: %s for %s", value, makeup_type)
 
     def pick_makeup_color(self, makeup_type):
         color_code = colorchooser.askcolor(title=f"Choose {makeup_type} Color")
@@ -292,22 +358,22 @@ class MakeupApp:
                 canvas = self.color_canvases[makeup_type]
                 canvas.delete("all")
                 canvas.create_rectangle(0, 0, 50, 25, fill=color_hex, outline=color_hex)
-                logging.info(f"Custom Makeup Color Selected for {makeup_type}: {color_hex}")
+                logger.info("Custom Makeup Color Selected for %s: %s", makeup_type, color_hex)
             except ValueError as ve:
                 messagebox.showerror("Error", str(ve))
-                logging.error(f"Error converting color: {ve}")
+                logger.error("Error converting color: %s", ve)
 
     def start_makeup(self):
-        logging.info("Start Makeup button clicked.")
+        logger.info("Start Makeup button clicked.")
         with self.makeup_tryon.makeup_params_lock:
             if not self.makeup_tryon.makeup_params:
                 messagebox.showwarning("Warning", "Please upload a reference image first.")
-                logging.warning("Makeup try-on not started: Reference image not loaded.")
+                logger.warning("Makeup try-on not started: Reference image not loaded.")
                 return
 
         if self.makeup_tryon.running:
             messagebox.showwarning("Warning", "Makeup application is already running.")
-            logging.warning("Makeup try-on is already running.")
+            logger.warning("Makeup try-on is already running.")
             return
 
         # Update MakeupTryOn's makeup_params based on selected makeups
@@ -321,21 +387,19 @@ class MakeupApp:
                             'intensity': self.makeup_tryon.default_intensities.get(makeup_type, 0.6),
                             'color': self.makeup_tryon.makeup_params.get(makeup_type, {}).get('color', (255, 255, 255))
                         }
-                        logging.debug(f"Initialized makeup_params for {makeup_type} with default values.")
+                        logger.debug("Initialized makeup_params for %s with default values.", makeup_type)
                 else:
                     # If makeup type is not selected, remove it from makeup_params
                     if makeup_type in self.makeup_tryon.makeup_params:
                         del self.makeup_tryon.makeup_params[makeup_type]
-                        logging.debug(f"Removed {makeup_type} from makeup_params as it is not selected.")
+                        logger.debug("Removed %s from makeup_params as it is not selected.", makeup_type)
 
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.running = True
 
-        # Clear the frame queue before starting
-        with self.makeup_tryon.frame_queue.mutex:
-            self.makeup_tryon.frame_queue.queue.clear()
-            logging.info("Frame queue cleared.")
+        # Drop any frame still pending from a previous session
+        self.presenter.reset()
 
         # Start the webcam in a separate thread
         self.thread = threading.Thread(
@@ -344,72 +408,61 @@ class MakeupApp:
             daemon=True
         )
         self.thread.start()
-        logging.info("Webcam feed thread started.")
+        logger.info("Webcam feed thread started.")
+
+    def toggle_segmentation(self):
+        """
+        Turns the segmentation overlay on or off, also while the webcam is running.
+        """
+        self.makeup_tryon.set_visualize_segmentation(self.visualize_var.get())
 
     def stop_makeup(self):
-        logging.info("Stop Makeup button clicked.")
+        logger.info("Stop Makeup button clicked.")
         if not self.makeup_tryon.running:
             messagebox.showwarning("Warning", "Makeup application is not running.")
-            logging.warning("Makeup try-on is not running.")
+            logger.warning("Makeup try-on is not running.")
             return
 
         self.makeup_tryon.stop_webcam()
         self.running = False
-        self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
-        logging.info("Makeup application stopped.")
+        logger.info("Makeup application stopped.")
 
-        # Join the thread to ensure it has fully terminated
-        if self.thread and self.thread.is_alive():
-            self.thread.join()
-            logging.info("Webcam thread joined successfully.")
+        # Only allow a restart once the thread has fully terminated
+        self.wait_for_webcam_thread(lambda: self.start_button.config(state=tk.NORMAL))
 
-    def update_webcam_feed(self, frame):
+    def wait_for_webcam_thread(self, on_stopped):
         """
-        This method is called by the webcam thread to enqueue frames for the main thread to process.
+        Calls on_stopped once the webcam thread has exited. The thread may be waiting for the
+        Tk event loop to accept a frame, so this polls instead of blocking the loop in join().
         """
-        try:
-            self.makeup_tryon.frame_queue.put_nowait(frame)
-        except queue.Full:
-            # If the queue is full, discard the frame to maintain performance
-            logging.debug("Frame queue is full. Discarding frame.")
-            pass
+        if self.thread and self.thread.is_alive():
+            self.root.after(20, self.wait_for_webcam_thread, on_stopped)
+            return
+        if self.thread is not None:
+            self.thread = None
+            logger.info("Webcam thread joined successfully.")
+        on_stopped()
 
-    def process_queue(self):
+    def update_webcam_feed(self, frame):
         """
-        Periodically called to process frames from the queue and update the GUI.
+        This method is called by the render thread with every processed frame; the presenter
+        keeps only the newest one and wakes the main thread to display it.
         """
-        try:
-            while not self.makeup_tryon.frame_queue.empty():
-                frame = self.makeup_tryon.frame_queue.get_nowait()
-                img = Image.fromarray(frame)
-                imgtk = ImageTk.PhotoImage(image=img)
-
-                # Update the Label
-                self.webcam_label.imgtk = imgtk
-                self.webcam_label.configure(image=imgtk)
-
-                # Store the current frame for snapshot
-                self.current_frame = frame.copy()
-        except queue.Empty:
-            pass
-        except Exception as e:
-            logging.error(f"Error processing frame from queue: {e}")
-
-        # Schedule the next queue check
-        self.root.after(self.update_delay, self.process_queue)
+        self.presenter.submit(frame)
 
     def capture_snapshot(self):
-        if self.current_frame is not None:
+        current_frame = self.presenter.current_frame
+        if current_frame is not None:
             # Generate a unique filename
             timestamp = int(time.time())
             filename = f'snapshot_{timestamp}.png'
-            cv2.imwrite(filename, cv2.cvtColor(self.current_frame, cv2.COLOR_RGB2BGR))
+            cv2.imwrite(filename, cv2.cvtColor(current_frame, cv2.COLOR_RGB2BGR))
             messagebox.showinfo("Snapshot Captured", f"Snapshot saved as {filename}")
-            logging.info(f"Snapshot saved as {filename}")
+            logger.info("Snapshot saved as %s", filename)
         else:
             messagebox.showwarning("No Frame", "No frame available to capture.")
-            logging.warning("No frame available to capture.")
+            logger.warning("No frame available to capture.")
 
     def save_makeup_parameters(self):
         """
@@ -427,10 +480,10 @@ class MakeupApp:
                     with self.makeup_tryon.makeup_params_lock:
                         json.dump(self.makeup_tryon.makeup_params, f)
                 messagebox.showinfo("Success", f"Makeup parameters saved to {file_path}")
-                logging.info(f"Makeup parameters saved to {file_path}")
+                logger.info("Makeup parameters saved to %s", file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save parameters: {e}")
-                logging.error(f"Failed to save makeup parameters: {e}")
+                logger.error("Failed to save makeup parameters: %s", e)
 
     def load_makeup_parameters(self):
         """
@@ -465,28 +518,29 @@ class MakeupApp:
                             # Update the MakeupTryOn's makeup_params
                             self.makeup_tryon.makeup_params[makeup_type] = {'intensity': intensity, 'color': (b, g, r)}
                 messagebox.showinfo("Success", f"Makeup parameters loaded from {file_path}")
-                logging.info(f"Makeup parameters loaded from {file_path}")
+                logger.info("Makeup parameters loaded from %s", file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load parameters: {e}")
-                logging.error(f"Failed to load makeup parameters: {e}")
+                logger.error("Failed to load makeup parameters: %s", e)
 
     def on_closing(self):
-        logging.info("Closing application...")
+        logger.info("Closing application...")
         if self.makeup_tryon.running:
             self.makeup_tryon.stop_webcam()
-            if self.thread and self.thread.is_alive():
-                self.thread.join()
-                logging.info("Webcam thread joined during application close.")
+        self.wait_for_webcam_thread(self.destroy)
+
+    def destroy(self):
         self.root.destroy()
-        logging.info("Application closed.")
+        logger.info("Application closed.")
 
 def main():
-    logging.info("Launching GUI...")
+    configure_logging(logging.INFO)
+    logger.info("Launching GUI...")
     root = tk.Tk()
     app = MakeupApp(root)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
-    logging.info("GUI main loop ended.")
+    logger.info("GUI main loop ended.")
 
 if __name__ == "__main__":
     main()
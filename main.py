@@ -2,39 +2,101 @@
 
 import cv2
 from src.face_detection import FaceDetector
+from src.landmark_tracker import LandmarkTracker
+from src.landmark_filter import LandmarkFilter
 from src.makeup_transfer import MakeupTransfer
-from utils.visualization import overlay_segmentation
+from utils.visualization import draw_segmentation, draw_metrics_hud
 import threading
 import queue
 import time
 import numpy as np
 import logging
 from src.makeup_config import MAKEUP_TYPES_CONFIG  # Importing the configuration
+from src.pipeline import FramePipeline, StageStats, DEFAULT_PIPELINE_CONFIG, timed_call
+from src.metrics import FrameMetrics, MetricsExporter
+from src.frame_sources import CameraSource, VideoFileSource
+from src.mask_cache import MaskCache
+from src.quality_governor import QualityGovernor
+from src.color_cache import load_reference_colors
+from utils.logging_utils import RateLimitedLogger
+
+logger = logging.getLogger(__name__)
+# Per-frame messages are summarized instead of logged on every frame
+frame_logger = RateLimitedLogger(logger)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # DEBUG for detailed logs
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
 
 class MakeupTryOn:
-    def __init__(self, frame_width=640, frame_height=480):
+    def __init__(self, frame_width=640, frame_height=480, pipeline_config=DEFAULT_PIPELINE_CONFIG,
+                 tracking=False, detect_interval=5, motion_threshold=8.0, metrics_enabled=False, max_faces=1,
+                 mask_cache_tolerance=1.5, color_cache=None, inference_size=None, roi_tracking=False, target_fps=None,
+                 landmark_smoothing=True):
+        # Frame-time instrumentation shared by all components (near zero cost when disabled)
+        self.metrics = FrameMetrics(enabled=metrics_enabled)
+        self.metrics_exporter = None
+        self.show_metrics_hud = False
+        self._hud_summary = {}
+        self._hud_updated = 0.0
+
         # Initialize components
-        self.face_detector = FaceDetector()
-        self.makeup_transfer = MakeupTransfer()
-        self.cap = None
+        # Detection may run on a downscaled crop around the face while rendering stays at full resolution
+        self.face_detector = FaceDetector(
+            max_faces=max_faces,
+            metrics=self.metrics,
+            inference_size=inference_size,
+            roi_tracking=roi_tracking
+        )
+        # Build the FaceMesh graph in the background so it is ready by the first frame
+        self.face_detector.warmup()
+        # Reference photos are still images: they get their own full-resolution detector, so the
+        # live detector's crop, inference size and tracking state never apply to them (loaded on first use)
+        self.reference_detector = FaceDetector(max_faces=1, static_image_mode=True)
+        # Optional tracker that skips full detection between frames
+        self.face_tracker = LandmarkTracker(
+            self.face_detector,
+            detect_interval=detect_interval,
+            motion_threshold=motion_threshold
+        ) if tracking else None
+        # Removes the frame-to-frame jitter of the landmarks so masks stay steady (and reusable)
+        self.landmark_filter = LandmarkFilter() if landmark_smoothing else None
+        # Reuses region masks while the face stays still; None disables the cache
+        self.mask_cache = MaskCache(tolerance=mask_cache_tolerance) if mask_cache_tolerance is not None else None
+        self.makeup_transfer = MakeupTransfer(metrics=self.metrics, mask_cache=self.mask_cache)
+        # Optional ColorCache so known reference looks skip detection and extraction
+        self.color_cache = color_cache
+        # Settings the quality governor scales down from
+        self.inference_size = inference_size
+        self.detect_interval = detect_interval
+        self.quality_governor = None
+        self.quality_level = None
+        self.segmentation_allowed = True
+        self._detect_every = 1
+        self._frames_since_detection = 0
+        self._last_faces = []
+        self._detect_cost = 0.0
+        self._pipelined = False
+        self.frame_source = None
         self.running = False
         self.frame_width = frame_width
         self.frame_height = frame_height
-        self.frame_queue = queue.Queue(maxsize=10)
+        self.display_callback = None
+
+        # Pipelined mode configuration and per-stage timing counters
+        self.pipeline_config = pipeline_config
+        self.pipeline = None
+        self.stage_stats = {}
+        self.visualize_segmentation = False
+        # Contours of the masks outlined on the previous frame
+        self._outline_cache = {}
         
         # Initialize makeup_params as a dictionary of dictionaries
         self.makeup_params = {}
         self.makeup_params_lock = threading.Lock()
         
+        # Optional per-face looks, indexed by detection order; None entries use makeup_params
+        self.face_makeup_params = []
+
+        self.set_target_fps(target_fps)
+
         # Create a mapping for default intensities from configuration
         self.default_intensities = {config.name: config.default_intensity for config in MAKEUP_TYPES_CONFIG}
         
@@ -44,7 +106,7 @@ class MakeupTryOn:
                 'intensity': config.default_intensity,
                 'color': config.default_color
             }
-        logging.info("MakeupTryOn initialized with default makeup parameters.")
+        logger.info("MakeupTryOn initialized with default makeup parameters.")
     
     def convert_rgb_to_bgr(self, rgb_color):
         """
@@ -54,7 +116,7 @@ class MakeupTryOn:
         :return: Tuple of (B, G, R)
         """
         if not isinstance(rgb_color, tuple) or len(rgb_color) != 3:
-            logging.error("RGB color must be a tuple of 3 elements.")
+            logger.error("RGB color must be a tuple of 3 elements.")
             raise ValueError("RGB color must be a tuple of 3 elements.")
         return (int(rgb_color[2]), int(rgb_color[1]), int(rgb_color[0]))
     
@@ -66,32 +128,22 @@ class MakeupTryOn:
         :param reference_path: Path to the reference image.
         :param makeup_types: List of makeup types to extract.
         """
-        logging.info(f"Loading reference image from: {reference_path}")
-        # Load the image
-        image = cv2.imread(reference_path)
-        if image is None:
-            logging.error("Failed to load the reference image. Please check the file path.")
-            raise ValueError("Failed to load the reference image.")
-
-        # Detect faces and landmarks
-        faces_landmarks = self.face_detector.detect_faces(image)
-        if not faces_landmarks:
-            logging.error("No faces detected in the reference image.")
-            raise ValueError("No faces detected in the reference image.")
-
-        # For simplicity, consider the first detected face
-        landmarks = faces_landmarks[0]
-        logging.info("Face detected in the reference image.")
-
-        # Extract makeup colors based on the selected makeup styles
-        makeup_colors = self.makeup_transfer.extract_makeup_color(image, landmarks, makeup_types=makeup_types)
-        logging.info(f"Makeup colors extracted: {makeup_colors}")
+        logger.info("Loading reference image from: %s", reference_path)
+        # Detect the face and extract makeup colors, or look both up in the color cache
+        _, makeup_colors = load_reference_colors(
+            reference_path,
+            makeup_types,
+            self.reference_detector,
+            self.makeup_transfer,
+            cache=self.color_cache
+        )
+        logger.info("Makeup colors extracted: %s", makeup_colors)
 
         with self.makeup_params_lock:
             for makeup_type, color in makeup_colors.items():
                 if makeup_type in self.makeup_params:
                     self.makeup_params[makeup_type]['color'] = color
-                    logging.debug(f"Updated color for {makeup_type} to {color}.")
+                    logger.debug("Updated color for %s to %s.", makeup_type, color)
                 else:
                     # Initialize with default intensity if not present
                     default_intensity = self.default_intensities.get(makeup_type, 0.6)
@@ -99,7 +151,7 @@ class MakeupTryOn:
                         'intensity': default_intensity,
                         'color': color
                     }
-                    logging.debug(f"Initialized makeup_params for {makeup_type} with intensity {default_intensity} and color {color}.")
+                    logger.debug("Initialized makeup_params for %s with intensity %s and color %s.", makeup_type, default_intensity, color)
     
     def update_makeup_params(self, new_params):
         """
@@ -108,118 +160,453 @@ class MakeupTryOn:
         """
         with self.makeup_params_lock:
             self.makeup_params.update(new_params)
-            logging.debug(f"Makeup parameters updated: {self.makeup_params}")
+            logger.debug("Makeup parameters updated: %s", self.makeup_params)
+
+    def set_face_makeup_params(self, face_index, params):
+        """
+        Gives one face its own look in multi-face mode, or restores the shared look.
+
+        :param face_index: Index of the face in detection order.
+        :param params: makeup_params dictionary for that face, or None to use makeup_params.
+        """
+        with self.makeup_params_lock:
+            if face_index >= len(self.face_makeup_params):
+                self.face_makeup_params.extend([None] * (face_index + 1 - len(self.face_makeup_params)))
+            self.face_makeup_params[face_index] = params
+            logger.debug("Makeup parameters for face %s updated: %s", face_index, params)
 
-    def start_webcam(self, display_callback, visualize_segmentation=False):
+    def start_webcam(self, display_callback, visualize_segmentation=False, pipelined=False, frame_source=None):
         """
         Starts the webcam and applies makeup in real-time based on the shared makeup_params.
 
-        :param display_callback: Function to call with the processed frame for display.
+        :param display_callback: Function called from the render thread with every processed RGB frame,
+                                 or None to render without displaying (e.g. to replay a session for timing).
         :param visualize_segmentation: Boolean indicating whether to visualize segmentation.
+        :param pipelined: If True, run capture, detection and rendering as separate stages
+                          configured by pipeline_config instead of one after another. Frames
+                          of a source that is not realtime are never dropped between stages.
+        :param frame_source: FrameSource to read frames from instead of the default webcam
+                             (e.g. a RecordedSessionSource to replay a recorded session).
         """
         with self.makeup_params_lock:
             if not self.makeup_params:
-                logging.error("Makeup parameters not loaded.")
+                logger.error("Makeup parameters not loaded.")
                 raise ValueError("Makeup parameters not loaded. Please load a reference image first.")
             
             if not any(params.get('color') for params in self.makeup_params.values()):
-                logging.error("No makeup types have been set.")
+                logger.error("No makeup types have been set.")
                 raise ValueError("No makeup types have been set. Please select and configure at least one makeup type.")
         
         if self.running:
-            logging.error("Webcam is already running.")
+            logger.error("Webcam is already running.")
             return
         
-        logging.info("Attempting to open webcam...")
-        retries = 5
-        for attempt in range(1, retries + 1):
-            self.cap = cv2.VideoCapture(0)  
-            if self.cap.isOpened():
-                logging.info(f"Webcam successfully opened on attempt {attempt}.")
-                break
-            else:
-                logging.warning(f"Attempt {attempt} failed to open webcam. Retrying in 0.5 seconds...")
-                time.sleep(0.5)
-        else:
-            logging.error("Unable to access the webcam after multiple attempts.")
-            raise ValueError("Unable to access the webcam.")
-        
-        # Set frame dimensions (optional, can be removed or adjusted)
-        if not self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width):
-            logging.warning(f"Failed to set frame width to {self.frame_width}")
-        else:
-            logging.debug(f"Frame width set to {self.frame_width}")
-        
-        if not self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height):
-            logging.warning(f"Failed to set frame height to {self.frame_height}")
-        else:
-            logging.debug(f"Frame height set to {self.frame_height}")
-        
+        if frame_source is None:
+            frame_source = CameraSource(0, width=self.frame_width, height=self.frame_height)
+        self.frame_source = frame_source.open()
+        if self.face_tracker is not None:
+            self.face_tracker.reset()
+        self.face_detector.reset()
+        if self.landmark_filter is not None:
+            self.landmark_filter.reset()
+        if self.mask_cache is not None:
+            self.mask_cache.reset()
+        if self.quality_governor is not None:
+            self.quality_governor.reset()
+            self._apply_quality_level(self.quality_governor.level)
+        self._last_faces = []
+        self._pipelined = pipelined
+        self.visualize_segmentation = visualize_segmentation
+        self.display_callback = display_callback
+        self.stage_stats = {name: StageStats() for name in ('capture', 'detect', 'render')}
         self.running = True
-        logging.info("Webcam started.")
+        logger.info("Webcam started.")
         
         try:
-            while self.running:
-                logging.debug("Attempting to read frame from webcam.")
-                ret, frame = self.cap.read()
-                if not ret:
-                    logging.error("Failed to read frame from webcam.")
-                    break
-                else:
-                    logging.debug("Frame read successfully.")
-                
-                # Detect faces and landmarks
-                faces_landmarks = self.face_detector.detect_faces(frame)
-                if faces_landmarks:
-                    for landmarks in faces_landmarks:
-                        # Retrieve current makeup_params
-                        with self.makeup_params_lock:
-                            current_makeup_params = self.makeup_params.copy()
-                        
-                        # Apply makeup based on the current makeup parameters
-                        frame = self.makeup_transfer.apply_makeup(
-                            frame, 
-                            landmarks, 
-                            makeup_params=current_makeup_params
-                        )
-                        logging.info("Makeup applied.")
-
-                        if visualize_segmentation:
-                            # Overlay segmentation masks for each makeup type
-                            frame = overlay_segmentation(
-                                frame, 
-                                landmarks, 
-                                makeup_types=list(current_makeup_params.keys())
-                            )
-                            logging.debug("Segmentation overlay applied.")
-                else:
-                    logging.info("No face detected. Skipping makeup application.")
-                    continue  # Skip makeup application
-
-                # Convert to RGB for Tkinter compatibility
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Enqueue frame
-                if not self.frame_queue.full():
-                    self.frame_queue.put(rgb_frame)
-                else:
-                    logging.warning("Frame queue is full. Discarding frame.")
-                
-                # Sleep briefly to reduce CPU usage
-                time.sleep(0.01)
+            if pipelined:
+                self.pipeline = FramePipeline(
+                    {
+                        'capture': self._capture_frame,
+                        'detect': self._detect_landmarks,
+                        'render': self._render_frame
+                    },
+                    config=self.pipeline_config,
+                    stage_stats=self.stage_stats,
+                    # Files and flat-out replays are processed frame by frame instead of dropping frames
+                    lossless=not getattr(self.frame_source, 'realtime', True)
+                )
+                self.pipeline.run()
+            else:
+                while self.running:
+                    capture = timed_call(self.stage_stats['capture'], self._capture_frame)
+                    if capture is None:
+                        break
+                    detection = timed_call(self.stage_stats['detect'], self._detect_landmarks, capture)
+                    timed_call(self.stage_stats['render'], self._render_frame, detection)
         except Exception as e:
-            logging.error(f"An error occurred in the webcam thread: {e}")
+            logger.error("An error occurred in the webcam thread: %s", e)
         finally:
-            if self.cap is not None:
-                self.cap.release()
-                self.cap = None
-                logging.info("Webcam resource released.")
+            self.pipeline = None
+            self.display_callback = None
+            if self.frame_source is not None:
+                self.frame_source.release()
+                self.frame_source = None
+            # The governor's level only holds for a live session; the next one applies it again
+            if self.quality_governor is not None:
+                self._apply_quality_level(None)
             self.running = False
-            logging.info("Webcam stopped.")
+            logger.info("Webcam stopped.")
+
+    def _capture_frame(self):
+        """
+        Capture stage: reads the next frame from the frame source.
+
+        :return: Tuple (frame, timestamp), or None when stopped or the source is exhausted.
+        """
+        if not self.running:
+            return None
+        with self.metrics.timer('capture'):
+            return self.frame_source.read()
+
+    def _detect_landmarks(self, capture):
+        """
+        Detection stage: finds the facial landmarks in a frame.
+
+        :param capture: Tuple (frame, timestamp) from the capture stage
+        :return: Tuple (frame, faces_landmarks)
+        """
+        frame, timestamp = capture
+        start = time.perf_counter()
+        with self.metrics.timer('detect'):
+            if self.face_tracker is not None:
+                faces_landmarks = self.face_tracker.detect_faces(frame)
+            elif self._last_faces and self._frames_since_detection + 1 < self._detect_every:
+                # Reduced quality: reuse the previous landmarks instead of detecting on every frame
+                self._frames_since_detection += 1
+                faces_landmarks = self._last_faces
+            else:
+                faces_landmarks = self.face_detector.detect_faces(frame)
+                self._frames_since_detection = 0
+                self._last_faces = faces_landmarks
+            if self.landmark_filter is not None:
+                faces_landmarks = self.landmark_filter.filter(faces_landmarks, timestamp)
+        self._detect_cost = time.perf_counter() - start
+        return frame, faces_landmarks
+
+    def _render_frame(self, detection):
+        """
+        Render stage: applies makeup to every detected face and hands the RGB frame over for display.
+
+        :param detection: Tuple (frame, faces_landmarks) from the detection stage
+        :return: The RGB frame, or None if no face was detected.
+        """
+        start = time.perf_counter()
+        try:
+            return self._present_frame(detection)
+        finally:
+            if self.quality_governor is not None:
+                render_cost = time.perf_counter() - start
+                # Pipelined stages overlap, so the slower one sets the frame rate
+                if self._pipelined:
+                    frame_cost = max(self._detect_cost, render_cost)
+                else:
+                    frame_cost = self._detect_cost + render_cost
+                level = self.quality_governor.update(frame_cost)
+                if level is not self.quality_level:
+                    self._apply_quality_level(level)
+
+    def _present_frame(self, detection):
+        """
+        Renders the makeup and the HUD, then hands the RGB frame over for display.
+        """
+        frame, faces_landmarks = detection
+        if not faces_landmarks:
+            frame_logger.info("No face detected. Skipping makeup application.")
+            return None
+
+        frame = self.render_makeup(frame, faces_landmarks, visualize_segmentation=self.visualize_segmentation)
+
+        if self.show_metrics_hud:
+            # Refresh the percentiles twice a second rather than on every frame
+            now = time.monotonic()
+            if now - self._hud_updated > 0.5:
+                self._hud_summary = self.metrics.summary()
+                self._hud_updated = now
+            draw_metrics_hud(frame, self._hud_summary, self.metrics.gauges())
+
+        with self.metrics.timer('gui_handoff'):
+            # Convert to RGB for Tkinter compatibility. The converted frame is a new array that is
+            # never written to again, so consumers may keep a reference instead of copying it.
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self.display_callback is not None:
+                self.display_callback(rgb_frame)
+        return rgb_frame
+
+    def render_makeup(self, frame, faces_landmarks, visualize_segmentation=False):
+        """
+        Applies the current makeup_params (or a face's own look from face_makeup_params)
+        to every detected face of a frame.
+
+        :param frame: BGR frame.
+        :param faces_landmarks: List of landmark arrays, one per face.
+        :param visualize_segmentation: Boolean indicating whether to overlay the segmentation outlines.
+        :return: BGR frame with makeup applied.
+        """
+        # Retrieve current makeup_params
+        with self.makeup_params_lock:
+            current_makeup_params = self.makeup_params.copy()
+            face_params = list(self.face_makeup_params)
+
+        # Apply makeup to all faces in one compositing pass
+        frame = self.makeup_transfer.apply_makeup_multi(
+            frame,
+            faces_landmarks,
+            makeup_params=current_makeup_params,
+            face_params=face_params
+        )
+        frame_logger.info("Makeup applied.")
+
+        if visualize_segmentation and self.segmentation_allowed:
+            # Outline the masks just composited instead of rasterizing them again
+            with self.metrics.timer('segmentation'):
+                draw_segmentation(frame, self.makeup_transfer.last_layers, self._outline_cache)
+            logger.debug("Segmentation overlay applied.")
+        return frame
+
+    def process_video(self, input_path, output_path, fourcc='mp4v', queue_size=16):
+        """
+        Applies the current makeup_params to every frame of a video file and writes the result.
+        Decoding, processing and encoding run on separate threads; landmarks are tracked
+        between detections.
+
+        :param input_path: Path to the input video.
+        :param output_path: Path of the output video.
+        :param fourcc: FourCC code of the output codec.
+        :param queue_size: Maximum number of frames buffered between the decode, process and encode threads.
+        :return: Dictionary with frames read, processed, without face, dropped, elapsed seconds and FPS.
+        """
+        if self.running:
+            logger.error("Webcam is running. Stop it before processing a video.")
+            raise ValueError("Cannot process a video while the webcam is running.")
+
+        reader = VideoFileSource(input_path).open()
+        fps = reader.fps
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (reader.width, reader.height))
+        if not writer.isOpened():
+            reader.release()
+            logger.error("Unable to open video writer for: %s", output_path)
+            raise ValueError(f"Unable to open video writer for: {output_path}")
+
+        # Clips are rendered at full quality whatever level the governor last reached
+        self._apply_quality_level(None)
+        # Use the configured tracker settings if any, with fresh state for this clip
+        tracker = LandmarkTracker(
+            self.face_detector,
+            detect_interval=self.face_tracker.detect_interval if self.face_tracker else 5,
+            motion_threshold=self.face_tracker.motion_threshold if self.face_tracker else 8.0
+        )
+        self.face_detector.reset()
+        if self.landmark_filter is not None:
+            self.landmark_filter.reset()
+        if self.mask_cache is not None:
+            self.mask_cache.reset()
+
+        decoded = queue.Queue(maxsize=queue_size)
+        processed = queue.Queue(maxsize=queue_size)
+        stop_event = threading.Event()
+        counts = {'read': 0, 'processed': 0, 'no_face': 0, 'written': 0}
+
+        def decode():
+            try:
+                while not stop_event.is_set():
+                    item = reader.read()
+                    if item is None:
+                        break
+                    counts['read'] += 1
+                    decoded.put(item)
+            except Exception as e:
+                logger.error("An error occurred while decoding %s: %s", input_path, e)
+            finally:
+                decoded.put(None)
+
+        def encode():
+            # Keep draining after a failure so the processing loop never blocks
+            failed = False
+            while True:
+                frame = processed.get()
+                if frame is None:
+                    break
+                if failed:
+                    continue
+                try:
+                    writer.write(frame)
+                    counts['written'] += 1
+                except Exception as e:
+                    logger.error("An error occurred while encoding %s: %s", output_path, e)
+                    failed = True
+                    stop_event.set()
+
+        start = time.perf_counter()
+        decode_thread = threading.Thread(target=decode, name="video-decode", daemon=True)
+        encode_thread = threading.Thread(target=encode, name="video-encode", daemon=True)
+        decode_thread.start()
+        encode_thread.start()
+
+        try:
+            while True:
+                item = decoded.get()
+                if item is None:
+                    break
+                if stop_event.is_set():
+                    continue  # Aborting, drain the decoder
+                frame, timestamp = item
+                try:
+                    faces_landmarks = tracker.detect_faces(frame)
+                    if self.landmark_filter is not None:
+                        faces_landmarks = self.landmark_filter.filter(faces_landmarks, timestamp)
+                    if faces_landmarks:
+                        frame = self.render_makeup(frame, faces_landmarks)
+                    else:
+                        counts['no_face'] += 1
+                except Exception as e:
+                    logger.error("Error processing video frame %s: %s", counts['processed'], e)
+                    continue
+                processed.put(frame)
+                counts['processed'] += 1
+        finally:
+            stop_event.set()
+            while decode_thread.is_alive():
+                try:
+                    decoded.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            processed.put(None)
+            encode_thread.join()
+            reader.release()
+            writer.release()
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            'frames_read': counts['read'],
+            'frames_processed': counts['processed'],
+            'frames_without_face': counts['no_face'],
+            'frames_dropped': counts['read'] - counts['written'],
+            'elapsed': elapsed,
+            # Throughput of frames that made it into the output, not of decoded ones
+            'fps': counts['written'] / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(
+            "Video processed: %s frames written, %s dropped, %s without face, %.1f FPS (source %.1f FPS).",
+            counts['written'], stats['frames_dropped'], stats['frames_without_face'], stats['fps'], fps
+        )
+        return stats
+
+    def get_stage_stats(self):
+        """
+        Returns the timing counters of each processing stage for the current or last session.
+
+        :return: Dictionary of stage names to dictionaries of count, mean, last and max times (ms).
+        """
+        return {name: stats.as_dict() for name, stats in self.stage_stats.items()}
+
+    def get_metrics(self):
+        """
+        Returns the frame-time instrumentation collected so far.
+
+        :return: Dictionary with 'stages' (rolling count/mean/p50/p95/p99 in ms per timed stage),
+                 'gauges' (current values such as quality level), 'pipeline' (get_stage_stats()),
+                 'mask_cache' (hit/translation/miss counters, empty if the cache is disabled),
+                 'detector' (full-frame and ROI search counts) and 'quality' (current level
+                 of the quality governor, empty if it is disabled).
+        """
+        return {
+            'stages': self.metrics.summary(),
+            'gauges': self.metrics.gauges(),
+            'pipeline': self.get_stage_stats(),
+            'mask_cache': self.mask_cache.stats() if self.mask_cache is not None else {},
+            'detector': self.face_detector.stats(),
+            'quality': self.quality_governor.stats() if self.quality_governor is not None else {}
+        }
+
+    def set_visualize_segmentation(self, enabled):
+        """
+        Turns the segmentation overlay on or off, taking effect from the next frame.
+        """
+        self.visualize_segmentation = bool(enabled)
+        logger.info("Segmentation overlay %s.", "enabled" if enabled else "disabled")
+
+    def set_target_fps(self, target_fps):
+        """
+        Enables the quality governor, which lowers the rendering quality step by step
+        while frames take longer than 1 / target_fps to process, and raises it again
+        once there is headroom.
+
+        :param target_fps: Frame rate to hold, or None to always render at full quality.
+        """
+        if target_fps is None:
+            if self.quality_governor is not None:
+                self.metrics.set_gauge('quality_level', 'off')
+            self.quality_governor = None
+        elif self.quality_governor is None:
+            self.quality_governor = QualityGovernor(target_fps=target_fps, metrics=self.metrics)
+        else:
+            self.quality_governor.set_target_fps(target_fps)
+        self._apply_quality_level(self.quality_governor.level if self.quality_governor is not None else None)
+
+    def _apply_quality_level(self, level):
+        """
+        Pushes a QualityLevel (None for full quality) to the detector, renderer and overlay.
+        """
+        self.quality_level = level
+        if level is None:
+            self.face_detector.inference_size = self.inference_size
+            self.makeup_transfer.mask_scale = 1.0
+            self.makeup_transfer.feather = True
+            self.segmentation_allowed = True
+            self._detect_every = 1
+        else:
+            inference_sizes = [size for size in (self.inference_size, level.inference_size) if size]
+            self.face_detector.inference_size = min(inference_sizes) if inference_sizes else None
+            self.makeup_transfer.mask_scale = level.mask_scale
+            self.makeup_transfer.feather = level.feather
+            self.segmentation_allowed = level.segmentation
+            self._detect_every = level.detect_interval
+        if self.face_tracker is not None:
+            self.face_tracker.detect_interval = self.detect_interval * self._detect_every
+        logger.debug("Quality level set to %s.", level.name if level is not None else 'full')
+
+    def set_metrics_enabled(self, enabled, show_hud=None):
+        """
+        Turns frame-time instrumentation on or off, optionally toggling the on-frame HUD.
+        """
+        self.metrics.enabled = enabled
+        if show_hud is not None:
+            self.show_metrics_hud = show_hud and enabled
+        logger.info("Metrics %s.", 'enabled' if enabled else 'disabled')
+
+    def start_metrics_export(self, path, interval=5.0, fmt=None):
+        """
+        Periodically dumps the metrics summary to a JSON or CSV file, enabling metrics if needed.
+
+        :param path: Output file; '.csv' files get rows appended, anything else a JSON snapshot.
+        :param interval: Seconds between dumps.
+        :param fmt: 'json' or 'csv' to override the format inferred from the path.
+        """
+        self.stop_metrics_export()
+        self.metrics.enabled = True
+        self.metrics_exporter = MetricsExporter(self.metrics, path, interval=interval, fmt=fmt)
+        self.metrics_exporter.start()
+
+    def stop_metrics_export(self):
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
 
     def stop_webcam(self):
         if not self.running:
-            logging.warning("Webcam is not running.")
+            logger.warning("Webcam is not running.")
             return
         self.running = False
-        logging.info("Stopping webcam...")
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        logger.info("Stopping webcam...")
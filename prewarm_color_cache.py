@@ -0,0 +1,65 @@
+# prewarm_color_cache.py
+
+import argparse
+import logging
+import time
+
+from batch_tryon import iter_input_images
+from src.color_cache import ColorCache, DEFAULT_CACHE_DIR, load_reference_colors
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+from utils.logging_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm(input_path, makeup_types, cache):
+    """
+    Extracts and caches the colors of every reference image of a directory or glob.
+
+    :param input_path: Directory scanned recursively for images, or a glob pattern.
+    :param makeup_types: List of makeup types to extract.
+    :param cache: ColorCache to fill.
+    :return: Dictionary of counts of cached, already cached and failed images.
+    """
+    # Imported here so that listing the inputs does not wait for MediaPipe
+    from src.face_detection import FaceDetector
+    from src.makeup_transfer import MakeupTransfer
+
+    face_detector = FaceDetector(max_faces=1, static_image_mode=True)
+    face_detector.warmup(background=False)
+    makeup_transfer = MakeupTransfer()
+
+    counts = {'cached': 0, 'already_cached': 0, 'error': 0}
+    start = time.perf_counter()
+    for image_path, _ in iter_input_images(input_path):
+        try:
+            hits = cache.hits
+            load_reference_colors(image_path, makeup_types, face_detector, makeup_transfer, cache=cache)
+            counts['already_cached' if cache.hits > hits else 'cached'] += 1
+        except Exception as e:
+            logger.error("Failed to cache %s: %s", image_path, e)
+            counts['error'] += 1
+    logger.info(
+        "Prewarm finished: %s cached, %s already cached, %s failed in %.1fs.",
+        counts['cached'], counts['already_cached'], counts['error'], time.perf_counter() - start
+    )
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the reference color cache from a directory of looks.")
+    parser.add_argument('input', help="Directory of reference images or glob pattern (quote it).")
+    parser.add_argument('--types', nargs='+', default=[config.name for config in MAKEUP_TYPES_CONFIG],
+                        help="Makeup types to extract (default: all).")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f"Cache directory (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument('--max-mb', type=float, default=64, help="Cache size limit in MB (default: 64).")
+    parser.add_argument('--log-level', default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+    cache = ColorCache(args.cache_dir, max_bytes=int(args.max_mb * 1024 * 1024))
+    prewarm(args.input, args.types, cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+# service.py
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+from utils.utils import load_makeup_params
+from utils.logging_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+OUTPUT_FORMATS = {'jpeg': ('.jpg', 'image/jpeg'), 'png': ('.png', 'image/png')}
+
+# Per-process state, created once by _init_worker in every pool worker
+_worker = {}
+
+
+class ServiceBusy(Exception):
+    """
+    Raised when the request queue is full; answered with 503 so the caller backs off.
+    """
+
+
+def _init_worker(makeup_params, log_level, max_faces):
+    # Imported here so every worker builds its own FaceMesh graph
+    from src.face_detection import FaceDetector
+    from src.makeup_transfer import MakeupTransfer
+
+    configure_logging(log_level)
+    _worker['face_detector'] = FaceDetector(max_faces=max_faces, static_image_mode=True)
+    _worker['face_detector'].warmup(background=False)
+    _worker['makeup_transfer'] = MakeupTransfer()
+    _worker['makeup_params'] = makeup_params
+
+
+def _ping():
+    return _worker['face_detector'].ready
+
+
+def _tryon(body, options, timings):
+    image = _decode(body, timings)
+    start = time.perf_counter()
+    faces_landmarks = _worker['face_detector'].detect_faces(image)
+    timings['detect'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if faces_landmarks:
+        makeup_params = options.get('makeup_params') or _worker['makeup_params']
+        image = _worker['makeup_transfer'].apply_makeup_multi(image, faces_landmarks, makeup_params)
+    timings['render'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extension, content_type = OUTPUT_FORMATS[options.get('format', 'jpeg')]
+    ok, encoded = cv2.imencode(extension, image, [cv2.IMWRITE_JPEG_QUALITY, options.get('quality', 90)])
+    if not ok:
+        raise RuntimeError("Failed to encode the output image.")
+    timings['encode'] = time.perf_counter() - start
+    return HTTPStatus.OK, {'Content-Type': content_type, 'X-Faces': str(len(faces_landmarks))}, encoded.tobytes()
+
+
+def _colors(body, options, timings):
+    image = _decode(body, timings)
+    start = time.perf_counter()
+    faces_landmarks = _worker['face_detector'].detect_faces(image)
+    timings['detect'] = time.perf_counter() - start
+    if not faces_landmarks:
+        return _json_response(HTTPStatus.UNPROCESSABLE_ENTITY, {'error': "No face detected in the reference image."})
+
+    start = time.perf_counter()
+    colors, palettes = _worker['makeup_transfer'].extract_makeup_color(
+        image, faces_landmarks[0], makeup_types=options['types'], return_palettes=True
+    )
+    timings['extract'] = time.perf_counter() - start
+    return _json_response(HTTPStatus.OK, {
+        'colors': colors,
+        'palettes': {name: palette._asdict() for name, palette in palettes.items()}
+    })
+
+
+def _decode(body, timings):
+    start = time.perf_counter()
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    timings['decode'] = time.perf_counter() - start
+    if image is None:
+        raise ValueError("The request body is not a supported image.")
+    return image
+
+
+def _json_response(status, payload):
+    return status, {'Content-Type': 'application/json'}, json.dumps(payload).encode('utf-8')
+
+
+HANDLERS = {'tryon': _tryon, 'colors': _colors}
+
+
+def _process_batch(jobs):
+    """
+    Runs a batch of requests in a worker process.
+
+    :param jobs: List of (kind, body, options) tuples
+    :return: List of (status, headers, body, timings) tuples in the same order, timings in seconds
+    """
+    results = []
+    for kind, body, options in jobs:
+        timings = {}
+        try:
+            status, headers, payload = HANDLERS[kind](body, options, timings)
+        except ValueError as e:
+            status, headers, payload = _json_response(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            logger.error("Error processing a %s request: %s", kind, e)
+            status, headers, payload = _json_response(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+        results.append((int(status), headers, payload, timings))
+    return results
+
+
+class TryOnService:
+    """
+    Local HTTP front end of the makeup renderer.
+
+    An asyncio server parses requests and puts them on a bounded queue; a dispatcher hands
+    them in batches to a pool of worker processes, each owning a warm FaceMesh. At most one
+    batch per worker is in flight, so under load requests wait in the queue and are batched
+    together, and once the queue is full new requests are refused with 503 right away.
+
+    Endpoints:
+        POST /tryon   Image in (any format OpenCV decodes), made-up image out. Query parameters:
+                      format=jpeg|png, quality=1-100. An X-Makeup-Params header holding a JSON
+                      look as saved by the GUI overrides the service's default look.
+        POST /colors  Reference image in, JSON with the extracted colors and palettes out. Query
+                      parameter: types=Lipstick Upper,Blush, URL-encoded (default: every makeup type).
+        GET  /health  JSON with queue and worker statistics.
+
+    Every response carries a Server-Timing header (queue, decode, detect, render or extract,
+    encode and total durations) plus X-Batch-Size.
+    """
+
+    def __init__(self, makeup_params, workers=None, max_faces=1, batch_size=4, batch_window=0.002,
+                 queue_size=64, log_level=logging.INFO):
+        """
+        :param makeup_params: Default look used when a request has no X-Makeup-Params header
+        :param workers: Number of worker processes (defaults to the CPU count)
+        :param max_faces: Maximum number of faces made up per image
+        :param batch_size: Largest number of requests sent to a worker at once
+        :param batch_window: Seconds the dispatcher waits for more requests to fill a batch
+        :param queue_size: Number of waiting requests above which new ones get 503
+        :param log_level: Logging level used in the worker processes
+        """
+        self.makeup_params = makeup_params
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_faces = max_faces
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.queue_size = queue_size
+        self.log_level = log_level
+        self.executor = None
+        self.queue = None
+        self.server = None
+        self._slots = None
+        self._dispatcher = None
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.batches = 0
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.makeup_params, self.log_level, self.max_faces)
+        )
+        # Start every worker and wait for its FaceMesh before accepting requests
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _ping) for _ in range(self.workers)])
+        logger.info("%s workers ready in %.2fs.", self.workers, time.perf_counter() - start)
+
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        logger.info("Try-on service listening on http://%s:%s", host, port)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def submit(self, kind, body, options):
+        """
+        Queues a request for the workers.
+
+        :return: Tuple (status, headers, body, timings) where timings also holds 'queue' and 'batch_size'
+        :raises ServiceBusy: If the queue is full
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((kind, body, options, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ServiceBusy()
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Only take requests off the queue once a worker is free, so they batch up meanwhile
+            await self._slots.acquire()
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+            dispatched = time.perf_counter()
+            self.in_flight += len(batch)
+            self.batches += 1
+            jobs = [(kind, body, options) for kind, body, options, _, _ in batch]
+            work = loop.run_in_executor(self.executor, _process_batch, jobs)
+            work.add_done_callback(lambda work, batch=batch, dispatched=dispatched: self._finish(work, batch, dispatched))
+
+    def _finish(self, work, batch, dispatched):
+        self._slots.release()
+        self.in_flight -= len(batch)
+        try:
+            results = work.result()
+        except Exception as e:
+            logger.error("Worker failed on a batch of %s requests: %s", len(batch), e)
+            results = [_json_response(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}) + ({},) for _ in batch]
+        for (_, _, _, future, queued), (status, headers, payload, timings) in zip(batch, results):
+            self.completed += 1
+            if future.done():
+                continue
+            timings['queue'] = dispatched - queued
+            timings['batch_size'] = len(batch)
+            future.set_result((status, headers, payload, timings))
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'batches': self.batches
+        }
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                received = time.perf_counter()
+                status, response_headers, payload, timings = await self._route(method, target, headers, body)
+                timings['total'] = time.perf_counter() - received
+                response_headers['Server-Timing'] = ', '.join(
+                    f"{name};dur={value * 1000.0:.2f}" for name, value in timings.items() if name != 'batch_size'
+                )
+                if 'batch_size' in timings:
+                    response_headers['X-Batch-Size'] = str(timings['batch_size'])
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, status, response_headers, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            # Malformed request: answer once and drop the connection, its framing is lost
+            status, headers, payload = _json_response(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            await self._write_response(writer, status, headers, payload, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        :return: Tuple (method, target, headers, body) with lower-case header names, or None at end of stream
+        """
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split()
+        except ValueError:
+            raise ValueError("Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def _write_response(self, writer, status, headers, payload, keep_alive=True):
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        headers = dict(headers, **{'Content-Length': str(len(payload)),
+                                   'Connection': 'keep-alive' if keep_alive else 'close'})
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == '/health' and method == 'GET':
+            return _json_response(HTTPStatus.OK, self.stats()) + ({},)
+        if url.path not in ('/tryon', '/colors'):
+            return _json_response(HTTPStatus.NOT_FOUND, {'error': f"Unknown path {url.path}."}) + ({},)
+        if method != 'POST':
+            return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Use POST."}) + ({},)
+        if not body:
+            return _json_response(HTTPStatus.BAD_REQUEST, {'error': "Missing image in the request body."}) + ({},)
+
+        try:
+            kind = url.path.strip('/')
+            options = self._parse_options(kind, query, headers)
+        except (ValueError, TypeError) as e:
+            return _json_response(HTTPStatus.BAD_REQUEST, {'error': str(e)}) + ({},)
+
+        try:
+            return await self.submit(kind, body, options)
+        except ServiceBusy:
+            status, response_headers, payload = _json_response(HTTPStatus.SERVICE_UNAVAILABLE,
+                                                               {'error': "Service busy, retry later."})
+            response_headers['Retry-After'] = '1'
+            return status, response_headers, payload, {}
+
+    def _parse_options(self, kind, query, headers):
+        if kind == 'colors':
+            types = query.get('types')
+            return {'types': types.split(',') if types else [config.name for config in MAKEUP_TYPES_CONFIG]}
+
+        options = {'format': query.get('format', 'jpeg'), 'quality': int(query.get('quality', 90))}
+        if options['format'] not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported format {options['format']}.")
+        if 'x-makeup-params' in headers:
+            makeup_params = json.loads(headers['x-makeup-params'])
+            options['makeup_params'] = {
+                makeup_type: dict(attributes, color=tuple(attributes['color'])) if 'color' in attributes else dict(attributes)
+                for makeup_type, attributes in makeup_params.items()
+            }
+        return options
+
+
+async def serve(service, host, port):
+    await service.start(host, port)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve makeup try-on over a local HTTP API.")
+    parser.add_argument('--params', help="Default makeup look JSON saved from the GUI (default: every type with its default look).")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on (default: 8080).")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument('--max-faces', type=int, default=1, help="Maximum number of faces per image (default: 1).")
+    parser.add_argument('--batch-size', type=int, default=4, help="Requests sent to a worker at once (default: 4).")
+    parser.add_argument('--batch-window-ms', type=float, default=2.0, help="Time spent filling a batch (default: 2).")
+    parser.add_argument('--queue-size', type=int, default=64, help="Waiting requests before 503 (default: 64).")
+    parser.add_argument('--log-level', default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args()
+
+    log_level = configure_logging(args.log_level)
+    if args.params:
+        makeup_params = load_makeup_params(args.params)
+    else:
+        makeup_params = {config.name: {'color': config.default_color, 'intensity': config.default_intensity}
+                         for config in MAKEUP_TYPES_CONFIG}
+    service = TryOnService(
+        makeup_params,
+        workers=args.workers,
+        max_faces=args.max_faces,
+        batch_size=args.batch_size,
+        batch_window=args.batch_window_ms / 1000.0,
+        queue_size=args.queue_size,
+        log_level=log_level
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info("Try-on service stopped.")
+
+
+if __name__ == "__main__":
+    main()
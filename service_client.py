@@ -0,0 +1,163 @@
+# service_client.py
+
+import argparse
+import http.client
+import json
+import logging
+import time
+from urllib.parse import urlencode
+
+import cv2
+import numpy as np
+
+from utils.utils import load_makeup_params
+from utils.logging_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """
+    Raised for a non-200 answer of the try-on service; status holds the HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def parse_server_timing(header):
+    """
+    :param header: Server-Timing header value, e.g. "queue;dur=1.20, detect;dur=8.31"
+    :return: Dictionary of metric names to durations in milliseconds
+    """
+    timings = {}
+    for metric in filter(None, (part.strip() for part in (header or '').split(','))):
+        name, _, params = metric.partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                timings[name] = float(value)
+    return timings
+
+
+class TryOnClient:
+    """
+    Minimal client of service.py over one keep-alive connection. Not thread-safe: use one
+    client per thread.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+        # Timings of the last response: server-side durations plus the client round trip, in ms
+        self.last_timings = {}
+
+    def _request(self, method, path, body=None, headers=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            # The server closed the connection; reconnect on the next request
+            self.close()
+            raise
+        self.last_timings = parse_server_timing(response.getheader('Server-Timing'))
+        self.last_timings['round_trip'] = (time.perf_counter() - start) * 1000.0
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        if response.status != 200:
+            try:
+                message = json.loads(payload)['error']
+            except (ValueError, KeyError):
+                message = response.reason
+            raise ServiceError(response.status, message)
+        return response, payload
+
+    @staticmethod
+    def _encode(image):
+        if isinstance(image, np.ndarray):
+            ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            if not ok:
+                raise ValueError("Failed to encode the image.")
+            return encoded.tobytes()
+        return bytes(image)
+
+    def tryon(self, image, makeup_params=None, fmt='jpeg', quality=90):
+        """
+        :param image: BGR image array, or encoded image bytes
+        :param makeup_params: Optional look overriding the service's default one
+        :param fmt: 'jpeg' or 'png'
+        :param quality: JPEG quality of the returned image
+        :return: Tuple (BGR image, number of faces made up)
+        """
+        headers = {'Content-Type': 'application/octet-stream'}
+        if makeup_params is not None:
+            headers['X-Makeup-Params'] = json.dumps(makeup_params)
+        response, payload = self._request('POST', f"/tryon?format={fmt}&quality={quality}",
+                                          body=self._encode(image), headers=headers)
+        image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return image, int(response.getheader('X-Faces', 0))
+
+    def extract_colors(self, image, makeup_types=None):
+        """
+        :param image: BGR reference image array, or encoded image bytes
+        :param makeup_types: List of makeup types to extract (default: all)
+        :return: Dictionary with 'colors' (type -> BGR list) and 'palettes' (type -> palette dictionary)
+        """
+        path = f"/colors?{urlencode({'types': ','.join(makeup_types)})}" if makeup_types else "/colors"
+        _, payload = self._request('POST', path, body=self._encode(image),
+                                   headers={'Content-Type': 'application/octet-stream'})
+        return json.loads(payload)
+
+    def health(self):
+        _, payload = self._request('GET', '/health')
+        return json.loads(payload)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call the local try-on service.")
+    parser.add_argument('--host', default='127.0.0.1', help="Service address (default: 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=8080, help="Service port (default: 8080).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    tryon_parser = subparsers.add_parser('tryon', help="Render a look onto an image.")
+    tryon_parser.add_argument('input', help="Input image.")
+    tryon_parser.add_argument('output', help="Output image.")
+    tryon_parser.add_argument('--params', help="Makeup parameters JSON (default: the service's look).")
+    colors_parser = subparsers.add_parser('colors', help="Extract the makeup colors of a reference image.")
+    colors_parser.add_argument('input', help="Reference image.")
+    colors_parser.add_argument('--types', nargs='+', help="Makeup types to extract (default: all).")
+    subparsers.add_parser('health', help="Print the service statistics.")
+    args = parser.parse_args()
+
+    configure_logging(logging.INFO)
+    client = TryOnClient(args.host, args.port)
+    if args.command == 'tryon':
+        with open(args.input, 'rb') as f:
+            body = f.read()
+        makeup_params = load_makeup_params(args.params) if args.params else None
+        image, faces = client.tryon(body, makeup_params=makeup_params)
+        cv2.imwrite(args.output, image)
+        logger.info("Made up %s face(s) in %s.", faces, args.output)
+    elif args.command == 'colors':
+        with open(args.input, 'rb') as f:
+            body = f.read()
+        print(json.dumps(client.extract_colors(body, args.types)['colors'], indent=2))
+    else:
+        print(json.dumps(client.health(), indent=2))
+    logger.info("Timings (ms): %s", client.last_timings)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
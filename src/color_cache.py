@@ -0,0 +1,260 @@
+# src/color_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from src.makeup_config import MAKEUP_TYPES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'virtual-makeup-tryon', 'colors')
+# Bump when the way colors are extracted changes so that older entries are ignored
+EXTRACTION_VERSION = 1
+
+
+def config_version(configs=MAKEUP_TYPES_CONFIG):
+    """
+    Fingerprint of everything extracted colors depend on: the extraction version and the
+    facemesh regions of every makeup type.
+
+    :return: Short hexadecimal digest
+    """
+    description = [EXTRACTION_VERSION] + [
+        [config.name, {name: sorted(list(pair) for pair in pairs) for name, pairs in config.facemesh_regions.items()}]
+        for config in configs
+    ]
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def hash_image_file(path, chunk_size=1 << 20):
+    """
+    :return: Hex sha256 digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ColorCache:
+    """
+    Persistent cache of reference-image landmarks and extracted makeup colors.
+
+    Entries are JSON files named after the image content hash and the config version, so
+    the same look is found whatever its file name, and a change of the makeup regions or
+    of the extraction invalidates it. Each entry holds the colors of every makeup type
+    extracted so far; a request for types an entry lacks reuses its landmarks and only
+    extracts the missing colors. Recently used entries are also kept in memory, and the
+    least recently used files are deleted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=64 * 1024 * 1024, memory_entries=256):
+        """
+        :param cache_dir: Directory holding the entry files (created if needed)
+        :param max_bytes: Total size of entry files above which the oldest are evicted
+        :param memory_entries: Number of entries kept in memory
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.version = config_version()
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._file_hashes = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def image_hash(self, path):
+        """
+        Content hash of an image file, remembered per path, size and modification time so
+        that reloading an unchanged file does not read it again. As many files as entries
+        are kept in memory are remembered, least recently used first out.
+        """
+        stat = os.stat(path)
+        file_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            image_hash = self._file_hashes.get(file_key)
+            if image_hash is not None:
+                self._file_hashes.move_to_end(file_key)
+                return image_hash
+        image_hash = hash_image_file(path)
+        with self._lock:
+            self._file_hashes[file_key] = image_hash
+            while len(self._file_hashes) > self.memory_entries:
+                self._file_hashes.popitem(last=False)
+        return image_hash
+
+    def _path(self, image_hash):
+        return os.path.join(self.cache_dir, f"{image_hash}-{self.version}.json")
+
+    def get(self, image_hash, makeup_types=None):
+        """
+        :param image_hash: Content hash from image_hash()
+        :param makeup_types: Makeup types whose colors must all be present, or None for any entry
+        :return: Entry dictionary with 'landmarks' ((N, 2) int32 array) and 'colors' (type -> BGR tuple),
+                 or None. An entry lacking some of the types is returned with 'complete' set to False.
+        """
+        with self._lock:
+            entry = self._memory.get(image_hash)
+            if entry is not None:
+                self._memory.move_to_end(image_hash)
+        if entry is not None:
+            self._touch(self._path(image_hash))
+        else:
+            entry = self._read(image_hash)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        complete = makeup_types is None or all(t in entry['colors'] for t in makeup_types)
+        with self._lock:
+            if complete:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return dict(entry, complete=complete)
+
+    def _read(self, image_hash):
+        path = self._path(image_hash)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable color cache entry %s: %s", path, e)
+            return None
+        entry = {
+            'landmarks': np.array(data['landmarks'], dtype=np.int32).reshape(-1, 2),
+            'colors': {name: tuple(color) for name, color in data['colors'].items()}
+        }
+        self._touch(path)
+        self._remember(image_hash, entry)
+        return entry
+
+    @staticmethod
+    def _touch(path):
+        # Eviction orders entry files by modification time, so every hit, from memory or
+        # from disk, marks the file as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _remember(self, image_hash, entry):
+        with self._lock:
+            self._memory[image_hash] = entry
+            self._memory.move_to_end(image_hash)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, image_hash, landmarks, colors):
+        """
+        Stores (or replaces) the entry of a reference image.
+
+        :param image_hash: Content hash from image_hash()
+        :param landmarks: (N, 2) landmark array of the reference face
+        :param colors: Dictionary of makeup types to BGR color tuples
+        """
+        entry = {'landmarks': np.asarray(landmarks, dtype=np.int32), 'colors': dict(colors)}
+
+        path = self._path(image_hash)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'version': self.version,
+                'created': time.time(),
+                'landmarks': entry['landmarks'].tolist(),
+                'colors': {name: [float(c) for c in color] for name, color in entry['colors'].items()}
+            }, f)
+        os.replace(temp_path, path)
+        self._remember(image_hash, entry)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used entry files until the directory fits in max_bytes.
+
+        :return: Number of entries deleted
+        """
+        files = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if item.is_file() and item.name.endswith('.json'):
+                    stat = item.stat()
+                    files.append((stat.st_mtime, stat.st_size, item.path))
+                    total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            with self._lock:
+                self._memory.pop(os.path.basename(path).rsplit('-', 1)[0], None)
+        if removed:
+            logger.info("Evicted %s color cache entries.", removed)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'memory_entries': len(self._memory)}
+
+
+def load_reference_colors(path, makeup_types, face_detector, makeup_transfer, cache=None):
+    """
+    Extracts the makeup colors of a reference image, going through the cache if one is given.
+    On a hit the image is neither decoded nor run through FaceMesh.
+
+    :param path: Path to the reference image
+    :param makeup_types: List of makeup types to extract
+    :param face_detector: FaceDetector used on a cache miss
+    :param makeup_transfer: MakeupTransfer used on a cache miss
+    :param cache: Optional ColorCache
+    :return: Tuple (landmarks, colors) with the (N, 2) landmarks and a dictionary of types to BGR tuples
+    """
+    image_hash = cache.image_hash(path) if cache is not None else None
+    entry = cache.get(image_hash, makeup_types) if cache is not None else None
+    if entry is not None and entry['complete']:
+        logger.info("Reference colors for %s found in the color cache.", path)
+        return entry['landmarks'], {t: entry['colors'][t] for t in makeup_types if t in entry['colors']}
+
+    image = cv2.imread(path)
+    if image is None:
+        logger.error("Failed to load the reference image. Please check the file path.")
+        raise ValueError("Failed to load the reference image.")
+
+    if entry is not None:
+        # Known image: reuse its landmarks and only extract the missing types
+        landmarks = entry['landmarks']
+        missing = [t for t in makeup_types if t not in entry['colors']]
+        colors = dict(entry['colors'], **makeup_transfer.extract_makeup_color(image, landmarks, makeup_types=missing))
+    else:
+        faces_landmarks = face_detector.detect_faces(image)
+        if not faces_landmarks:
+            logger.error("No faces detected in the reference image.")
+            raise ValueError("No faces detected in the reference image.")
+        # For simplicity, consider the first detected face
+        landmarks = faces_landmarks[0]
+        logger.info("Face detected in the reference image.")
+        colors = makeup_transfer.extract_makeup_color(image, landmarks, makeup_types=makeup_types)
+
+    if cache is not None:
+        cache.put(image_hash, landmarks, colors)
+    return landmarks, {t: colors[t] for t in makeup_types if t in colors}
@@ -0,0 +1,193 @@
+# src/compositor.py
+
+import cv2
+import numpy as np
+from collections import namedtuple
+
+# Padding (in pixels) added around each region's bounding box. It must cover the
+# reach of the mask clean-up kernels (5x5 open + 7x7 blur) so that cropping to the
+# box gives the same mask as processing the full frame.
+ROI_PADDING = 10
+
+_OPEN_KERNEL = np.ones((5, 5), np.uint8)
+
+# A single makeup layer ready to be composited: its padded bounding box, the uint8
+# soft mask covering that box, the BGR color, the blend intensity and the layer order.
+MakeupLayer = namedtuple('MakeupLayer', [
+    'name',
+    'bbox',
+    'mask',
+    'color',
+    'intensity',
+    'order'
+])
+
+
+def region_bbox(point_sets, frame_shape, padding=ROI_PADDING):
+    """
+    Computes the padded bounding box enclosing one or more sets of landmark points.
+
+    :param point_sets: List of (N, 2) arrays of (x, y) landmark coordinates
+    :param frame_shape: Shape of the frame the landmarks belong to
+    :param padding: Number of pixels added on every side of the box
+    :return: Tuple (x0, y0, x1, y1) clipped to the frame, or None if the box is empty
+    """
+    points = np.concatenate(point_sets).astype(np.int32)
+    x, y, w, h = cv2.boundingRect(points)
+    frame_h, frame_w = frame_shape[:2]
+    x0, y0 = max(x - padding, 0), max(y - padding, 0)
+    x1, y1 = min(x + w + padding, frame_w), min(y + h + padding, frame_h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+def build_region_mask(point_sets, bbox, scale=1.0):
+    """
+    Rasterizes the convex hull of each point set into a cleaned, blurred mask
+    covering only the given bounding box.
+
+    :param point_sets: List of (N, 2) arrays of (x, y) landmark coordinates
+    :param bbox: Tuple (x0, y0, x1, y1) as returned by region_bbox
+    :param scale: Resolution factor below 1 to rasterize and clean a smaller mask and
+                  upscale it to the box, trading edge accuracy for speed
+    :return: uint8 mask of shape (y1 - y0, x1 - x0)
+    """
+    x0, y0, x1, y1 = bbox
+    width, height = x1 - x0, y1 - y0
+    origin = np.array([x0, y0], dtype=np.int32)
+    if scale < 1.0:
+        small_w, small_h = max(1, round(width * scale)), max(1, round(height * scale))
+        mask = np.zeros((small_h, small_w), dtype=np.uint8)
+        factor = np.array([small_w / width, small_h / height])
+        for points in point_sets:
+            hull = cv2.convexHull(np.rint((points - origin) * factor).astype(np.int32))
+            cv2.fillConvexPoly(mask, hull, 255)
+    else:
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for points in point_sets:
+            hull = cv2.convexHull(points.astype(np.int32) - origin)
+            cv2.fillConvexPoly(mask, hull, 255)
+
+    # Clean the mask using morphological operations and Gaussian blur
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, _OPEN_KERNEL)
+    mask = cv2.GaussianBlur(mask, (7, 7), 0)
+    if mask.shape != (height, width):
+        mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_LINEAR)
+    return mask
+
+
+def union_bbox(bboxes):
+    """
+    :param bboxes: List of (x0, y0, x1, y1) boxes
+    :return: Smallest box enclosing all of them
+    """
+    x0s, y0s, x1s, y1s = zip(*bboxes)
+    return min(x0s), min(y0s), max(x1s), max(y1s)
+
+
+def _boxes_overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def group_overlapping(layers):
+    """
+    Splits layers into groups whose boxes overlap transitively, so that layers of
+    faces far apart are not blended over the empty area between them.
+
+    :param layers: List of MakeupLayer
+    :return: List of (bbox, layers) tuples with disjoint boxes, layers keeping their input order
+    """
+    groups = []
+    for layer in layers:
+        bbox = layer.bbox
+        members = [layer]
+        # Absorb every group the (growing) box touches
+        merged = True
+        while merged:
+            merged = False
+            for group in groups:
+                if _boxes_overlap(bbox, group[0]):
+                    groups.remove(group)
+                    bbox = union_bbox([bbox, group[0]])
+                    members = group[1] + members
+                    merged = True
+                    break
+        groups.append((bbox, members))
+    # Restore the input order inside each group so equal-order layers stay stable
+    position = {id(layer): index for index, layer in enumerate(layers)}
+    return [(bbox, sorted(members, key=lambda layer: position[id(layer)])) for bbox, members in groups]
+
+
+def fuse_layers(output, layers):
+    """
+    Composites makeup layers into the output image in place, in ascending layer order.
+
+    Each layer's mask is used as soft alpha scaled by the layer intensity, so higher
+    layers stack on top of lower ones: out = out * (1 - alpha) + color * alpha. The blend
+    is carried out in uint8 directly on each layer's box of the output, with the alpha
+    expanded to 8-bit weights, so no float copy of the image is made and layers of
+    several faces cost only their own area.
+
+    :param output: BGR image the layers are composited into
+    :param layers: List of MakeupLayer, possibly belonging to several faces
+    :return: The union box (x0, y0, x1, y1) that was written, or None if there are no layers
+    """
+    if not layers:
+        return None
+
+    for layer in sorted(layers, key=lambda layer: layer.order):
+        if layer.intensity <= 0:
+            continue
+        x0, y0, x1, y1 = layer.bbox
+        roi = output[y0:y1, x0:x1]
+
+        # alpha = mask * intensity, as 0-255 weights
+        alpha = cv2.convertScaleAbs(layer.mask, alpha=layer.intensity)
+        keep = cv2.multiply(roi, cv2.cvtColor(cv2.bitwise_not(alpha), cv2.COLOR_GRAY2BGR), scale=1.0 / 255.0)
+        paint = cv2.merge([cv2.convertScaleAbs(alpha, alpha=channel / 255.0) for channel in layer.color[:3]])
+        # Writes through the view into output
+        cv2.add(keep, paint, dst=roi)
+    return union_bbox([layer.bbox for layer in layers])
+
+
+def feather_edges(output, layers, kernel_size=5, band_width=2):
+    """
+    Smooths the output in place along the edges of the makeup layers only.
+
+    The band is made of the pixels where a layer's soft mask ramps between 0 and 255,
+    widened by band_width pixels so that it covers the reach of the kernel. Only the
+    bounding box of the band is blurred, and only the band pixels are copied back, so
+    every pixel away from the makeup edges is left untouched.
+
+    :param output: BGR image the layers were composited into
+    :param layers: List of MakeupLayer, as passed to fuse_layers
+    :param kernel_size: Size of the Gaussian kernel
+    :param band_width: Number of pixels the edge band is widened by on each side
+    """
+    frame_h, frame_w = output.shape[:2]
+    reach = kernel_size // 2
+    band_kernel = np.ones((2 * band_width + 1, 2 * band_width + 1), np.uint8)
+    for (ux0, uy0, ux1, uy1), group in group_overlapping(layers):
+        band = np.zeros((uy1 - uy0, ux1 - ux0), dtype=np.uint8)
+        for layer in group:
+            if layer.intensity <= 0:
+                continue
+            x0, y0, x1, y1 = layer.bbox
+            target = band[y0 - uy0:y1 - uy0, x0 - ux0:x1 - ux0]
+            cv2.bitwise_or(target, cv2.inRange(layer.mask, 1, 254), dst=target)
+        if band_width:
+            band = cv2.dilate(band, band_kernel)
+
+        bx, by, bw, bh = cv2.boundingRect(band)
+        if not bw or not bh:
+            continue
+        # Blur the band box plus the kernel reach, so its border pixels see their true neighbours
+        x0, y0 = ux0 + bx, uy0 + by
+        x1, y1 = x0 + bw, y0 + bh
+        px0, py0 = max(x0 - reach, 0), max(y0 - reach, 0)
+        px1, py1 = min(x1 + reach, frame_w), min(y1 + reach, frame_h)
+        blurred = cv2.GaussianBlur(output[py0:py1, px0:px1], (kernel_size, kernel_size), 0)
+        blurred = blurred[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+        # Writes through the view into output
+        cv2.copyTo(blurred, band[by:by + bh, bx:bx + bw], output[y0:y1, x0:x1])
@@ -1,34 +1,263 @@
 # src/face_detection.py
 
 import cv2
-import mediapipe as mp
+import numpy as np
+import logging
+import threading
+import time
+from itertools import chain
+from src.metrics import FrameMetrics
+
+logger = logging.getLogger(__name__)
+
 
 class FaceDetector:
-    def __init__(self, max_faces=1, detection_confidence=0.5, tracking_confidence=0.5):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
+    def __init__(self, max_faces=1, detection_confidence=0.5, tracking_confidence=0.5, static_image_mode=False,
+                 metrics=None, inference_size=None, roi_tracking=False, roi_padding=0.4, full_search_interval=30):
+        """
+        MediaPipe and the FaceMesh graph are only loaded on the first detection, or ahead of
+        it by warmup(), so constructing a detector is cheap.
+
+        FaceMesh cost grows with the size of the image it is fed, while the face often covers
+        a small part of the frame. With roi_tracking, each frame is cropped to a padded box
+        around the faces, and the whole frame is searched again when the faces are lost in
+        the crop. With inference_size, the image (or crop) is shrunk so that its longest side
+        is at most that many pixels. Landmarks are always returned in full-frame coordinates.
+
+        In video mode, FaceMesh tracks the face from its previous landmarks, in coordinates
+        normalized to the image it was fed. Crops therefore go through a graph of their own,
+        which is restarted whenever the crop moves, and full-frame searches run in static
+        image mode so they never leave tracking state behind.
+
+        :param inference_size: Longest side in pixels of the image passed to FaceMesh, or None for no downscaling
+        :param roi_tracking: Crop to the previous faces (ignored in static_image_mode)
+        :param roi_padding: Padding added around the faces on each side, as a fraction of the face box size
+        :param full_search_interval: While fewer than max_faces faces are tracked, search the whole
+                                     frame for new ones every this many frames
+        """
+        self.metrics = metrics if metrics is not None else FrameMetrics()
+        self.max_faces = max_faces
+        self.inference_size = inference_size
+        self.roi_tracking = roi_tracking and not static_image_mode
+        self.roi_padding = roi_padding
+        self.full_search_interval = full_search_interval
+        self.face_mesh_options = dict(
+            static_image_mode=static_image_mode or self.roi_tracking,
             max_num_faces=max_faces,
             min_detection_confidence=detection_confidence,
             min_tracking_confidence=tracking_confidence
         )
-        self.mp_drawing = mp.solutions.drawing_utils
+        self.full_searches = 0
+        self.roi_searches = 0
+        self.roi_misses = 0
+        self.face_mesh = None
+        self.roi_face_mesh = None
+        self.reset()
+        self._load_lock = threading.Lock()
+        self._warmup_thread = None
+
+    @property
+    def ready(self):
+        """
+        Whether the FaceMesh graph has been built.
+        """
+        return self.face_mesh is not None
 
-    def detect_faces(self, image):
+    def load(self):
+        """
+        Imports MediaPipe and builds the FaceMesh graphs if that has not happened yet.
+
+        :return: The FaceMesh instance used on full frames
+        """
+        with self._load_lock:
+            if self.face_mesh is None:
+                start = time.perf_counter()
+                # Importing MediaPipe dominates startup time, so it is deferred until needed
+                import mediapipe as mp
+                if self.roi_tracking:
+                    self.roi_face_mesh = mp.solutions.face_mesh.FaceMesh(
+                        **dict(self.face_mesh_options, static_image_mode=False)
+                    )
+                self.face_mesh = mp.solutions.face_mesh.FaceMesh(**self.face_mesh_options)
+                logger.info("FaceMesh loaded in %.2fs.", time.perf_counter() - start)
+        return self.face_mesh
+
+    def warmup(self, background=True):
+        """
+        Loads the FaceMesh graph ahead of the first frame.
+
+        :param background: If True, load on a daemon thread and return immediately
+        :return: The loading thread, or None if loading already happened or ran synchronously
+        """
+        if self.face_mesh is not None:
+            return None
+        if not background:
+            self.load()
+            return None
+        with self._load_lock:
+            if self._warmup_thread is None:
+                self._warmup_thread = threading.Thread(target=self._warmup, name="facemesh-warmup", daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _warmup(self):
+        try:
+            self.load()
+        except Exception as e:
+            # detect_faces retries and raises on the first frame
+            logger.error("Failed to load FaceMesh: %s", e)
+
+    def reset(self):
+        """
+        Forgets the previous faces so the next frame is searched in full.
         """
-        Detects faces and returns a list of facial landmarks.
+        self._roi = None
+        self._roi_mesh_box = None
+        self._frames_since_full_search = 0
+        # Video-mode graphs would otherwise keep tracking the faces of the last session
+        if self.roi_face_mesh is not None:
+            self.roi_face_mesh.reset()
+        if self.face_mesh is not None and not self.face_mesh_options['static_image_mode']:
+            self.face_mesh.reset()
+
+    def update_roi(self, faces_landmarks, frame_shape):
+        """
+        Places the crop used for the next detection around the given faces. Called after every
+        detection, and by LandmarkTracker with the faces it tracked in between. The crop only
+        moves when a face comes near one of its edges, or when it has grown much larger than
+        the faces, so that FaceMesh sees a steady view from frame to frame.
+
+        :param faces_landmarks: List of (N, 2) landmark arrays in full-frame coordinates
+        :param frame_shape: Shape of the frame
+        """
+        if not self.roi_tracking:
+            return
+        if not len(faces_landmarks):
+            self._roi = None
+            return
+        points = np.concatenate(faces_landmarks)
+        x0, y0 = points.min(axis=0)
+        x1, y1 = points.max(axis=0) + 1
+        size = max(x1 - x0, y1 - y0)
+        frame_h, frame_w = frame_shape[:2]
+
+        roi = self._roi
+        if roi is not None:
+            # A crop edge lying on the frame edge cannot be crossed, so it never forces a move
+            margin = self.roi_padding * size / 4
+            near_edge = (
+                (roi[0] > 0 and x0 - margin < roi[0]) or
+                (roi[1] > 0 and y0 - margin < roi[1]) or
+                (roi[2] < frame_w and x1 + margin > roi[2]) or
+                (roi[3] < frame_h and y1 + margin > roi[3])
+            )
+            if not near_edge and max(roi[2] - roi[0], roi[3] - roi[1]) <= 2 * (1 + 2 * self.roi_padding) * size:
+                return
+
+        pad = self.roi_padding * size
+        self._roi = (
+            max(0, int(x0 - pad)),
+            max(0, int(y0 - pad)),
+            min(frame_w, int(np.ceil(x1 + pad))),
+            min(frame_h, int(np.ceil(y1 + pad)))
+        )
+
+    def _process(self, face_mesh, image, box):
+        """
+        Runs FaceMesh on the box (x0, y0, x1, y1) of the image, downscaled to the inference size.
+        """
+        x0, y0, x1, y1 = box
+        crop = image[y0:y1, x0:x1]
+        if self.inference_size:
+            scale = self.inference_size / max(crop.shape[:2])
+            if scale < 1.0:
+                crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                                  interpolation=cv2.INTER_AREA)
+        rgb_image = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        return face_mesh.process(rgb_image)
+
+    def _process_roi(self, image, box):
+        """
+        Runs the crop graph on the box, restarting it first if the box moved since its last
+        frame, as its tracking state is relative to the old box.
+        """
+        if box != self._roi_mesh_box:
+            if self._roi_mesh_box is not None:
+                self.roi_face_mesh.reset()
+            self._roi_mesh_box = box
+        self.roi_searches += 1
+        return self._process(self.roi_face_mesh, image, box)
+
+    def stats(self):
+        """
+        :return: Dictionary of full-frame and ROI search counts, and ROI searches that lost the faces
+        """
+        return {'full_searches': self.full_searches, 'roi_searches': self.roi_searches, 'roi_misses': self.roi_misses}
+
+    def detect_faces(self, image, return_depth=False):
+        """
+        Detects faces and returns the facial landmarks of each face.
 
         :param image: BGR image from OpenCV
-        :return: List of landmarks for each detected face
+        :param return_depth: If True, also return the depth and visibility of each landmark
+        :return: List of (N, 2) int32 arrays of (x, y) landmarks for each detected face.
+                 If return_depth is True, a tuple (faces_landmarks, faces_depth) where each
+                 entry of faces_depth is an (N, 2) float32 array of (z, visibility), with z
+                 in pixels on the same scale as x.
         """
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_image)
+        ih, iw = image.shape[:2]
+        face_mesh = self.face_mesh or self.load()
+        full_frame = (0, 0, iw, ih)
+        box = self._roi if self.roi_tracking else None
+        with self.metrics.timer('detect.inference'):
+            if box is not None:
+                results = self._process_roi(image, box)
+                if not results.multi_face_landmarks:
+                    # Faces lost in the crop: search the whole frame
+                    self.roi_misses += 1
+                    box = None
+                elif self._frames_since_full_search >= self.full_search_interval \
+                        and len(results.multi_face_landmarks) < self.max_faces:
+                    # Look for faces that may have entered the frame outside the crop. The crop
+                    # results are kept unless more faces turn up, so tracked faces do not jump.
+                    self.full_searches += 1
+                    self._frames_since_full_search = 0
+                    full_results = self._process(face_mesh, image, full_frame)
+                    if full_results.multi_face_landmarks and \
+                            len(full_results.multi_face_landmarks) > len(results.multi_face_landmarks):
+                        results, box = full_results, full_frame
+            if box is None:
+                box = full_frame
+                self.full_searches += 1
+                self._frames_since_full_search = 0
+                results = self._process(face_mesh, image, box)
+        self._frames_since_full_search += 1
+
+        # Landmarks are normalized to the box, whatever size it was resized to for inference
+        box_w, box_h = box[2] - box[0], box[3] - box[1]
+        scale = np.array([box_w, box_h], dtype=np.float64)
+        offset = np.array(box[:2], dtype=np.float64)
         faces_landmarks = []
+        faces_depth = []
         if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                landmarks = []
-                for lm in face_landmarks.landmark:
-                    ih, iw, _ = image.shape
-                    x, y = int(lm.x * iw), int(lm.y * ih)
-                    landmarks.append((x, y))
-                faces_landmarks.append(landmarks)
+            with self.metrics.timer('detect.landmarks'):
+                for face_landmarks in results.multi_face_landmarks:
+                    landmarks = face_landmarks.landmark
+                    count = len(landmarks)
+                    # MediaPipe only exposes the landmarks as protobuf messages, so each one is
+                    # read in Python, straight into a preallocated array, then scaled at once
+                    coords = np.fromiter(
+                        chain.from_iterable((lm.x, lm.y) for lm in landmarks), dtype=np.float64, count=2 * count
+                    ).reshape(count, 2)
+                    faces_landmarks.append((coords * scale + offset).astype(np.int32))
+                    if return_depth:
+                        depth = np.fromiter(
+                            chain.from_iterable((lm.z, lm.visibility) for lm in landmarks),
+                            dtype=np.float32, count=2 * count
+                        ).reshape(count, 2)
+                        depth[:, 0] *= box_w
+                        faces_depth.append(depth)
+        self.update_roi(faces_landmarks, image.shape)
+        if return_depth:
+            return faces_landmarks, faces_depth
         return faces_landmarks
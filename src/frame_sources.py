@@ -0,0 +1,382 @@
+# src/frame_sources.py
+
+import glob
+import json
+import logging
+import os
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SESSION_INDEX = 'session.json'
+SESSION_VERSION = 2
+
+
+class FrameSource:
+    """
+    Base class for everything that produces frames for MakeupTryOn.
+
+    Subclasses implement read(), returning a (frame, timestamp) tuple with a BGR frame and a
+    timestamp in seconds, or None once the source is exhausted or fails. Sources are context
+    managers and can be iterated.
+    """
+
+    fps = None
+    # Whether frames arrive at their own pace, as from a camera. Sources that deliver frames
+    # as fast as they are read set it to False, so that no frame is dropped while processing.
+    realtime = True
+
+    def open(self):
+        return self
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self.read()
+            if item is None:
+                return
+            yield item
+
+
+class CameraSource(FrameSource):
+    """
+    Live webcam frames, timestamped with the monotonic clock at capture.
+    """
+
+    def __init__(self, index=0, width=None, height=None, retries=5, retry_delay=0.5):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.cap = None
+
+    def open(self):
+        logger.info("Attempting to open webcam...")
+        for attempt in range(1, self.retries + 1):
+            self.cap = cv2.VideoCapture(self.index)
+            if self.cap.isOpened():
+                logger.info("Webcam successfully opened on attempt %s.", attempt)
+                break
+            else:
+                logger.warning("Attempt %s failed to open webcam. Retrying in %s seconds...", attempt, self.retry_delay)
+                time.sleep(self.retry_delay)
+        else:
+            logger.error("Unable to access the webcam after multiple attempts.")
+            raise ValueError("Unable to access the webcam.")
+
+        # Set frame dimensions (optional, can be removed or adjusted)
+        if self.width is not None and not self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width):
+            logger.warning("Failed to set frame width to %s", self.width)
+        if self.height is not None and not self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height):
+            logger.warning("Failed to set frame height to %s", self.height)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        return self
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            logger.error("Failed to read frame from webcam.")
+            return None
+        return frame, time.monotonic()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+            logger.info("Webcam resource released.")
+
+
+class VideoFileSource(FrameSource):
+    """
+    Frames decoded from a video file, timestamped with their position in the clip.
+    """
+
+    realtime = False
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = None
+        self.width = None
+        self.height = None
+        self._index = 0
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            logger.error("Unable to open video file: %s", self.path)
+            raise ValueError(f"Unable to open video file: {self.path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._index = 0
+        return self
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        timestamp = self._index / self.fps
+        self._index += 1
+        return frame, timestamp
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageSequenceSource(FrameSource):
+    """
+    Frames read from a directory or glob of still images in sorted order, at a nominal frame rate.
+    """
+
+    realtime = False
+
+    def __init__(self, path, fps=30.0, loop=False):
+        """
+        :param path: Directory of images or a glob pattern.
+        :param fps: Frame rate used to derive timestamps.
+        :param loop: If True, restart from the first image after the last one.
+        """
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.paths = []
+        self._index = 0
+
+    def open(self):
+        pattern = os.path.join(self.path, '*') if os.path.isdir(self.path) else self.path
+        self.paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            logger.error("No images found for: %s", self.path)
+            raise ValueError(f"No images found for: {self.path}")
+        self._index = 0
+        return self
+
+    def read(self):
+        if self._index >= len(self.paths):
+            if not self.loop:
+                return None
+        frame = cv2.imread(self.paths[self._index % len(self.paths)])
+        if frame is None:
+            logger.error("Failed to read image: %s", self.paths[self._index % len(self.paths)])
+            return None
+        timestamp = self._index / self.fps
+        self._index += 1
+        return frame, timestamp
+
+
+class SessionRecorder:
+    """
+    Writes frames and their timestamps to a session directory: fixed-size chunks of frames
+    plus a JSON index.
+
+    By default every frame is JPEG-encoded, and a chunk is an .npz archive holding the
+    encoded frames back to back with their offsets. At quality 95 a 720p camera frame takes
+    about 270 KB instead of 2.7 MB raw, for about 5 ms of encoding per frame and as much
+    decoding on replay. With quality=None, frames are kept raw in .npy chunks instead: the
+    replay is bit-exact and memory-mapped, at the full raw size.
+    """
+
+    def __init__(self, path, chunk_size=64, quality=95):
+        """
+        :param path: Session directory (created if needed).
+        :param chunk_size: Number of frames per chunk file.
+        :param quality: JPEG quality of the recorded frames, or None to record raw frames.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.quality = quality
+        self.shape = None
+        self.timestamps = []
+        self.chunks = []
+        self._buffer = None
+        self._encoded = []
+        self._buffered = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, frame, timestamp):
+        if self.shape is None:
+            self.shape = frame.shape
+            if self.quality is None:
+                self._buffer = np.empty((self.chunk_size,) + frame.shape, dtype=np.uint8)
+        elif frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} differs from the session shape {self.shape}.")
+        if self.quality is None:
+            self._buffer[self._buffered] = frame
+        else:
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("Failed to encode a recorded frame.")
+            self._encoded.append(encoded.reshape(-1))
+        self._buffered += 1
+        self.timestamps.append(float(timestamp))
+        if self._buffered == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        if self.quality is None:
+            filename = f"chunk_{len(self.chunks):05d}.npy"
+            np.save(os.path.join(self.path, filename), self._buffer[:self._buffered])
+        else:
+            filename = f"chunk_{len(self.chunks):05d}.npz"
+            offsets = np.cumsum([0] + [len(encoded) for encoded in self._encoded])
+            # The frames are compressed already, so the archive itself is not
+            np.savez(os.path.join(self.path, filename), frames=np.concatenate(self._encoded), offsets=offsets)
+            self._encoded = []
+        self.chunks.append({'file': filename, 'count': self._buffered})
+        self._buffered = 0
+
+    def close(self):
+        """
+        Flushes the last chunk and writes the session index. Nothing is written if no frame
+        was recorded, e.g. because the source failed to open.
+        """
+        if not self.timestamps:
+            logger.warning("No frames recorded. Not writing a session to %s.", self.path)
+            return
+        self._flush()
+        index = {
+            'version': SESSION_VERSION,
+            'shape': list(self.shape),
+            'dtype': 'uint8',
+            'encoding': 'raw' if self.quality is None else 'jpeg',
+            'chunks': self.chunks,
+            'timestamps': self.timestamps
+        }
+        with open(os.path.join(self.path, SESSION_INDEX), 'w') as f:
+            json.dump(index, f)
+        logger.info("Recorded %s frames to %s.", len(self.timestamps), self.path)
+
+
+class RecordingSource(FrameSource):
+    """
+    Passes frames through from another source while recording them with a SessionRecorder.
+    """
+
+    def __init__(self, source, path, chunk_size=64, quality=95):
+        self.source = source
+        self.recorder = SessionRecorder(path, chunk_size=chunk_size, quality=quality)
+
+    def open(self):
+        self.source.open()
+        self.fps = self.source.fps
+        self.realtime = self.source.realtime
+        return self
+
+    def read(self):
+        item = self.source.read()
+        if item is not None:
+            self.recorder.write(*item)
+        return item
+
+    def release(self):
+        self.source.release()
+        self.recorder.close()
+
+
+class RecordedSessionSource(FrameSource):
+    """
+    Replays a session written by SessionRecorder, either at the original cadence or as fast
+    as possible. Raw chunks are memory-mapped; JPEG chunks are decoded frame by frame.
+    """
+
+    def __init__(self, path, realtime=True):
+        """
+        :param path: Session directory.
+        :param realtime: If True, frames are delivered at their recorded timing; otherwise as fast as possible.
+        """
+        self.path = path
+        self.realtime = realtime
+        self.timestamps = []
+        self._chunks = []
+        self._chunk_file = None
+        self._encoding = 'raw'
+        self._chunk = None
+        self._index = 0
+        self._start = None
+
+    def open(self):
+        index_path = os.path.join(self.path, SESSION_INDEX)
+        if not os.path.exists(index_path):
+            logger.error("No recorded session found in: %s", self.path)
+            raise ValueError(f"No recorded session found in: {self.path}")
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        # Version 1 sessions only had raw chunks
+        if index.get('version') not in (1, SESSION_VERSION):
+            raise ValueError(f"Unsupported session version: {index.get('version')}")
+        if not index['timestamps']:
+            raise ValueError(f"Recorded session is empty: {self.path}")
+        self.timestamps = index['timestamps']
+        self._encoding = index.get('encoding', 'raw')
+        self._chunks = []
+        for chunk in index['chunks']:
+            self._chunks.extend((chunk['file'], i) for i in range(chunk['count']))
+        self._chunk_file = None
+        self._chunk = None
+        if len(self.timestamps) > 1:
+            self.fps = (len(self.timestamps) - 1) / (self.timestamps[-1] - self.timestamps[0] or 1.0)
+        self._index = 0
+        self._start = None
+        return self
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def read(self):
+        if self._index >= len(self._chunks):
+            return None
+        filename, offset = self._chunks[self._index]
+        if filename != self._chunk_file:
+            # Only the chunk being replayed stays loaded; the previous one is dropped with it
+            chunk_path = os.path.join(self.path, filename)
+            if self._encoding == 'raw':
+                self._chunk = np.load(chunk_path, mmap_mode='r')
+            else:
+                with np.load(chunk_path) as archive:
+                    self._chunk = (archive['frames'], archive['offsets'])
+            self._chunk_file = filename
+        timestamp = self.timestamps[self._index]
+
+        if self.realtime:
+            # Wait until the frame's offset from the first frame has elapsed
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now - (timestamp - self.timestamps[0])
+            delay = self._start + (timestamp - self.timestamps[0]) - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self._index += 1
+        if self._encoding == 'raw':
+            return np.array(self._chunk[offset]), timestamp
+        frames, offsets = self._chunk
+        frame = cv2.imdecode(frames[offsets[offset]:offsets[offset + 1]], cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.error("Failed to decode frame %s of %s.", self._index - 1, self.path)
+            return None
+        return frame, timestamp
+
+    def release(self):
+        self._chunk_file = None
+        self._chunk = None
@@ -0,0 +1,90 @@
+# src/landmark_filter.py
+
+import math
+
+import numpy as np
+
+
+class LandmarkFilter:
+    """
+    One Euro filter applied to whole landmark arrays.
+
+    Each landmark is low-passed with a cutoff frequency that rises with its speed: a
+    still face is smoothed strongly, which removes the pixel jitter of FaceMesh, while a
+    moving face is followed with little lag. All landmarks of a face are filtered at once
+    with array operations. Faces are matched by detection order; a face whose landmark
+    count changes or that jumps by more than its own size starts over, and losing every
+    face resets the filter.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.1, derivative_cutoff=1.0, default_fps=30.0):
+        """
+        :param min_cutoff: Cutoff frequency in Hz of a still landmark; lower smooths more
+        :param beta: Increase of the cutoff per pixel per second of speed; higher lags less
+        :param derivative_cutoff: Cutoff frequency in Hz of the speed estimate
+        :param default_fps: Frame rate assumed when timestamps do not advance
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.default_interval = 1.0 / default_fps
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets every face, so the next landmarks pass through unfiltered.
+        """
+        self._faces = []
+        self._timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, interval):
+        # Smoothing factor of an exponential low-pass with the given cutoff frequency
+        return 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * interval))
+
+    def filter(self, faces_landmarks, timestamp=None):
+        """
+        :param faces_landmarks: List of (N, 2) landmark arrays, one per face
+        :param timestamp: Capture time of the frame in seconds, or None to assume default_fps
+        :return: List of filtered (N, 2) int32 landmark arrays
+        """
+        if not len(faces_landmarks):
+            self.reset()
+            return []
+
+        if timestamp is None or self._timestamp is None or timestamp <= self._timestamp:
+            interval = self.default_interval
+        else:
+            interval = timestamp - self._timestamp
+        self._timestamp = timestamp if timestamp is not None else (self._timestamp or 0.0) + interval
+        derivative_alpha = self._alpha(self.derivative_cutoff, interval)
+
+        filtered = []
+        faces = []
+        for index, landmarks in enumerate(faces_landmarks):
+            points = np.asarray(landmarks, dtype=np.float64)
+            state = self._faces[index] if index < len(self._faces) else None
+            if state is not None:
+                previous, speed, extent = state
+                if previous.shape != points.shape:
+                    state = None
+                else:
+                    displacement = points - previous
+                    if np.abs(displacement).max() > extent:
+                        # Not the same face any more
+                        state = None
+
+            if state is None:
+                smoothed, speed = points, np.zeros_like(points)
+                # Size of the face, measured once when it appears
+                extent = float((points.max(axis=0) - points.min(axis=0)).max())
+            else:
+                speed = speed + derivative_alpha * (displacement / interval - speed)
+                cutoff = self.min_cutoff + self.beta * np.hypot(speed[:, 0], speed[:, 1])
+                # Per-landmark smoothing factor, vectorized form of _alpha
+                alpha = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * interval * cutoff))
+                smoothed = previous + alpha[:, None] * displacement
+            faces.append((smoothed, speed, extent))
+            filtered.append(np.rint(smoothed).astype(np.int32))
+        self._faces = faces
+        return filtered
@@ -0,0 +1,113 @@
+# src/landmark_tracker.py
+
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LandmarkTracker:
+    """
+    Wraps a FaceDetector and only runs full FaceMesh detection every few frames.
+    In between, landmarks are propagated from the previous frame with sparse
+    Lucas-Kanade optical flow. Detection is rerun automatically when tracking is
+    lost or the head moves faster than the motion threshold.
+    """
+
+    def __init__(self, face_detector, detect_interval=5, motion_threshold=8.0, min_tracked_ratio=0.8,
+                 win_size=(21, 21), max_level=3):
+        """
+        :param face_detector: FaceDetector used for full detections
+        :param detect_interval: Run full detection at least once every this many frames
+        :param motion_threshold: Median landmark displacement (pixels per frame) above which detection is rerun
+        :param min_tracked_ratio: Minimum fraction of landmarks optical flow must track to keep tracking
+        :param win_size: Search window size of the optical flow at each pyramid level
+        :param max_level: Number of optical flow pyramid levels
+        """
+        self.face_detector = face_detector
+        self.detect_interval = detect_interval
+        self.motion_threshold = motion_threshold
+        self.min_tracked_ratio = min_tracked_ratio
+        self.lk_params = dict(
+            winSize=win_size,
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+        )
+        self.detections = 0
+        self.tracked_frames = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the tracking state so the next frame runs a full detection.
+        """
+        self._prev_gray = None
+        self._prev_faces = []
+        self._prev_depth = []
+        self._frames_since_detection = 0
+
+    def detect_faces(self, image, return_depth=False):
+        """
+        Returns the facial landmarks for a frame, detecting or tracking as needed.
+        Takes the same arguments and returns the same values as FaceDetector.detect_faces;
+        depth values are those of the last full detection.
+
+        :param image: BGR image from OpenCV
+        :param return_depth: If True, also return the depth and visibility of each landmark
+        :return: List of (N, 2) int32 landmark arrays, plus depth arrays if return_depth is True
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        faces = None
+        if self._prev_faces and self._frames_since_detection + 1 < self.detect_interval:
+            faces = self._track(gray)
+
+        if faces is None:
+            faces_landmarks, faces_depth = self.face_detector.detect_faces(image, return_depth=True)
+            faces = [landmarks.astype(np.float32) for landmarks in faces_landmarks]
+            self._prev_depth = faces_depth
+            self._frames_since_detection = 0
+            self.detections += 1
+        else:
+            self._frames_since_detection += 1
+            self.tracked_frames += 1
+            # Keep the detector's crop on the face for the next full detection
+            self.face_detector.update_roi(faces, image.shape)
+
+        self._prev_gray = gray
+        self._prev_faces = faces
+
+        faces_landmarks = [np.rint(points).astype(np.int32) for points in faces]
+        if return_depth:
+            return faces_landmarks, list(self._prev_depth)
+        return faces_landmarks
+
+    def _track(self, gray):
+        """
+        Propagates every previously known face to the current frame.
+
+        :return: List of float32 landmark arrays, or None if any face was lost
+        """
+        tracked_faces = []
+        for points in self._prev_faces:
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._prev_gray, gray, points.reshape(-1, 1, 2), None, **self.lk_params
+            )
+            next_points = next_points.reshape(-1, 2)
+            status = status.reshape(-1).astype(bool)
+
+            if status.mean() < self.min_tracked_ratio:
+                logger.debug("Landmark tracking lost. Running full detection.")
+                return None
+
+            displacement = next_points[status] - points[status]
+            motion = np.median(np.linalg.norm(displacement, axis=1))
+            if motion > self.motion_threshold:
+                logger.debug("Landmark motion %.1fpx exceeds threshold. Running full detection.", motion)
+                return None
+
+            # Move untracked landmarks along with the rest of the face
+            next_points[~status] = points[~status] + np.median(displacement, axis=0)
+            tracked_faces.append(next_points)
+        return tracked_faces
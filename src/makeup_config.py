@@ -2,12 +2,15 @@
 
 from collections import namedtuple
 
+import numpy as np
+
 # Define a namedtuple for makeup type configurations
 MakeupTypeConfig = namedtuple('MakeupTypeConfig', [
     'name',
     'facemesh_regions',
     'default_color',
-    'default_intensity'
+    'default_intensity',
+    'layer'  # Compositing order: lower layers are blended first, higher ones stack on top
 ])
 
 # Define configurations for each makeup type
@@ -40,7 +43,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(0, 0, 255),  # Red (BGR)
-        default_intensity=0.2
+        default_intensity=0.2,
+        layer=2
     ),
     # --- Lipstick Lower ---
     MakeupTypeConfig(
@@ -71,7 +75,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(0, 0, 255),  # Red (BGR)
-        default_intensity=0.2
+        default_intensity=0.2,
+        layer=2
     ),
     # --- Blush (unchanged) ---
     MakeupTypeConfig(
@@ -98,7 +103,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(255, 0, 0),  # Blue (BGR)
-        default_intensity=0.2
+        default_intensity=0.2,
+        layer=1
     ),
     # --- Eyebrow (unchanged) ---
     MakeupTypeConfig(
@@ -126,7 +132,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(0, 255, 0),  # Green (BGR)
-        default_intensity=0.25
+        default_intensity=0.25,
+        layer=2
     ),
     # --- Foundation (unchanged) ---
     MakeupTypeConfig(
@@ -171,7 +178,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(128, 128, 128),  # Gray (BGR)
-        default_intensity=0.2
+        default_intensity=0.2,
+        layer=0
     ),
     # --- Eyeliner Left ---
     MakeupTypeConfig(
@@ -200,7 +208,8 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(0, 0, 0),  # Black (BGR)
-        default_intensity=0.5
+        default_intensity=0.5,
+        layer=3
     ),
     # --- Eyeliner Right ---
     MakeupTypeConfig(
@@ -229,6 +238,49 @@ MAKEUP_TYPES_CONFIG = [
             ])
         },
         default_color=(0, 0, 0),  # Black (BGR)
-        default_intensity=0.5
+        default_intensity=0.5,
+        layer=3
     )
 ]
+
+
+# Compiled form of a single facemesh region: its sorted unique landmark indices
+MakeupRegion = namedtuple('MakeupRegion', [
+    'name',
+    'indices'
+])
+
+# Compiled form of a makeup type, ready to be fancy-indexed into a landmark array
+CompiledMakeupType = namedtuple('CompiledMakeupType', [
+    'config',
+    'regions',
+    'indices'
+])
+
+
+def _index_array(values):
+    array = np.array(values, dtype=np.int32)
+    array.setflags(write=False)
+    return array
+
+
+def compile_makeup_types(configs):
+    """
+    Builds the name -> CompiledMakeupType registry from makeup type configurations.
+
+    :param configs: List of MakeupTypeConfig
+    :return: Dictionary of makeup type names to CompiledMakeupType
+    """
+    registry = {}
+    for config in configs:
+        regions = []
+        for region_name, landmark_pairs in config.facemesh_regions.items():
+            indices = _index_array(sorted({idx for pair in landmark_pairs for idx in pair}))
+            regions.append(MakeupRegion(region_name, indices))
+        all_indices = _index_array(sorted({int(idx) for region in regions for idx in region.indices}))
+        registry[config.name] = CompiledMakeupType(config, tuple(regions), all_indices)
+    return registry
+
+
+# Registry compiled once at import and shared by every call site
+MAKEUP_TYPES = compile_makeup_types(MAKEUP_TYPES_CONFIG)
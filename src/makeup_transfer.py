@@ -3,21 +3,34 @@
 import cv2
 import numpy as np
 import logging
-from src.makeup_config import MAKEUP_TYPES_CONFIG
+from src.makeup_config import MAKEUP_TYPES
+from src.compositor import MakeupLayer, region_bbox, build_region_mask, fuse_layers, feather_edges
+from src.metrics import FrameMetrics
+from src.palette import MAX_STAT_PIXELS, compute_palette
+from utils.logging_utils import RateLimitedLogger
+
+logger = logging.getLogger(__name__)
+# Per-frame messages are summarized instead of logged on every frame
+frame_logger = RateLimitedLogger(logger)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # DEBUG for detailed logs
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
 
 class MakeupTransfer:
-    def __init__(self):
-        logging.info("MakeupTransfer initialized.")
+    def __init__(self, metrics=None, mask_cache=None):
+        """
+        :param metrics: Optional FrameMetrics to record stage timings into
+        :param mask_cache: Optional MaskCache reusing region masks across video frames
+        """
+        logger.info("MakeupTransfer initialized.")
         self.makeup_colors = {}
+        self.makeup_palettes = {}
+        self.metrics = metrics if metrics is not None else FrameMetrics()
+        self.mask_cache = mask_cache
+        # Quality knobs, lowered by the quality governor when frames run over budget:
+        # resolution factor of the region masks and the smoothing of the makeup edges
+        self.mask_scale = 1.0
+        self.feather = True
+        # Layers composited by the last apply_makeup call, e.g. to draw the segmentation overlay
+        self.last_layers = []
 
     def convert_rgb_to_bgr(self, rgb_color):
         """
@@ -27,124 +40,197 @@ class MakeupTransfer:
         :return: Tuple of (B, G, R)
         """
         if not isinstance(rgb_color, tuple) or len(rgb_color) != 3:
-            logging.error("RGB color must be a tuple of 3 elements.")
+            logger.error("RGB color must be a tuple of 3 elements.")
             raise ValueError("RGB color must be a tuple of 3 elements.")
         bgr = (int(rgb_color[2]), int(rgb_color[1]), int(rgb_color[0]))
-        logging.debug(f"Converted RGB {rgb_color} to BGR {bgr}.")
+        logger.debug("Converted RGB %s to BGR %s.", rgb_color, bgr)
         return bgr
 
-    def extract_makeup_color(self, reference_image, landmarks, makeup_types=['Lipstick']):
+    def extract_makeup_color(self, reference_image, landmarks, makeup_types=['Lipstick'], return_palettes=False,
+                             clusters=3):
         """
         Extracts the average color for specified makeup types from the reference image.
 
+        With return_palettes, a robust palette of each region is computed in the same pass
+        over the region ROIs and also kept in self.makeup_palettes. Palettes are opt-in
+        since their k-means clustering costs far more than the average color.
+
         :param reference_image: Original reference image in BGR
-        :param landmarks: List of facial landmarks as (x, y) tuples
+        :param landmarks: (N, 2) array of facial landmarks as returned by FaceDetector.detect_faces
         :param makeup_types: List of makeup types to extract.
-        :return: Dictionary of makeup types to BGR color tuples
+        :param return_palettes: If True, also return a ColorPalette per makeup type.
+        :param clusters: Number of dominant colors per palette.
+        :return: Dictionary of makeup types to BGR color tuples. If return_palettes is True,
+                 a tuple (makeup_colors, makeup_palettes) where makeup_palettes maps makeup
+                 types to ColorPalette.
         """
-        logging.info(f"Extracting makeup colors for types: {makeup_types}")
+        logger.info("Extracting makeup colors for types: %s", makeup_types)
         makeup_colors = {}
+        makeup_palettes = {}
 
-        for makeup_type in makeup_types:
-            # Find the configuration for the makeup type
-            config = next((mt for mt in MAKEUP_TYPES_CONFIG if mt.name == makeup_type), None)
-            if not config:
-                logging.warning(f"No configuration found for makeup type: {makeup_type}. Skipping.")
-                continue
-
-            mask = np.zeros(reference_image.shape[:2], dtype=np.uint8)
-
+        for makeup_type, roi, mask in self._region_rois(reference_image, landmarks, makeup_types):
             try:
-                for region_name, landmark_pairs in config.facemesh_regions.items():
-                    # Extract unique landmark indices
-                    indices = list({idx for pair in landmark_pairs for idx in pair})
-                    region_landmarks = [landmarks[i] for i in indices]
-
-                    # Compute convex hull
-                    hull = cv2.convexHull(np.array(region_landmarks))
-                    cv2.fillConvexPoly(mask, hull, 255)
-                    logging.debug(f"{makeup_type} - {region_name} mask created.")
-
-                # Clean the mask using morphological operations and Gaussian blur
-                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
-                mask = cv2.GaussianBlur(mask, (7, 7), 0)
-                logging.debug(f"{makeup_type} mask cleaned and blurred.")
-
                 # Compute the mean color within the mask
-                mean_color = cv2.mean(reference_image, mask=mask)[:3]
+                mean_color = cv2.mean(roi, mask=mask)[:3]
                 makeup_colors[makeup_type] = mean_color  # Store the extracted color
-                logging.info(f"Extracted Makeup Color for {makeup_type} (BGR): {mean_color}")
+                logger.info("Extracted Makeup Color for %s (BGR): %s", makeup_type, mean_color)
+
+                if return_palettes:
+                    # The robust statistics only use the mask core. Large regions are sampled
+                    # on a regular grid rather than gathering every pixel.
+                    step = max(1, int(np.sqrt(mask.size / MAX_STAT_PIXELS)))
+                    core = mask[::step, ::step] > 127
+                    palette = compute_palette(roi[::step, ::step][core], mean=mean_color, clusters=clusters)
+                    if palette is None:
+                        logger.warning("%s region is empty in the reference image. No palette.", makeup_type)
+                    else:
+                        makeup_palettes[makeup_type] = palette
+                        logger.debug("%s palette: %s", makeup_type, palette)
 
             except Exception as e:
-                logging.error(f"Error extracting {makeup_type} color: {e}")
+                logger.error("Error extracting %s color: %s", makeup_type, e)
                 continue  # Proceed with other makeup types
 
+        if return_palettes:
+            self.makeup_palettes.update(makeup_palettes)
+            return makeup_colors, makeup_palettes
         return makeup_colors
 
+    def _region_rois(self, reference_image, landmarks, makeup_types):
+        """
+        Crops the reference image to the padded bounding box of each makeup type's regions,
+        so large reference photos need no full-resolution masks.
+
+        :return: Generator of (makeup type, ROI of the reference image, uint8 mask of the ROI)
+        """
+        landmarks = np.asarray(landmarks, dtype=np.int32)
+        for makeup_type in makeup_types:
+            # Look up the compiled configuration for the makeup type
+            compiled = MAKEUP_TYPES.get(makeup_type)
+            if not compiled:
+                logger.warning("No configuration found for makeup type: %s. Skipping.", makeup_type)
+                continue
+
+            try:
+                point_sets = [landmarks[region.indices] for region in compiled.regions]
+                bbox = region_bbox(point_sets, reference_image.shape)
+                if bbox is None:
+                    logger.warning("%s region lies outside the reference image. Skipping.", makeup_type)
+                    continue
+                x0, y0, x1, y1 = bbox
+                # Same cleaned, blurred mask as for rendering, restricted to the ROI
+                mask = build_region_mask(point_sets, bbox)
+                logger.debug("%s mask created within ROI %s.", makeup_type, bbox)
+            except Exception as e:
+                logger.error("Error building the %s mask: %s", makeup_type, e)
+                continue  # Proceed with other makeup types
+
+            yield makeup_type, reference_image[y0:y1, x0:x1], mask
+
     def apply_makeup(self, target_image, landmarks, makeup_params):
         """
         Apply multiple makeup types to the target image based on landmarks and parameters.
 
         :param target_image: Original target image in BGR
-        :param landmarks: List of facial landmarks as (x, y) tuples
+        :param landmarks: (N, 2) array of facial landmarks as returned by FaceDetector.detect_faces
         :param makeup_params: Dictionary with makeup types as keys and parameters as values
                               Each value should be a dictionary with 'color' (BGR tuple) and 'intensity' (float)
         :return: Image with applied makeup
         """
-        logging.info(f"Applying makeup types: {list(makeup_params.keys())}")
+        return self.apply_makeup_multi(target_image, [landmarks], makeup_params)
+
+    def apply_makeup_multi(self, target_image, faces_landmarks, makeup_params, face_params=None):
+        """
+        Apply makeup to several faces at once. The layers of all faces are composited in a
+        single pass over one copy of the image, so every extra face only costs its own regions.
+
+        :param target_image: Original target image in BGR
+        :param faces_landmarks: List of (N, 2) landmark arrays, one per face
+        :param makeup_params: Dictionary with makeup types as keys and parameters as values,
+                              used for every face without an override
+        :param face_params: Optional list of per-face makeup_params overrides, indexed like
+                            faces_landmarks; a missing or None entry uses makeup_params
+        :return: Image with applied makeup
+        """
+        frame_logger.info("Applying makeup types: %s to %s face(s)", list(makeup_params), len(faces_landmarks))
         makeup_applied = target_image.copy()
+        layers = []
+        for index, landmarks in enumerate(faces_landmarks):
+            params = makeup_params
+            if face_params and index < len(face_params) and face_params[index] is not None:
+                params = face_params[index]
+            layers.extend(self.build_layers(target_image.shape, landmarks, params, face_index=index))
+        self.last_layers = layers
+
+        # Composite all layers in one ordered pass
+        with self.metrics.timer('makeup.blend'):
+            fuse_layers(makeup_applied, layers)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Makeup applied for %s.", [layer.name for layer in layers])
+
+        # Smooth the makeup edges only, leaving the rest of the image untouched
+        if self.feather and layers:
+            with self.metrics.timer('makeup.smooth'):
+                feather_edges(makeup_applied, layers)
+            logger.debug("Feathered the makeup edges.")
+
+        return makeup_applied
+
+    def build_layers(self, image_shape, landmarks, makeup_params, face_index=0):
+        """
+        Rasterizes the region masks of one face into makeup layers, reusing the masks of
+        previous frames from the mask cache when the face has barely moved.
+
+        :param image_shape: Shape of the image the layers will be composited into
+        :param landmarks: (N, 2) array of facial landmarks of the face
+        :param makeup_params: Dictionary with makeup types as keys and parameters as values
+        :param face_index: Index of the face in the frame, used to key the mask cache
+        :return: List of MakeupLayer
+        """
+        landmarks = np.asarray(landmarks, dtype=np.int32)
+        mask_scale = self.mask_scale
+        layers = []
 
         for makeup_type, params in makeup_params.items():
-            # Find the configuration for the makeup type
-            config = next((mt for mt in MAKEUP_TYPES_CONFIG if mt.name == makeup_type), None)
-            if not config:
-                logging.warning(f"No configuration found for makeup type: {makeup_type}. Skipping.")
+            # Look up the compiled configuration for the makeup type
+            compiled = MAKEUP_TYPES.get(makeup_type)
+            if not compiled:
+                frame_logger.warning("No configuration found for makeup type: %s. Skipping.", makeup_type)
                 continue
+            config = compiled.config
 
             color = params.get('color', config.default_color)  # Use provided color or default
             intensity = params.get('intensity', config.default_intensity)  # Use provided intensity or default
 
-            mask = np.zeros(target_image.shape[:2], dtype=np.uint8)
-
             try:
-                for region_name, landmark_pairs in config.facemesh_regions.items():
-                    # Extract unique landmark indices
-                    indices = list({idx for pair in landmark_pairs for idx in pair})
-                    region_landmarks = [landmarks[i] for i in indices]
-
-                    # Compute convex hull
-                    hull = cv2.convexHull(np.array(region_landmarks))
-                    cv2.fillConvexPoly(mask, hull, 255)
-                    logging.debug(f"{makeup_type} - {region_name} mask created.")
-
-                # Clean the mask using morphological operations and Gaussian blur
-                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
-                mask = cv2.GaussianBlur(mask, (7, 7), 0)
-                logging.debug(f"{makeup_type} mask cleaned and blurred.")
-
-                # Create a color overlay for the makeup
-                color_overlay = np.full(target_image.shape, color, dtype=np.uint8)
-                color_overlay = cv2.GaussianBlur(color_overlay, (15, 15), 0)
-                logging.debug(f"{makeup_type} color overlay created and blurred.")
-
-                # Blend the color overlay with the target image
-                blended = cv2.addWeighted(color_overlay, intensity, target_image, 1 - intensity, 0)
-                logging.debug(f"{makeup_type} color overlay blended with target image.")
-
-                # Create a boolean mask
-                makeup_mask = mask.astype(bool)
-                logging.debug(f"{makeup_type} makeup mask created with shape {makeup_mask.shape}.")
-
-                # Apply the blended makeup to the target image
-                makeup_applied[makeup_mask] = blended[makeup_mask]
-                logging.debug(f"Makeup applied for {makeup_type}.")
+                cached = None
+                if self.mask_cache is not None:
+                    # Masks of another resolution are kept apart
+                    key = (face_index, makeup_type, mask_scale)
+                    points = landmarks[compiled.indices]
+                    cached = self.mask_cache.lookup(key, points, image_shape)
+
+                if cached is not None:
+                    bbox, mask = cached
+                else:
+                    point_sets = [landmarks[region.indices] for region in compiled.regions]
+
+                    # Work only inside the padded bounding box of the regions
+                    bbox = region_bbox(point_sets, image_shape)
+                    if bbox is None:
+                        logger.debug("%s region lies outside the frame. Skipping.", makeup_type)
+                        continue
+
+                    with self.metrics.timer('makeup.mask', makeup_type):
+                        mask = build_region_mask(point_sets, bbox, scale=mask_scale)
+                    if self.mask_cache is not None:
+                        self.mask_cache.store(key, points, bbox, mask)
+                    logger.debug("%s mask created within ROI %s.", makeup_type, bbox)
+
+                layers.append(MakeupLayer(makeup_type, bbox, mask, color, intensity, config.layer))
 
             except Exception as e:
-                logging.error(f"Error applying {makeup_type}: {e}")
+                frame_logger.error("Error applying %s: %s", makeup_type, e)
                 continue  # Proceed with other makeup types
 
-        # Optional: Apply additional smoothing to the entire makeup-applied image
-        makeup_applied = cv2.GaussianBlur(makeup_applied, (5, 5), 0)
-        logging.debug("Applied additional Gaussian blur to the makeup-applied image.")
-
-        return makeup_applied
+        return layers
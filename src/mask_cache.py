@@ -0,0 +1,102 @@
+# src/mask_cache.py
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# Soft mask of one makeup type as last rasterized: the landmark points it was built
+# from, the box it covers and the uint8 mask itself.
+CachedMask = namedtuple('CachedMask', [
+    'points',
+    'bbox',
+    'mask'
+])
+
+
+class MaskCache:
+    """
+    Keeps the soft region mask of every (face, makeup type) from previous frames.
+
+    A cached mask is reused when every landmark of the region lies within the tolerance of
+    where it was when the mask was rasterized. When the whole region moved, the mask is
+    reused at a box shifted by the median landmark motion, provided the residual motion
+    of every landmark is also within the tolerance. Anything else is a miss and the
+    caller rebuilds the mask.
+    """
+
+    def __init__(self, tolerance=1.5):
+        """
+        :param tolerance: Largest landmark displacement in pixels a reused mask may be off by
+        """
+        self.tolerance = tolerance
+        self.hits = 0
+        self.translations = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key, points, frame_shape):
+        """
+        :param key: Tuple (face_index, makeup_type, mask_scale)
+        :param points: (N, 2) int32 landmark points of the region in the current frame
+        :param frame_shape: Shape of the current frame
+        :return: Tuple (bbox, mask) of the cached uint8 mask and the box it now covers, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.points.shape == points.shape:
+            displacement = points - entry.points
+            if np.abs(displacement).max() <= self.tolerance:
+                with self._lock:
+                    self.hits += 1
+                return entry.bbox, entry.mask
+
+            dx, dy = np.rint(np.median(displacement, axis=0)).astype(int)
+            if (dx or dy) and np.abs(displacement - (dx, dy)).max() <= self.tolerance:
+                x0, y0, x1, y1 = entry.bbox
+                frame_h, frame_w = frame_shape[:2]
+                # A box clipped by the frame edge lacks part of the region, so it cannot be moved
+                clipped = x0 == 0 or y0 == 0 or x1 == frame_w or y1 == frame_h
+                bbox = (x0 + dx, y0 + dy, x1 + dx, y1 + dy)
+                if not clipped and bbox[0] >= 0 and bbox[1] >= 0 and bbox[2] <= frame_w and bbox[3] <= frame_h:
+                    with self._lock:
+                        self.translations += 1
+                    return bbox, entry.mask
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, key, points, bbox, mask):
+        """
+        Remembers a freshly rasterized mask together with the points it was built from.
+        """
+        # The mask is handed out again on later frames, so nobody may modify it
+        mask.setflags(write=False)
+        self._entries[key] = CachedMask(points.copy(), bbox, mask)
+
+    def clear(self):
+        self._entries = {}
+
+    def reset(self):
+        """
+        Drops every cached mask and zeroes the counters.
+        """
+        self.clear()
+        with self._lock:
+            self.hits = 0
+            self.translations = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        :return: Dictionary of hit, translation and miss counts plus the overall hit rate
+        """
+        with self._lock:
+            reused = self.hits + self.translations
+            total = reused + self.misses
+            return {
+                'hits': self.hits,
+                'translations': self.translations,
+                'misses': self.misses,
+                'hit_rate': reused / total if total else 0.0
+            }
@@ -0,0 +1,200 @@
+# src/metrics.py
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _NullTimer:
+    """
+    Timer returned while metrics are disabled: entering and leaving it does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'label', 'start')
+
+    def __init__(self, metrics, name, label):
+        self.metrics = metrics
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        name = self.name if self.label is None else f"{self.name}.{self.label}"
+        self.metrics.record(name, elapsed)
+        return False
+
+
+class FrameMetrics:
+    """
+    Lightweight per-stage frame-time instrumentation.
+
+    Durations are measured with the monotonic perf_counter clock and kept in a rolling
+    window per stage, from which p50/p95/p99 are computed on demand. While disabled,
+    timer() returns a shared no-op context manager so instrumented code costs almost nothing.
+    """
+
+    def __init__(self, enabled=False, window=300):
+        """
+        :param enabled: Whether timings are recorded
+        :param window: Number of most recent samples kept per stage
+        """
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name, label=None):
+        """
+        Returns a context manager timing the enclosed block as stage 'name' (or 'name.label').
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, label)
+
+    def record(self, name, elapsed):
+        """
+        Records a duration in seconds for a stage.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+            samples.append(elapsed)
+            self._counts[name] += 1
+
+    def set_gauge(self, name, value):
+        """
+        Sets a point-in-time value (e.g. current quality level) reported alongside the timings.
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def summary(self):
+        """
+        :return: Dictionary of stage names to count, mean and p50/p95/p99 in milliseconds
+        """
+        with self._lock:
+            snapshot = {name: (np.array(samples), self._counts[name]) for name, samples in self._samples.items()}
+        result = {}
+        for name, (samples, count) in snapshot.items():
+            if not len(samples):
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000.0
+            result[name] = {
+                'count': count,
+                'mean_ms': float(samples.mean() * 1000.0),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99)
+            }
+        return result
+
+    def gauges(self):
+        with self._lock:
+            return dict(self._gauges)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._gauges.clear()
+
+
+class MetricsExporter:
+    """
+    Background thread that periodically writes a FrameMetrics summary to disk, either as a
+    JSON snapshot (overwritten each time) or as rows appended to a CSV file. In the CSV,
+    stage rows fill the count and millisecond columns, and gauge rows the value column.
+    """
+
+    def __init__(self, metrics, path, interval=5.0, fmt=None):
+        """
+        :param metrics: FrameMetrics to export
+        :param path: Output file path
+        :param interval: Seconds between dumps
+        :param fmt: 'json' or 'csv'; inferred from the file extension if None
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'json')
+        if self.fmt not in ('json', 'csv'):
+            raise ValueError(f"Unsupported metrics export format: {self.fmt}")
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        logger.info("Exporting metrics to %s every %ss.", self.path, self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.dump()  # Final snapshot
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                logger.error("Failed to export metrics to %s: %s", self.path, e)
+
+    def dump(self):
+        """
+        Writes the current summary once.
+        """
+        timestamp = time.time()
+        summary = self.metrics.summary()
+        gauges = self.metrics.gauges()
+        if self.fmt == 'json':
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'timestamp': timestamp, 'stages': summary, 'gauges': gauges}, f, indent=2)
+            os.replace(temp_path, self.path)
+        else:
+            write_header = not os.path.exists(self.path)
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(['timestamp', 'stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'value'])
+                for name, stats in sorted(summary.items()):
+                    writer.writerow([
+                        f"{timestamp:.3f}", name, stats['count'],
+                        f"{stats['mean_ms']:.3f}", f"{stats['p50_ms']:.3f}",
+                        f"{stats['p95_ms']:.3f}", f"{stats['p99_ms']:.3f}", ''
+                    ])
+                # Gauges are not latencies, so they leave the millisecond columns empty
+                for name, value in sorted(gauges.items()):
+                    writer.writerow([f"{timestamp:.3f}", name, '', '', '', '', '', value])
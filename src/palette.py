@@ -0,0 +1,105 @@
+# src/palette.py
+
+import cv2
+import numpy as np
+from collections import namedtuple
+
+# Robust color statistics of one makeup region. All colors are BGR tuples of floats;
+# 'dominant' lists (color, weight) pairs from the k-means clusters, heaviest first, with
+# the weights summing to 1. 'rejected_count' pixels were dropped as highlights or teeth.
+ColorPalette = namedtuple('ColorPalette', [
+    'mean',
+    'trimmed_mean',
+    'median',
+    'dominant',
+    'pixel_count',
+    'rejected_count'
+])
+
+# Pixels at least this bright (OpenCV 8-bit Lab L) and this unsaturated are specular highlights
+SPECULAR_LIGHTNESS = 235
+SPECULAR_CHROMA = 20
+# Pixels brighter than the region median with less than this fraction of its chroma
+# are teeth, sclera or glare rather than makeup
+OUTLIER_CHROMA_RATIO = 0.4
+# Fraction of pixels cut from each end of every channel for the trimmed mean
+TRIM_FRACTION = 0.1
+# Largest number of pixels the statistics and the clustering look at; bigger regions,
+# e.g. the foundation of a high-resolution photo, are subsampled on a regular stride
+MAX_STAT_PIXELS = 200000
+MAX_CLUSTER_PIXELS = 20000
+
+
+def reject_outliers(lab):
+    """
+    :param lab: (N, 3) uint8 array of OpenCV Lab pixels
+    :return: Boolean (N,) array, True for pixels to keep
+    """
+    lightness = lab[:, 0].astype(np.float32)
+    chroma = np.hypot(lab[:, 1].astype(np.float32) - 128.0, lab[:, 2].astype(np.float32) - 128.0)
+    specular = (lightness >= SPECULAR_LIGHTNESS) & (chroma < SPECULAR_CHROMA)
+    outlier = (lightness > np.median(lightness)) & (chroma < OUTLIER_CHROMA_RATIO * np.median(chroma))
+    return ~(specular | outlier)
+
+
+def dominant_colors(lab, clusters=3, seed=0):
+    """
+    Clusters Lab pixels with k-means.
+
+    :param lab: (N, 3) uint8 array of OpenCV Lab pixels
+    :param clusters: Number of clusters
+    :param seed: Seed of the subsampling and of the k-means initialization
+    :return: List of (BGR tuple, weight) pairs, heaviest first
+    """
+    if len(lab) > MAX_CLUSTER_PIXELS:
+        rng = np.random.default_rng(seed)
+        lab = lab[rng.choice(len(lab), MAX_CLUSTER_PIXELS, replace=False)]
+    clusters = min(clusters, len(lab))
+    cv2.setRNGSeed(seed)
+    criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_MAX_ITER, 20, 0.5)
+    _, labels, centers = cv2.kmeans(lab.astype(np.float32), clusters, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+    weights = np.bincount(labels.ravel(), minlength=clusters) / len(labels)
+    centers_bgr = cv2.cvtColor(np.clip(centers, 0, 255).astype(np.uint8).reshape(1, -1, 3), cv2.COLOR_LAB2BGR)[0]
+    # Clusters of a near-uniform region can collapse onto the same color; merge them
+    merged = {}
+    for center, weight in zip(centers_bgr, weights):
+        color = tuple(float(c) for c in center)
+        merged[color] = merged.get(color, 0.0) + float(weight)
+    return sorted(merged.items(), key=lambda item: -item[1])
+
+
+def compute_palette(pixels, mean=None, clusters=3):
+    """
+    Computes the robust palette of a region from its pixels in one vectorized pass.
+
+    :param pixels: (N, 3) uint8 array of BGR pixels inside the region
+    :param mean: Plain mean color to report; computed from pixels if None
+    :param clusters: Number of dominant colors
+    :return: ColorPalette, or None if there are no pixels
+    """
+    if not len(pixels):
+        return None
+    if mean is None:
+        mean = tuple(float(c) for c in pixels.mean(axis=0))
+    pixel_count = len(pixels)
+    if pixel_count > MAX_STAT_PIXELS:
+        pixels = pixels[::-(-pixel_count // MAX_STAT_PIXELS)]
+    lab = cv2.cvtColor(pixels.reshape(1, -1, 3), cv2.COLOR_BGR2LAB).reshape(-1, 3)
+    keep = reject_outliers(lab)
+    # Keep everything if the region is mostly "outliers", e.g. a white eyeliner
+    if keep.mean() < 0.1:
+        keep[:] = True
+    kept = pixels[keep]
+
+    trim = int(len(kept) * TRIM_FRACTION)
+    ordered = np.sort(kept, axis=0)
+    trimmed = ordered[trim:len(kept) - trim] if len(kept) - 2 * trim > 0 else ordered
+
+    return ColorPalette(
+        mean=tuple(mean),
+        trimmed_mean=tuple(float(c) for c in trimmed.mean(axis=0)),
+        median=tuple(float(c) for c in np.median(kept, axis=0)),
+        dominant=dominant_colors(lab[keep], clusters),
+        pixel_count=pixel_count,
+        rejected_count=int(round((len(pixels) - len(kept)) * pixel_count / len(pixels)))
+    )
@@ -0,0 +1,244 @@
+# src/pipeline.py
+
+import threading
+import time
+import logging
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Layout of a frame pipeline: 'stages' is an ordered list of stage groups, each group
+# being a tuple of stage names run one after another on the same thread.
+# 'queue_depths' gives the capacity of the queue between consecutive groups, either
+# as a single int for all queues or as one int per queue.
+PipelineConfig = namedtuple('PipelineConfig', [
+    'stages',
+    'queue_depths'
+])
+
+DEFAULT_PIPELINE_CONFIG = PipelineConfig(
+    stages=(('capture',), ('detect',), ('render',)),
+    queue_depths=1
+)
+
+
+class LatestFrameQueue:
+    """
+    Bounded queue where putting into a full queue evicts the oldest item, so a
+    slow consumer always gets the most recent frames. With block, putting into a
+    full queue waits for room instead, so that no item is lost.
+    """
+
+    def __init__(self, maxsize=1, block=False):
+        if maxsize < 1:
+            raise ValueError("Queue depth must be at least 1.")
+        self.maxsize = maxsize
+        self.block = block
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, item):
+        with self._condition:
+            if self.block:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    # Nobody will read it any more
+                    self.dropped += 1
+                    return
+            elif len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Returns the oldest queued item, waiting up to timeout seconds.
+
+        :return: The item, or None if the queue was closed or the wait timed out
+        """
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout)
+            if self._items:
+                item = self._items.popleft()
+                # Wake a producer waiting for room
+                self._condition.notify_all()
+                return item
+            return None
+
+    def clear(self):
+        with self._condition:
+            self._items.clear()
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        Stops accepting items. Items already queued can still be read.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class StageStats:
+    """
+    Timing counters for a single processing stage.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def as_dict(self):
+        mean = self.total_time / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_ms': mean * 1000.0,
+            'last_ms': self.last_time * 1000.0,
+            'max_ms': self.max_time * 1000.0
+        }
+
+
+def timed_call(stats, func, *args):
+    """
+    Calls func(*args) and records its duration into stats.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    stats.record(time.perf_counter() - start)
+    return result
+
+
+class FramePipeline:
+    """
+    Runs named frame-processing stages on separate threads joined by
+    LatestFrameQueue instances.
+
+    The first stage of the first group is the source: it is called with no
+    arguments and returning None ends the pipeline once the later groups have
+    processed the items still queued. Every other stage receives the previous
+    stage's output; returning None drops the item. stop() or an error in any
+    group ends the pipeline at once.
+    """
+
+    def __init__(self, stage_functions, config=DEFAULT_PIPELINE_CONFIG, stage_stats=None, poll_interval=0.1,
+                 lossless=False):
+        """
+        :param stage_functions: Dictionary of stage names to callables
+        :param config: PipelineConfig describing the stage layout and queue depths
+        :param stage_stats: Optional dictionary of stage names to StageStats to record into
+        :param poll_interval: Seconds a stage waits on its input queue before rechecking for stop
+        :param lossless: If True, a stage waits for room in a full queue instead of evicting the
+                         oldest item, for sources that deliver frames as fast as they are read
+        """
+        self.groups = [tuple(group) for group in config.stages]
+        if not self.groups or not all(self.groups):
+            raise ValueError("Pipeline needs at least one non-empty stage group.")
+        unknown = [name for group in self.groups for name in group if name not in stage_functions]
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {unknown}")
+
+        depths = config.queue_depths
+        if isinstance(depths, int):
+            depths = [depths] * (len(self.groups) - 1)
+        if len(depths) != len(self.groups) - 1:
+            raise ValueError("Pipeline needs one queue depth per pair of consecutive stage groups.")
+
+        self.stage_functions = stage_functions
+        self.queues = [LatestFrameQueue(depth, block=lossless) for depth in depths]
+        self.stage_stats = stage_stats if stage_stats is not None else {}
+        for group in self.groups:
+            for name in group:
+                self.stage_stats.setdefault(name, StageStats())
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def _run_group(self, index):
+        group = self.groups[index]
+        in_queue = self.queues[index - 1] if index > 0 else None
+        out_queue = self.queues[index] if index < len(self.queues) else None
+        finished = False
+        try:
+            while not self._stop_event.is_set():
+                if in_queue is None:
+                    item = timed_call(self.stage_stats[group[0]], self.stage_functions[group[0]])
+                    if item is None:
+                        logger.info("Pipeline source exhausted.")
+                        finished = True
+                        break
+                    names = group[1:]
+                else:
+                    item = in_queue.get(timeout=self.poll_interval)
+                    if item is None:
+                        if in_queue.closed and not len(in_queue):
+                            # The previous group is done and everything it produced was processed
+                            finished = True
+                            break
+                        continue
+                    names = group
+
+                for name in names:
+                    item = timed_call(self.stage_stats[name], self.stage_functions[name], item)
+                    if item is None:
+                        break
+
+                if item is not None and out_queue is not None:
+                    out_queue.put(item)
+        except Exception as e:
+            logger.error("An error occurred in pipeline stage group %s: %s", group, e)
+        finally:
+            if finished and out_queue is not None:
+                # Let the next group drain its queue before it ends in turn
+                out_queue.close()
+            else:
+                # The last group finishing, stop() or an error stops the whole pipeline
+                self.stop()
+
+    def run(self):
+        """
+        Starts one thread per stage group and blocks until the pipeline stops.
+        """
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run_group, args=(index,), name=f"pipeline-{'+'.join(group)}", daemon=True)
+            for index, group in enumerate(self.groups)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Pipeline started with stages %s.", self.groups)
+        for thread in self._threads:
+            thread.join()
+        logger.info("Pipeline stopped.")
+
+    def stop(self):
+        self._stop_event.set()
+        for q in self.queues:
+            q.close()
+
+    def dropped_frames(self):
+        """
+        :return: Number of items evicted from each inter-stage queue
+        """
+        return [q.dropped for q in self.queues]
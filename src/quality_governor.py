@@ -0,0 +1,137 @@
+# src/quality_governor.py
+
+import logging
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# One step of the quality ladder:
+# 'inference_size' caps the longest side of the image FaceMesh sees (None: as configured),
+# 'mask_scale' is the resolution factor of the region masks, 'feather' keeps the edge
+# smoothing of apply_makeup, 'segmentation' allows the segmentation overlay, and
+# 'detect_interval' runs face detection on one frame out of that many.
+QualityLevel = namedtuple('QualityLevel', [
+    'name',
+    'inference_size',
+    'mask_scale',
+    'feather',
+    'segmentation',
+    'detect_interval'
+])
+
+# From best to cheapest
+QUALITY_LEVELS = (
+    QualityLevel('full', None, 1.0, True, True, 1),
+    QualityLevel('high', 640, 1.0, True, True, 1),
+    QualityLevel('medium', 480, 0.75, False, True, 2),
+    QualityLevel('low', 320, 0.5, False, False, 3),
+    QualityLevel('minimum', 256, 0.5, False, False, 4)
+)
+
+
+class QualityGovernor:
+    """
+    Steps through quality levels to hold a target frame rate.
+
+    Every processed frame reports its cost (the time spent detecting and rendering it).
+    The governor steps down one level once the mean cost over the last frames exceeds
+    the frame budget, and steps back up only once it has stayed well under the budget
+    for a longer stretch. After each change the measurements are cleared so that the new
+    level is judged on its own frames. An upgrade that has to be undone before the new
+    level proved itself doubles the wait before the next one. The asymmetric thresholds
+    and delays keep it from oscillating between two levels.
+    """
+
+    def __init__(self, target_fps=24.0, levels=QUALITY_LEVELS, downgrade_frames=15, upgrade_frames=90,
+                 upgrade_ratio=0.7, metrics=None):
+        """
+        :param target_fps: Frame rate to hold
+        :param levels: Sequence of QualityLevel, from best to cheapest
+        :param downgrade_frames: Frames over budget (on average) before stepping down
+        :param upgrade_frames: Frames under upgrade_ratio of the budget (on average) before stepping up,
+                               doubled after each failed upgrade up to 8 times as many
+        :param upgrade_ratio: Fraction of the frame budget the cost must stay under to step up
+        :param metrics: Optional FrameMetrics the current level is reported to as gauges
+        """
+        self.levels = tuple(levels)
+        self.downgrade_frames = downgrade_frames
+        self.upgrade_frames = upgrade_frames
+        self.upgrade_ratio = upgrade_ratio
+        self.metrics = metrics
+        self.set_target_fps(target_fps)
+        self.changes = 0
+        self.upgrade_delay = upgrade_frames
+        self._upgraded = False
+        self.reset()
+
+    def set_target_fps(self, target_fps):
+        self.target_fps = target_fps
+        self.frame_budget = 1.0 / target_fps
+
+    def reset(self, index=0):
+        """
+        Restarts at the given level with an empty measurement window.
+        """
+        self.index = index
+        self._recent = deque(maxlen=self.downgrade_frames)
+        self._total = 0.0
+        self._count = 0
+        self._report()
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def update(self, frame_cost):
+        """
+        Records the cost of a frame and changes level if needed.
+
+        :param frame_cost: Seconds spent processing the frame
+        :return: The QualityLevel for the next frames
+        """
+        self._recent.append(frame_cost)
+        self._total += frame_cost
+        self._count += 1
+
+        if len(self._recent) == self.downgrade_frames and self.index < len(self.levels) - 1:
+            mean_cost = sum(self._recent) / self.downgrade_frames
+            if mean_cost > self.frame_budget:
+                if self._upgraded and self._count < self.upgrade_frames:
+                    # The last upgrade did not hold: wait longer before trying again
+                    self.upgrade_delay = min(self.upgrade_delay * 2, self.upgrade_frames * 8)
+                self._upgraded = False
+                self._change(self.index + 1, mean_cost)
+                return self.level
+
+        if self._upgraded and self._count == self.upgrade_frames:
+            # The upgraded level held
+            self.upgrade_delay = self.upgrade_frames
+            self._upgraded = False
+        if self._count >= self.upgrade_delay and self.index > 0:
+            mean_cost = self._total / self._count
+            if mean_cost < self.frame_budget * self.upgrade_ratio:
+                self._upgraded = True
+                self._change(self.index - 1, mean_cost)
+        return self.level
+
+    def _change(self, index, mean_cost):
+        logger.info(
+            "Frame cost %.1f ms against a %.1f ms budget: quality %s -> %s.",
+            mean_cost * 1000.0, self.frame_budget * 1000.0, self.level.name, self.levels[index].name
+        )
+        self.changes += 1
+        self.reset(index)
+
+    def _report(self):
+        if self.metrics is not None:
+            self.metrics.set_gauge('quality_level', self.level.name)
+            self.metrics.set_gauge('quality_index', self.index)
+
+    def stats(self):
+        return {
+            'level': self.level.name,
+            'index': self.index,
+            'changes': self.changes,
+            'target_fps': self.target_fps,
+            'upgrade_delay': self.upgrade_delay
+        }
@@ -0,0 +1,127 @@
+# tests/test_color_cache.py
+#
+# Usage: python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.color_cache import ColorCache, config_version, load_reference_colors
+from src.makeup_config import MAKEUP_TYPES_CONFIG, MakeupTypeConfig
+
+LANDMARKS = np.arange(20, dtype=np.int32).reshape(10, 2)
+
+
+class FakeDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def detect_faces(self, image):
+        self.calls += 1
+        return [LANDMARKS]
+
+
+class FakeTransfer:
+    def __init__(self):
+        self.requested = []
+
+    def extract_makeup_color(self, image, landmarks, makeup_types):
+        self.requested.append(list(makeup_types))
+        return {name: (float(index), 0.0, 0.0) for index, name in enumerate(makeup_types)}
+
+
+class ColorCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.cache = ColorCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_image(self, name, value):
+        path = os.path.join(self.directory, name)
+        cv2.imwrite(path, np.full((8, 8, 3), value, dtype=np.uint8))
+        return path
+
+    def set_mtime(self, image_hash, mtime):
+        os.utime(self.cache._path(image_hash), (mtime, mtime))
+
+    def test_keyed_by_content_not_by_name(self):
+        first = self.write_image('look.png', 10)
+        copy = os.path.join(self.directory, 'renamed.png')
+        shutil.copy(first, copy)
+        other = self.write_image('other.png', 20)
+        self.assertEqual(self.cache.image_hash(first), self.cache.image_hash(copy))
+        self.assertNotEqual(self.cache.image_hash(first), self.cache.image_hash(other))
+
+    def test_changed_file_is_hashed_again(self):
+        path = self.write_image('look.png', 10)
+        before = self.cache.image_hash(path)
+        cv2.imwrite(path, np.full((8, 9, 3), 30, dtype=np.uint8))
+        self.assertNotEqual(self.cache.image_hash(path), before)
+
+    def test_config_change_invalidates_entries(self):
+        changed = MAKEUP_TYPES_CONFIG[:-1] + [MakeupTypeConfig(
+            MAKEUP_TYPES_CONFIG[-1].name, {'eyeliner': frozenset([(1, 2)])}, (0, 0, 0), 0.5, 3
+        )]
+        self.assertNotEqual(config_version(changed), config_version())
+        self.assertIn(self.cache.version, os.path.basename(self.cache._path('abc')))
+
+    def test_entries_persist_across_instances(self):
+        self.cache.put('abc', LANDMARKS, {'Blush': (1.0, 2.0, 3.0)})
+        entry = ColorCache(self.cache_dir).get('abc', ['Blush'])
+        np.testing.assert_array_equal(entry['landmarks'], LANDMARKS)
+        self.assertEqual(entry['colors'], {'Blush': (1.0, 2.0, 3.0)})
+        self.assertTrue(entry['complete'])
+
+    def test_entry_lacking_types_is_incomplete(self):
+        self.cache.put('abc', LANDMARKS, {'Blush': (1.0, 2.0, 3.0)})
+        self.assertFalse(self.cache.get('abc', ['Blush', 'Foundation'])['complete'])
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.stats()['hits'], 0)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_evicts_least_recently_used_files(self):
+        for index, image_hash in enumerate(('old', 'used', 'new')):
+            self.cache.put(image_hash, LANDMARKS, {'Blush': (1.0, 2.0, 3.0)})
+            self.set_mtime(image_hash, 1000 + index)
+        # A hit served from memory still counts as a use
+        self.assertIsNotNone(self.cache.get('old'))
+        self.cache.max_bytes = sum(os.path.getsize(self.cache._path(image_hash)) for image_hash in ('old', 'new'))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertFalse(os.path.exists(self.cache._path('used')))
+        self.assertTrue(os.path.exists(self.cache._path('old')))
+        self.assertTrue(os.path.exists(self.cache._path('new')))
+        self.assertIsNone(self.cache.get('used'))
+
+    def test_memory_is_bounded(self):
+        cache = ColorCache(self.cache_dir, memory_entries=2)
+        for index in range(4):
+            cache.put(f"hash{index}", LANDMARKS, {})
+            cache.image_hash(self.write_image(f"look{index}.png", index))
+        self.assertEqual(cache.stats()['memory_entries'], 2)
+        self.assertEqual(len(cache._file_hashes), 2)
+
+    def test_load_reference_colors_extracts_only_missing_types(self):
+        path = self.write_image('look.png', 10)
+        detector, transfer = FakeDetector(), FakeTransfer()
+        landmarks, colors = load_reference_colors(path, ['Blush'], detector, transfer, cache=self.cache)
+        np.testing.assert_array_equal(landmarks, LANDMARKS)
+        self.assertEqual(colors, {'Blush': (0.0, 0.0, 0.0)})
+
+        _, colors = load_reference_colors(path, ['Blush', 'Foundation'], detector, transfer, cache=self.cache)
+        self.assertEqual(set(colors), {'Blush', 'Foundation'})
+        self.assertEqual(detector.calls, 1)
+        self.assertEqual(transfer.requested, [['Blush'], ['Foundation']])
+
+        load_reference_colors(path, ['Foundation', 'Blush'], detector, transfer, cache=self.cache)
+        self.assertEqual(len(transfer.requested), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+# tests/test_compositor.py
+#
+# Usage: python -m unittest discover tests
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.compositor import ROI_PADDING, MakeupLayer, build_region_mask, feather_edges, fuse_layers, region_bbox
+
+
+def full_frame_mask(point_sets, frame_shape):
+    """
+    Region mask rasterized over the whole frame, as apply_makeup did before masks were
+    cropped to the region box.
+    """
+    mask = np.zeros(frame_shape[:2], dtype=np.uint8)
+    for points in point_sets:
+        cv2.fillConvexPoly(mask, cv2.convexHull(points.astype(np.int32)), 255)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+    return cv2.GaussianBlur(mask, (7, 7), 0)
+
+
+def float_composite(image, layers):
+    """
+    Reference blend in float over the whole image: out = out * (1 - alpha) + color * alpha
+    with alpha = mask * intensity / 255, layers in ascending order.
+    """
+    output = image.astype(np.float64)
+    for layer in sorted(layers, key=lambda layer: layer.order):
+        x0, y0, x1, y1 = layer.bbox
+        alpha = layer.mask[..., None] * layer.intensity / 255.0
+        target = output[y0:y1, x0:x1]
+        target[:] = target * (1 - alpha) + np.asarray(layer.color, dtype=np.float64) * alpha
+    return np.rint(output).astype(np.uint8)
+
+
+class RegionMaskTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame_shape = (240, 320, 3)
+        # Two overlapping blobs, like the upper and lower lip
+        self.point_sets = [
+            rng.integers((120, 100), (180, 130), size=(12, 2)).astype(np.int32),
+            rng.integers((130, 120), (200, 150), size=(12, 2)).astype(np.int32)
+        ]
+
+    def test_bbox_is_padded_and_clipped(self):
+        self.assertEqual(region_bbox([np.array([[50, 60], [70, 90]])], self.frame_shape),
+                         (50 - ROI_PADDING, 60 - ROI_PADDING, 71 + ROI_PADDING, 91 + ROI_PADDING))
+        self.assertEqual(region_bbox([np.array([[2, 3], [315, 238]])], self.frame_shape), (0, 0, 320, 240))
+
+    def test_bbox_outside_the_frame_is_none(self):
+        self.assertIsNone(region_bbox([np.array([[400, 300], [420, 330]])], self.frame_shape))
+
+    def test_roi_mask_matches_the_full_frame_mask(self):
+        bbox = region_bbox(self.point_sets, self.frame_shape)
+        x0, y0, x1, y1 = bbox
+        expected = full_frame_mask(self.point_sets, self.frame_shape)
+        np.testing.assert_array_equal(build_region_mask(self.point_sets, bbox), expected[y0:y1, x0:x1])
+        # Nothing of the region lies outside its box
+        expected[y0:y1, x0:x1] = 0
+        self.assertFalse(expected.any())
+
+    def test_roi_mask_at_the_frame_edge(self):
+        point_sets = [np.array([[0, 0], [40, 0], [40, 30], [0, 30]], dtype=np.int32)]
+        bbox = region_bbox(point_sets, self.frame_shape)
+        x0, y0, x1, y1 = bbox
+        np.testing.assert_array_equal(build_region_mask(point_sets, bbox),
+                                      full_frame_mask(point_sets, self.frame_shape)[y0:y1, x0:x1])
+
+    def test_downscaled_mask_covers_the_box(self):
+        bbox = region_bbox(self.point_sets, self.frame_shape)
+        mask = build_region_mask(self.point_sets, bbox, scale=0.5)
+        full = build_region_mask(self.point_sets, bbox)
+        self.assertEqual(mask.shape, full.shape)
+        # Only the edges differ, so the masks cover nearly the same pixels
+        inside, full_inside = mask > 127, full > 127
+        self.assertGreater((inside & full_inside).sum() / (inside | full_inside).sum(), 0.9)
+
+
+class FuseLayersTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.image = rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+        mask = np.zeros((40, 60), dtype=np.uint8)
+        cv2.circle(mask, (30, 20), 15, 255, -1)
+        self.soft_mask = cv2.GaussianBlur(mask, (7, 7), 0)
+
+    def layer(self, name, bbox, color, intensity=0.6, order=0, mask=None):
+        x0, y0, x1, y1 = bbox
+        if mask is None:
+            mask = cv2.resize(self.soft_mask, (x1 - x0, y1 - y0), interpolation=cv2.INTER_LINEAR)
+        return MakeupLayer(name, bbox, mask, color, intensity, order)
+
+    def test_matches_the_float_blend(self):
+        layers = [
+            self.layer('Foundation', (10, 10, 150, 110), (120, 140, 200), intensity=0.3, order=0),
+            self.layer('Blush', (20, 30, 80, 70), (90, 60, 220), intensity=0.5, order=1),
+            self.layer('Lipstick', (60, 60, 120, 100), (30, 20, 180), intensity=0.8, order=2)
+        ]
+        output = self.image.copy()
+        self.assertEqual(fuse_layers(output, layers), (10, 10, 150, 110))
+        difference = np.abs(output.astype(int) - float_composite(self.image, layers))
+        # Each uint8 blend step rounds once
+        self.assertLessEqual(difference.max(), len(layers) + 1)
+
+    def test_higher_layers_are_on_top_whatever_the_list_order(self):
+        full = np.full((40, 60), 255, dtype=np.uint8)
+        bottom = self.layer('Foundation', (0, 0, 60, 40), (0, 0, 255), intensity=1.0, order=0, mask=full)
+        top = self.layer('Eyeliner', (0, 0, 60, 40), (0, 0, 0), intensity=1.0, order=3, mask=full)
+        for layers in ([bottom, top], [top, bottom]):
+            output = self.image.copy()
+            fuse_layers(output, layers)
+            self.assertFalse(output[:40, :60].any())
+
+    def test_mask_is_soft_alpha(self):
+        image = np.full((20, 20, 3), 200, dtype=np.uint8)
+        half = np.full((20, 20), 128, dtype=np.uint8)
+        fuse_layers(image, [self.layer('Blush', (0, 0, 20, 20), (0, 0, 0), intensity=1.0, mask=half)])
+        np.testing.assert_allclose(image, 100, atol=1)
+
+        image = np.full((20, 20, 3), 200, dtype=np.uint8)
+        fuse_layers(image, [self.layer('Blush', (0, 0, 20, 20), (0, 0, 0), intensity=0.5, mask=half)])
+        np.testing.assert_allclose(image, 150, atol=1)
+
+    def test_pixels_outside_the_layers_are_untouched(self):
+        output = self.image.copy()
+        fuse_layers(output, [self.layer('Blush', (40, 30, 100, 70), (0, 255, 0), intensity=1.0)])
+        outside = np.ones(self.image.shape[:2], dtype=bool)
+        outside[30:70, 40:100] = False
+        np.testing.assert_array_equal(output[outside], self.image[outside])
+
+    def test_zero_intensity_and_no_layers_leave_the_image_unchanged(self):
+        output = self.image.copy()
+        self.assertIsNone(fuse_layers(output, []))
+        fuse_layers(output, [self.layer('Blush', (0, 0, 60, 40), (0, 0, 0), intensity=0.0)])
+        np.testing.assert_array_equal(output, self.image)
+
+
+class FeatherEdgesTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.image = rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+        mask = np.zeros((50, 70), dtype=np.uint8)
+        cv2.ellipse(mask, (35, 25), (25, 15), 0, 0, 360, 255, -1)
+        self.layers = [
+            MakeupLayer('Lipstick', (40, 30, 110, 80), cv2.GaussianBlur(mask, (7, 7), 0), (30, 20, 180), 0.8, 2),
+            MakeupLayer('Blush', (90, 60, 160, 110), cv2.GaussianBlur(mask, (9, 9), 0), (90, 60, 220), 0.5, 1)
+        ]
+
+    def edge_band(self, layers, band_width=2):
+        band = np.zeros(self.image.shape[:2], dtype=np.uint8)
+        for layer in layers:
+            x0, y0, x1, y1 = layer.bbox
+            band[y0:y1, x0:x1] |= cv2.inRange(layer.mask, 1, 254)
+        kernel = np.ones((2 * band_width + 1, 2 * band_width + 1), np.uint8)
+        return cv2.dilate(band, kernel) > 0
+
+    def test_only_the_edge_band_is_blurred(self):
+        composited = self.image.copy()
+        fuse_layers(composited, self.layers)
+        output = composited.copy()
+        feather_edges(output, self.layers)
+
+        band = self.edge_band(self.layers)
+        self.assertTrue(band.any())
+        np.testing.assert_array_equal(output[~band], composited[~band])
+        np.testing.assert_array_equal(output[band], cv2.GaussianBlur(composited, (5, 5), 0)[band])
+
+    def test_layers_without_intensity_are_not_feathered(self):
+        layers = [layer._replace(intensity=0.0) for layer in self.layers]
+        output = self.image.copy()
+        feather_edges(output, layers)
+        np.testing.assert_array_equal(output, self.image)
+
+
+if __name__ == '__main__':
+    unittest.main()
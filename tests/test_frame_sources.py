@@ -0,0 +1,138 @@
+# tests/test_frame_sources.py
+#
+# Usage: python -m unittest discover tests
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import weakref
+
+import numpy as np
+
+from src.frame_sources import SESSION_INDEX, FrameSource, RecordedSessionSource, RecordingSource, SessionRecorder
+
+
+class ListSource(FrameSource):
+    realtime = False
+
+    def __init__(self, frames, fail_open=False):
+        self.frames = frames
+        self.fail_open = fail_open
+        self.released = False
+        self._index = 0
+
+    def open(self):
+        if self.fail_open:
+            raise ValueError("Unable to open.")
+        return self
+
+    def read(self):
+        if self._index >= len(self.frames):
+            return None
+        self._index += 1
+        return self.frames[self._index - 1], (self._index - 1) / 30.0
+
+    def release(self):
+        self.released = True
+
+
+def sample_frames(count):
+    # Smooth content, like a camera image, so JPEG stays close to the original
+    y, x = np.mgrid[0:48, 0:64]
+    base = np.dstack([x * 3, y * 4, (x + y) * 2]).astype(np.uint8)
+    return [np.roll(base, index, axis=1) for index in range(count)]
+
+
+class SessionRecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def record(self, frames, **options):
+        recorder = SessionRecorder(self.path, chunk_size=4, **options)
+        for index, frame in enumerate(frames):
+            recorder.write(frame, index / 30.0)
+        recorder.close()
+
+    def replay(self):
+        with RecordedSessionSource(self.path, realtime=False) as source:
+            return list(source)
+
+    def test_raw_session_replays_exactly(self):
+        frames = sample_frames(10)
+        self.record(frames, quality=None)
+        replayed = self.replay()
+        self.assertEqual(len(replayed), 10)
+        for (frame, timestamp), (expected, index) in zip(replayed, zip(frames, range(10))):
+            np.testing.assert_array_equal(frame, expected)
+            self.assertAlmostEqual(timestamp, index / 30.0)
+
+    def test_jpeg_session_is_compact_and_close(self):
+        frames = sample_frames(10)
+        self.record(frames)
+        replayed = self.replay()
+        self.assertEqual(len(replayed), 10)
+        for (frame, _), expected in zip(replayed, frames):
+            self.assertLess(np.abs(frame.astype(int) - expected).mean(), 2.0)
+        chunks = [name for name in os.listdir(self.path) if name.startswith('chunk_')]
+        self.assertEqual(len(chunks), 3)
+        size = sum(os.path.getsize(os.path.join(self.path, name)) for name in chunks)
+        self.assertLess(size, sum(frame.nbytes for frame in frames) / 3)
+
+    def test_replay_keeps_one_chunk_loaded(self):
+        self.record(sample_frames(10), quality=None)
+        source = RecordedSessionSource(self.path, realtime=False).open()
+        chunks = {}
+        while source.read() is not None:
+            chunks.setdefault(source._chunk_file, weakref.ref(source._chunk))
+            # Every chunk but the current one has been let go
+            self.assertEqual(sum(chunk() is not None for chunk in chunks.values()), 1)
+        self.assertEqual(len(chunks), 3)
+        source.release()
+        self.assertIsNone(source._chunk)
+
+    def test_frame_shape_must_not_change(self):
+        recorder = SessionRecorder(self.path)
+        recorder.write(np.zeros((4, 4, 3), dtype=np.uint8), 0.0)
+        with self.assertRaises(ValueError):
+            recorder.write(np.zeros((4, 5, 3), dtype=np.uint8), 0.1)
+
+    def test_recording_source_passes_frames_through(self):
+        frames = sample_frames(5)
+        source = RecordingSource(ListSource(frames), self.path, quality=None)
+        with source:
+            passed = [frame for frame, _ in source]
+        self.assertTrue(source.source.released)
+        self.assertEqual(len(passed), 5)
+        np.testing.assert_array_equal(self.replay()[4][0], frames[4])
+
+    def test_empty_recording_writes_no_session(self):
+        source = RecordingSource(ListSource([], fail_open=True), self.path)
+        with self.assertRaises(ValueError):
+            source.open()
+        source.release()
+        self.assertFalse(os.path.exists(os.path.join(self.path, SESSION_INDEX)))
+        with self.assertRaises(ValueError):
+            RecordedSessionSource(self.path).open()
+
+    def test_empty_session_index_is_rejected(self):
+        with open(os.path.join(self.path, SESSION_INDEX), 'w') as f:
+            json.dump({'version': 1, 'shape': None, 'dtype': 'uint8', 'chunks': [], 'timestamps': []}, f)
+        with self.assertRaises(ValueError):
+            RecordedSessionSource(self.path).open()
+
+    def test_version_1_sessions_replay_as_raw(self):
+        frames = sample_frames(3)
+        np.save(os.path.join(self.path, 'chunk_00000.npy'), np.stack(frames))
+        with open(os.path.join(self.path, SESSION_INDEX), 'w') as f:
+            json.dump({'version': 1, 'shape': list(frames[0].shape), 'dtype': 'uint8',
+                       'chunks': [{'file': 'chunk_00000.npy', 'count': 3}], 'timestamps': [0.0, 0.1, 0.2]}, f)
+        np.testing.assert_array_equal(self.replay()[2][0], frames[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
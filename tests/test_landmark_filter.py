@@ -0,0 +1,72 @@
+# tests/test_landmark_filter.py
+#
+# Usage: python -m unittest discover tests
+
+import unittest
+
+import numpy as np
+
+from src.landmark_filter import LandmarkFilter
+
+FPS = 30.0
+
+
+class LandmarkFilterTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rng = rng
+        self.face = np.rint(rng.uniform(100, 260, size=(468, 2))).astype(np.int32)
+        self.filter = LandmarkFilter()
+
+    def run_clip(self, frames):
+        return [self.filter.filter([points], index / FPS)[0] for index, points in enumerate(frames)]
+
+    def test_first_frame_passes_through(self):
+        np.testing.assert_array_equal(self.filter.filter([self.face], 0.0)[0], self.face)
+
+    def test_still_face_converges(self):
+        output = self.run_clip([self.face] * 10)
+        np.testing.assert_array_equal(output[-1], self.face)
+
+    def test_jitter_is_smoothed(self):
+        frames = [np.rint(self.face + self.rng.normal(0, 1.0, self.face.shape)).astype(np.int32) for _ in range(90)]
+        output = self.run_clip(frames)
+        raw_jitter = np.abs(np.diff(frames[30:], axis=0)).mean()
+        filtered_jitter = np.abs(np.diff(output[30:], axis=0)).mean()
+        self.assertLess(filtered_jitter, raw_jitter / 2)
+        # Smoothed around the true positions, not drifting away from them
+        self.assertLess(np.abs(np.mean(output[30:], axis=0) - self.face).mean(), 0.5)
+
+    def test_moving_face_lags_little(self):
+        for speed in (3, 10, 20):
+            self.filter.reset()
+            frames = [self.face + [speed * index, 0] for index in range(40)]
+            output = self.run_clip(frames)
+            self.assertLessEqual(np.abs(output[-1] - frames[-1]).max(), 2, f"{speed} px/frame")
+
+    def test_jump_larger_than_the_face_starts_over(self):
+        self.run_clip([self.face] * 5)
+        moved = self.face + [400, 0]
+        np.testing.assert_array_equal(self.filter.filter([moved], 5 / FPS)[0], moved)
+
+    def test_landmark_count_change_starts_over(self):
+        self.run_clip([self.face] * 5)
+        refined = np.vstack([self.face + 3, self.face[:10]])
+        np.testing.assert_array_equal(self.filter.filter([refined], 5 / FPS)[0], refined)
+
+    def test_losing_the_faces_resets(self):
+        self.run_clip([self.face] * 5)
+        self.assertEqual(self.filter.filter([], 5 / FPS), [])
+        shifted = self.face + 5
+        np.testing.assert_array_equal(self.filter.filter([shifted], 6 / FPS)[0], shifted)
+
+    def test_faces_are_filtered_independently(self):
+        other = self.face + [0, 300]
+        for index in range(5):
+            faces = self.filter.filter([self.face, other], index / FPS)
+        np.testing.assert_array_equal(faces[0], self.face)
+        np.testing.assert_array_equal(faces[1], other)
+
+
+if __name__ == '__main__':
+    unittest.main()
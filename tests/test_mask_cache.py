@@ -0,0 +1,70 @@
+# tests/test_mask_cache.py
+#
+# Usage: python -m unittest discover tests
+
+import unittest
+
+import numpy as np
+
+from src.mask_cache import MaskCache
+
+FRAME_SHAPE = (240, 320, 3)
+KEY = (0, 'Lipstick Upper', 1.0)
+
+
+class MaskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = MaskCache(tolerance=1.5)
+        self.points = np.array([[100, 100], [140, 96], [160, 110], [130, 125]], dtype=np.int32)
+        self.bbox = (90, 86, 170, 135)
+        self.mask = np.full((49, 80), 255, dtype=np.uint8)
+        self.cache.store(KEY, self.points, self.bbox, self.mask)
+
+    def test_empty_cache_misses(self):
+        self.assertIsNone(MaskCache().lookup(KEY, self.points, FRAME_SHAPE))
+
+    def test_still_region_hits(self):
+        bbox, mask = self.cache.lookup(KEY, self.points + [[1, 0], [0, -1], [1, 1], [0, 0]], FRAME_SHAPE)
+        self.assertEqual(bbox, self.bbox)
+        self.assertIs(mask, self.mask)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_stored_mask_is_read_only(self):
+        with self.assertRaises(ValueError):
+            self.mask[0, 0] = 0
+
+    def test_moved_region_is_translated(self):
+        bbox, mask = self.cache.lookup(KEY, self.points + [12, -5], FRAME_SHAPE)
+        self.assertEqual(bbox, (102, 81, 182, 130))
+        self.assertIs(mask, self.mask)
+        self.assertEqual(self.cache.stats()['translations'], 1)
+
+    def test_deformed_region_misses(self):
+        points = self.points.copy()
+        points[2] += [6, 4]  # e.g. the mouth opening
+        self.assertIsNone(self.cache.lookup(KEY, points, FRAME_SHAPE))
+        points = self.points + [12, -5]
+        points[0] += [0, 3]
+        self.assertIsNone(self.cache.lookup(KEY, points, FRAME_SHAPE))
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_translation_out_of_the_frame_misses(self):
+        self.assertIsNone(self.cache.lookup(KEY, self.points + [155, 0], FRAME_SHAPE))
+
+    def test_mask_clipped_by_the_frame_edge_is_not_translated(self):
+        self.cache.store(KEY, self.points, (0, 86, 170, 135), self.mask)
+        self.assertIsNone(self.cache.lookup(KEY, self.points + [10, 0], FRAME_SHAPE))
+
+    def test_other_keys_are_separate(self):
+        self.assertIsNone(self.cache.lookup((1, 'Lipstick Upper', 1.0), self.points, FRAME_SHAPE))
+        self.assertIsNone(self.cache.lookup((0, 'Lipstick Upper', 0.5), self.points, FRAME_SHAPE))
+
+    def test_reset_invalidates_every_mask(self):
+        self.cache.lookup(KEY, self.points, FRAME_SHAPE)
+        self.cache.reset()
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'translations': 0, 'misses': 0, 'hit_rate': 0.0})
+        self.assertIsNone(self.cache.lookup(KEY, self.points, FRAME_SHAPE))
+
+
+if __name__ == '__main__':
+    unittest.main()
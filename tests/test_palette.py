@@ -0,0 +1,71 @@
+# tests/test_palette.py
+#
+# Usage: python -m unittest discover tests
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.palette import MAX_STAT_PIXELS, compute_palette, reject_outliers
+
+LIP = (60, 40, 170)
+TEETH = (200, 215, 225)
+SPECULAR = (252, 253, 255)
+
+
+def noisy(color, count, rng, spread=4):
+    noise = rng.integers(-spread, spread + 1, size=(count, 3))
+    return np.clip(np.asarray(color) + noise, 0, 255).astype(np.uint8)
+
+
+class PaletteTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lips = noisy(LIP, 800, rng)
+        pixels = np.concatenate([self.lips, noisy(TEETH, 100, rng), noisy(SPECULAR, 50, rng, spread=2)])
+        self.pixels = pixels[rng.permutation(len(pixels))]
+
+    def assertColorClose(self, color, expected, tolerance):
+        np.testing.assert_allclose(color, expected, atol=tolerance)
+
+    def test_highlights_and_teeth_are_rejected(self):
+        lab = cv2.cvtColor(self.pixels.reshape(1, -1, 3), cv2.COLOR_BGR2LAB).reshape(-1, 3)
+        keep = reject_outliers(lab)
+        np.testing.assert_array_equal(self.pixels[keep].mean(axis=0), self.lips.mean(axis=0))
+
+    def test_statistics_ignore_the_outliers(self):
+        palette = compute_palette(self.pixels)
+        self.assertEqual(palette.pixel_count, 950)
+        self.assertEqual(palette.rejected_count, 150)
+        # The plain mean is pulled towards white; the robust statistics are not
+        self.assertGreater(palette.mean[0] - LIP[0], 20)
+        self.assertColorClose(palette.trimmed_mean, LIP, 1.0)
+        self.assertColorClose(palette.median, LIP, 1.0)
+        color, weight = palette.dominant[0]
+        self.assertColorClose(color, LIP, 4.0)
+        self.assertAlmostEqual(sum(weight for _, weight in palette.dominant), 1.0)
+
+    def test_region_of_outliers_keeps_every_pixel(self):
+        # A white eyeliner is all highlight by the rules above
+        white = noisy((245, 245, 245), 300, np.random.default_rng(1), spread=3)
+        palette = compute_palette(white)
+        self.assertEqual(palette.rejected_count, 0)
+        self.assertColorClose(palette.median, (245, 245, 245), 1.0)
+
+    def test_large_regions_are_subsampled(self):
+        rng = np.random.default_rng(2)
+        lips = noisy(LIP, 2 * MAX_STAT_PIXELS, rng)
+        pixels = np.concatenate([lips, noisy(SPECULAR, MAX_STAT_PIXELS // 2, rng, spread=2)])
+        pixels = pixels[rng.permutation(len(pixels))]
+        palette = compute_palette(pixels)
+        self.assertEqual(palette.pixel_count, len(pixels))
+        self.assertAlmostEqual(palette.rejected_count / len(pixels), 0.2, places=2)
+        self.assertColorClose(palette.median, LIP, 1.0)
+
+    def test_empty_region_has_no_palette(self):
+        self.assertIsNone(compute_palette(np.zeros((0, 3), dtype=np.uint8)))
+
+
+if __name__ == '__main__':
+    unittest.main()
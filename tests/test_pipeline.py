@@ -0,0 +1,143 @@
+# tests/test_pipeline.py
+#
+# Usage: python -m unittest discover tests
+
+import threading
+import time
+import unittest
+
+from src.pipeline import FramePipeline, LatestFrameQueue, PipelineConfig
+
+
+def counting_source(count, delay=0.0):
+    items = iter(range(count))
+
+    def source():
+        if delay:
+            time.sleep(delay)
+        return next(items, None)
+    return source
+
+
+def slow(func, delay):
+    def stage(item):
+        time.sleep(delay)
+        return func(item)
+    return stage
+
+
+class LatestFrameQueueTest(unittest.TestCase):
+    def test_full_queue_evicts_the_oldest_item(self):
+        queue = LatestFrameQueue(maxsize=2)
+        for item in range(5):
+            queue.put(item)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual([queue.get(timeout=0), queue.get(timeout=0)], [3, 4])
+        self.assertIsNone(queue.get(timeout=0))
+
+    def test_blocking_queue_waits_for_room(self):
+        queue = LatestFrameQueue(maxsize=1, block=True)
+        queue.put(0)
+        producer = threading.Thread(target=queue.put, args=(1,))
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(queue.get(timeout=1), 0)
+        producer.join(1)
+        self.assertEqual(queue.get(timeout=1), 1)
+        self.assertEqual(queue.dropped, 0)
+
+    def test_closed_queue_can_be_drained(self):
+        queue = LatestFrameQueue(maxsize=2)
+        queue.put('frame')
+        queue.close()
+        self.assertEqual(queue.get(timeout=0), 'frame')
+        self.assertIsNone(queue.get(timeout=0))
+
+    def test_close_releases_a_waiting_producer(self):
+        queue = LatestFrameQueue(maxsize=1, block=True)
+        queue.put(0)
+        producer = threading.Thread(target=queue.put, args=(1,))
+        producer.start()
+        queue.close()
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(queue.dropped, 1)
+
+
+class FramePipelineTest(unittest.TestCase):
+    def run_pipeline(self, stages, config=None, lossless=False):
+        results = []
+
+        def sink(item):
+            results.append(item)
+            return item
+        stages = dict(stages, sink=sink)
+        config = config or PipelineConfig(stages=(('source',), ('work',), ('sink',)), queue_depths=1)
+        pipeline = FramePipeline(stages, config, lossless=lossless, poll_interval=0.01)
+        runner = threading.Thread(target=pipeline.run)
+        runner.start()
+        runner.join(10)
+        self.assertFalse(runner.is_alive(), "pipeline did not stop")
+        return pipeline, results
+
+    def test_lossless_pipeline_delivers_every_item_in_order(self):
+        pipeline, results = self.run_pipeline(
+            {'source': counting_source(50), 'work': slow(lambda item: item * 2, 0.002)}, lossless=True
+        )
+        self.assertEqual(results, [item * 2 for item in range(50)])
+        self.assertEqual(pipeline.dropped_frames(), [0, 0])
+
+    def test_lossless_pipeline_drains_the_queues_when_the_source_ends(self):
+        config = PipelineConfig(stages=(('source',), ('work',), ('sink',)), queue_depths=4)
+        _, results = self.run_pipeline(
+            {'source': counting_source(20), 'work': slow(lambda item: item, 0.01)}, config, lossless=True
+        )
+        self.assertEqual(results, list(range(20)))
+
+    def test_realtime_pipeline_drops_stale_items(self):
+        pipeline, results = self.run_pipeline(
+            {'source': counting_source(40), 'work': slow(lambda item: item, 0.01)}
+        )
+        self.assertLess(len(results), 40)
+        self.assertGreater(sum(pipeline.dropped_frames()), 0)
+        self.assertEqual(results, sorted(results))
+        # The newest item is never the one dropped
+        self.assertEqual(results[-1], 39)
+
+    def test_stage_returning_none_drops_the_item(self):
+        _, results = self.run_pipeline(
+            {'source': counting_source(10), 'work': lambda item: item if item % 2 else None}, lossless=True
+        )
+        self.assertEqual(results, [1, 3, 5, 7, 9])
+
+    def test_grouped_stages_run_in_sequence(self):
+        config = PipelineConfig(stages=(('source', 'work'), ('sink',)), queue_depths=[2])
+        pipeline, results = self.run_pipeline(
+            {'source': counting_source(5), 'work': lambda item: -item}, config, lossless=True
+        )
+        self.assertEqual(results, [0, -1, -2, -3, -4])
+        self.assertEqual(pipeline.stage_stats['work'].count, 5)
+
+    def test_error_in_a_stage_stops_the_pipeline(self):
+        def work(item):
+            if item == 3:
+                raise RuntimeError("boom")
+            return item
+        _, results = self.run_pipeline({'source': counting_source(1000, delay=0.001), 'work': work}, lossless=True)
+        # Items already past the failing stage may or may not reach the sink before it stops
+        self.assertEqual(results, list(range(len(results))))
+        self.assertLessEqual(len(results), 3)
+
+    def test_invalid_configs_are_rejected(self):
+        stages = {'source': counting_source(1), 'work': lambda item: item}
+        with self.assertRaises(ValueError):
+            FramePipeline(stages, PipelineConfig(stages=(('source',), ('missing',)), queue_depths=1))
+        with self.assertRaises(ValueError):
+            FramePipeline(stages, PipelineConfig(stages=(('source',), ('work',)), queue_depths=[1, 1]))
+        with self.assertRaises(ValueError):
+            FramePipeline(stages, PipelineConfig(stages=(), queue_depths=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
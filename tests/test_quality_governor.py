@@ -0,0 +1,94 @@
+# tests/test_quality_governor.py
+#
+# Usage: python -m unittest discover tests
+
+import unittest
+
+from src.metrics import FrameMetrics
+from src.quality_governor import QUALITY_LEVELS, QualityGovernor
+
+BUDGET = 1.0 / 25.0
+OVER = BUDGET * 1.5
+# Between the upgrade threshold and the budget: neither steps down nor up
+WITHIN = BUDGET * 0.85
+UNDER = BUDGET * 0.4
+
+
+class QualityGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = FrameMetrics()
+        self.governor = QualityGovernor(target_fps=25.0, downgrade_frames=10, upgrade_frames=40,
+                                        upgrade_ratio=0.7, metrics=self.metrics)
+
+    def feed(self, cost, frames):
+        for _ in range(frames):
+            level = self.governor.update(cost)
+        return level
+
+    def test_starts_at_full_quality(self):
+        self.assertEqual(self.governor.level, QUALITY_LEVELS[0])
+        self.assertEqual(self.metrics.gauges(), {'quality_level': 'full', 'quality_index': 0})
+
+    def test_steps_down_once_over_budget_for_the_window(self):
+        self.assertEqual(self.feed(OVER, 9).name, 'full')
+        self.assertEqual(self.feed(OVER, 1).name, 'high')
+        self.assertEqual(self.metrics.gauges()['quality_level'], 'high')
+
+    def test_single_slow_frame_does_not_step_down(self):
+        self.feed(WITHIN, 9)
+        self.assertEqual(self.feed(BUDGET * 2, 1).name, 'full')
+
+    def test_steps_down_one_level_per_window(self):
+        self.feed(OVER, 10)
+        self.assertEqual(self.governor.index, 1)
+        # The window restarts after a change
+        self.assertEqual(self.feed(OVER, 9).name, 'high')
+        self.assertEqual(self.feed(OVER, 1).name, 'medium')
+
+    def test_stays_at_the_cheapest_level(self):
+        self.feed(OVER, 10 * len(QUALITY_LEVELS) * 2)
+        self.assertEqual(self.governor.level, QUALITY_LEVELS[-1])
+
+    def test_holds_within_the_hysteresis_band(self):
+        self.governor.reset(2)
+        self.feed(WITHIN, 400)
+        self.assertEqual(self.governor.index, 2)
+        self.assertEqual(self.governor.changes, 0)
+
+    def test_steps_up_after_a_long_stretch_under_budget(self):
+        self.governor.reset(2)
+        self.assertEqual(self.feed(UNDER, 39).name, 'medium')
+        self.assertEqual(self.feed(UNDER, 1).name, 'high')
+
+    def test_failed_upgrade_doubles_the_wait(self):
+        self.governor.reset(2)
+        self.feed(UNDER, 40)
+        self.assertEqual(self.governor.index, 1)
+        # The upgraded level is too slow and is undone before it proved itself
+        self.feed(OVER, 10)
+        self.assertEqual(self.governor.index, 2)
+        self.assertEqual(self.governor.upgrade_delay, 80)
+        self.assertEqual(self.feed(UNDER, 79).name, 'medium')
+        self.assertEqual(self.feed(UNDER, 1).name, 'high')
+
+    def test_held_upgrade_restores_the_wait(self):
+        self.governor.upgrade_delay = 80
+        self.governor.reset(2)
+        self.feed(UNDER, 80)
+        self.assertEqual(self.governor.index, 1)
+        self.feed(WITHIN, 40)
+        self.assertEqual(self.governor.upgrade_delay, 40)
+
+    def test_does_not_oscillate_on_a_borderline_load(self):
+        # Full quality runs over budget and the next level well under it
+        costs = {0: OVER}
+        for _ in range(2000):
+            self.governor.update(costs.get(self.governor.index, UNDER))
+        # Retrying every 40 frames would change level about 80 times; each retry waits
+        # twice as long as the last instead, up to 8 times the upgrade delay
+        self.assertLessEqual(self.governor.changes, 20)
+        self.assertEqual(self.governor.upgrade_delay, 320)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# tests/test_service_client.py
+#
+# Usage: python -m unittest discover tests
+
+import http.server
+import json
+import threading
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from service_client import TryOnClient
+
+
+class RecordingHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers every POST with an empty color set and keeps the request target.
+    """
+    protocol_version = 'HTTP/1.1'
+    targets = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.targets.append(self.path)
+        payload = json.dumps({'colors': {}, 'palettes': {}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class ExtractColorsTest(unittest.TestCase):
+    def setUp(self):
+        RecordingHandler.targets = []
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = TryOnClient('127.0.0.1', self.server.server_address[1])
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_multi_word_types_are_url_encoded(self):
+        self.client.extract_colors(b'image', ['Lipstick Upper', 'Eyeliner Left', 'Blush'])
+        url = urlsplit(RecordingHandler.targets[-1])
+        self.assertEqual(url.path, '/colors')
+        self.assertEqual(parse_qs(url.query)['types'], ['Lipstick Upper,Eyeliner Left,Blush'])
+
+    def test_all_types_by_default(self):
+        self.client.extract_colors(b'image')
+        self.assertEqual(RecordingHandler.targets[-1], '/colors')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# utils/logging_utils.py
+
+import logging
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Configures the root logger for an entry-point script. Library modules only create
+    their own loggers with logging.getLogger(__name__) and never configure handlers.
+
+    :param level: Logging level as an int or a level name such as 'DEBUG'
+    :return: The resolved logging level
+    """
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(level)
+    return level
+
+
+class RateLimitedLogger:
+    """
+    Wraps a logger for messages emitted on every frame. Each distinct message (by level
+    and format string) is logged at most once per interval; the occurrences suppressed in
+    between are reported as a count on the next emitted record.
+
+    Records below the logger's effective level return before any formatting or
+    bookkeeping, so filtered per-frame calls cost a single level check.
+    """
+
+    def __init__(self, logger, interval=5.0):
+        """
+        :param logger: logging.Logger to emit through
+        :param interval: Minimum number of seconds between two records of the same message
+        """
+        self.logger = logger
+        self.interval = interval
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def debug(self, msg, *args):
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        self._log(logging.INFO, msg, args)
+
+    def warning(self, msg, *args):
+        self._log(logging.WARNING, msg, args)
+
+    def error(self, msg, *args):
+        self._log(logging.ERROR, msg, args)
+
+    def _log(self, level, msg, args):
+        if not self.logger.isEnabledFor(level):
+            return
+        key = (level, msg)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._state.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._state[key] = (last, suppressed + 1)
+                return
+            self._state[key] = (now, 0)
+        if suppressed:
+            msg = f"{msg} (repeated {suppressed} more times in the last {now - last:.1f}s)"
+        self.logger.log(level, msg, *args, stacklevel=3)
+
+    def reset(self):
+        """
+        Forgets all suppression state so the next occurrence of every message is logged.
+        """
+        with self._lock:
+            self._state.clear()
@@ -1,6 +1,7 @@
 # utils/utils.py
 
 import cv2
+import json
 
 def load_image(path):
     """
@@ -20,3 +21,19 @@ def save_image(path, image):
     :param image: Image in BGR format.
     """
     cv2.imwrite(path, image)
+
+def load_makeup_params(path):
+    """
+    Loads makeup parameters saved by MakeupApp.save_makeup_parameters.
+
+    :param path: Path to the JSON file.
+    :return: Dictionary with makeup types as keys and {'color': BGR tuple, 'intensity': float} values.
+    """
+    with open(path, 'r') as f:
+        params = json.load(f)
+    makeup_params = {}
+    for makeup_type, attributes in params.items():
+        makeup_params[makeup_type] = dict(attributes)
+        if 'color' in attributes:
+            makeup_params[makeup_type]['color'] = tuple(attributes['color'])
+    return makeup_params
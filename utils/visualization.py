@@ -2,66 +2,123 @@
 
 import cv2
 import numpy as np
-from src.makeup_config import MAKEUP_TYPES_CONFIG
+from src.makeup_config import MAKEUP_TYPES
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Outline colors of the segmentation overlays, looked up by makeup type or its first word
+SEGMENTATION_COLORS = {
+    'Lipstick': (0, 0, 255),      # Red
+    'Blush': (255, 0, 0),     # Blue
+    'Eyebrow': (0, 255, 0),        # Green
+    'Foundation': (128, 128, 128)  # Gray
+}
+
+
 def overlay_segmentation(image, landmarks, makeup_types=['Lipstick'], outline_color=(0, 255, 0), thickness=2):
     """
     Overlay segmentation outlines based on facial landmarks for visualization.
 
     :param image: Original image in BGR format.
-    :param landmarks: List of facial landmarks as (x, y) tuples.
+    :param landmarks: (N, 2) array of facial landmarks as returned by FaceDetector.detect_faces.
     :param makeup_types: List of makeup types to visualize.
     :param outline_color: Tuple representing BGR color for the outlines.
     :param thickness: Thickness of the outline lines.
     :return: Image with segmentation outlines.
     """
     overlay = image.copy()
-    
-    # Define specific colors for each makeup type for better distinction (optional)
-    makeup_colors_visual = {
-        'Lipstick': (0, 0, 255),      # Red
-        'Blush': (255, 0, 0),     # Blue
-        'Eyebrow': (0, 255, 0),        # Green
-        'Foundation': (128, 128, 128)  # Gray
-    }
+    landmarks = np.asarray(landmarks, dtype=np.int32)
     
     for makeup_type in makeup_types:
-        # Find the configuration for the makeup type
-        config = next((mt for mt in MAKEUP_TYPES_CONFIG if mt.name == makeup_type), None)
-        if not config:
-            logging.warning(f"No configuration found for makeup type: {makeup_type}. Skipping.")
+        # Look up the compiled configuration for the makeup type
+        compiled = MAKEUP_TYPES.get(makeup_type)
+        if not compiled:
+            logger.warning("No configuration found for makeup type: %s. Skipping.", makeup_type)
             continue
 
         mask = np.zeros(image.shape[:2], dtype=np.uint8)
         try:
-            for region_name, landmark_pairs in config.facemesh_regions.items():
-                # Extract unique landmark indices
-                indices = list({idx for pair in landmark_pairs for idx in pair})
-                region_landmarks = [landmarks[i] for i in indices]
-
+            for region in compiled.regions:
                 # Compute convex hull
-                hull = cv2.convexHull(np.array(region_landmarks))
+                hull = cv2.convexHull(landmarks[region.indices])
                 cv2.fillConvexPoly(mask, hull, 255)
-                logging.debug(f"{makeup_type} - {region_name} mask created.")
+                logger.debug("%s - %s mask created.", makeup_type, region.name)
 
             # Clean the mask using morphological operations and Gaussian blur
             mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
             mask = cv2.GaussianBlur(mask, (7, 7), 0)
-            logging.debug(f"{makeup_type} mask cleaned and blurred.")
+            logger.debug("%s mask cleaned and blurred.", makeup_type)
 
             # Find contours from the mask
             contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             # Determine the color for the outline
-            color = makeup_colors_visual.get(makeup_type, outline_color)  # Use specific color if defined
+            color = SEGMENTATION_COLORS.get(makeup_type, outline_color)  # Use specific color if defined
 
             # Draw contours on the overlay image
             cv2.drawContours(overlay, contours, -1, color, thickness)
-            logging.debug(f"Segmentation outline drawn for {makeup_type}.")
+            logger.debug("Segmentation outline drawn for %s.", makeup_type)
 
         except Exception as e:
-            logging.error(f"Error overlaying {makeup_type}: {e}")
+            logger.error("Error overlaying %s: %s", makeup_type, e)
             continue  # Proceed with other makeup types
 
     return overlay.astype(np.uint8)
+
+def draw_segmentation(image, layers, outline_cache=None, outline_color=(0, 255, 0), thickness=2):
+    """
+    Draws the outlines of the makeup layers rendered into a frame, in place.
+
+    The outlines are the external contours of the layers' own masks, so nothing is
+    rasterized again. With an outline_cache, the contours of a mask are traced once and
+    reused for as long as the mask cache hands out the same mask.
+
+    :param image: Image in BGR format the layers were composited into.
+    :param layers: List of MakeupLayer, e.g. MakeupTransfer.last_layers.
+    :param outline_cache: Optional dictionary kept between frames; entries of masks not
+                          drawn in this call are dropped.
+    :param outline_color: BGR color of makeup types without a color of their own.
+    :param thickness: Thickness of the outline lines.
+    :return: The same image.
+    """
+    used = {}
+    for layer in layers:
+        entry = outline_cache.get(id(layer.mask)) if outline_cache is not None else None
+        if entry is None or entry[0] is not layer.mask:
+            # Contours relative to the mask box; the mask is kept so that its id stays unique
+            contours, _ = cv2.findContours(layer.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            entry = (layer.mask, contours)
+        used[id(layer.mask)] = entry
+
+        color = SEGMENTATION_COLORS.get(layer.name, SEGMENTATION_COLORS.get(layer.name.split()[0], outline_color))
+        cv2.drawContours(image, entry[1], -1, color, thickness, offset=layer.bbox[:2])
+    if outline_cache is not None:
+        outline_cache.clear()
+        outline_cache.update(used)
+    return image
+
+
+def draw_metrics_hud(image, summary, gauges=None, origin=(10, 20), color=(0, 255, 255), line_height=16):
+    """
+    Draws per-stage timing percentiles onto the image in place.
+
+    :param image: Image in BGR format.
+    :param summary: Dictionary as returned by FrameMetrics.summary().
+    :param gauges: Optional dictionary of extra values to display.
+    :param origin: (x, y) position of the first line.
+    :param color: BGR text color.
+    :param line_height: Vertical spacing between lines in pixels.
+    :return: The same image.
+    """
+    x, y = origin
+    lines = [
+        f"{name}: p50 {stats['p50_ms']:.1f} p95 {stats['p95_ms']:.1f} p99 {stats['p99_ms']:.1f} ms"
+        for name, stats in sorted(summary.items())
+    ]
+    lines += [f"{name}: {value}" for name, value in sorted((gauges or {}).items())]
+    for line in lines:
+        cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1, cv2.LINE_AA)
+        y += line_height
+    return image
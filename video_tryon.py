@@ -0,0 +1,41 @@
+# video_tryon.py
+
+import argparse
+
+from main import MakeupTryOn
+from utils.utils import load_makeup_params
+from utils.logging_utils import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a saved makeup look to a video file.")
+    parser.add_argument('input', help="Input video file.")
+    parser.add_argument('params', help="Makeup parameters JSON saved from the GUI.")
+    parser.add_argument('output', help="Output video file.")
+    parser.add_argument('--fourcc', default='mp4v', help="FourCC code of the output codec (default: mp4v).")
+    parser.add_argument('--detect-interval', type=int, default=5,
+                        help="Run full face detection at least every N frames (default: 5).")
+    parser.add_argument('--motion-threshold', type=float, default=8.0,
+                        help="Landmark motion in pixels per frame that forces a new detection (default: 8).")
+    parser.add_argument('--inference-size', type=int, default=None,
+                        help="Downscale frames so their longest side is at most this many pixels for detection.")
+    parser.add_argument('--roi', action='store_true', help="Detect on a crop around the previous face.")
+    parser.add_argument('--log-level', default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+
+    makeup_tryon = MakeupTryOn(
+        tracking=True,
+        detect_interval=args.detect_interval,
+        motion_threshold=args.motion_threshold,
+        inference_size=args.inference_size,
+        roi_tracking=args.roi
+    )
+    # Only render the types stored in the look
+    makeup_tryon.makeup_params = load_makeup_params(args.params)
+    makeup_tryon.process_video(args.input, args.output, fourcc=args.fourcc)
+
+
+if __name__ == "__main__":
+    main()
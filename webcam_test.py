@@ -1,21 +1,36 @@
+import argparse
 import cv2
+from src.frame_sources import CameraSource, RecordingSource
 
-def test_webcam():
-    cap = cv2.VideoCapture(0)  # Try 0, 1, 2 if multiple webcams are present
-    if not cap.isOpened():
+def test_webcam(record_path=None, raw=False):
+    source = CameraSource(0, retries=1)  # Try 0, 1, 2 if multiple webcams are present
+    if record_path:
+        # Also record the frames so the session can be replayed with RecordedSessionSource
+        source = RecordingSource(source, record_path, quality=None if raw else 95)
+    try:
+        source.open()
+    except ValueError:
         print("Cannot open camera")
         return
     print("Webcam opened successfully.")
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Can't receive frame (stream end?). Exiting ...")
-            break
-        cv2.imshow('Webcam Test - Press Q to Quit', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-    cap.release()
-    cv2.destroyAllWindows()
+    try:
+        while True:
+            item = source.read()
+            if item is None:
+                print("Can't receive frame (stream end?). Exiting ...")
+                break
+            frame, _ = item
+            cv2.imshow('Webcam Test - Press Q to Quit', frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        source.release()
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    test_webcam()
+    parser = argparse.ArgumentParser(description="Test the webcam, optionally recording a session for replay.")
+    parser.add_argument('--record', metavar='DIR', help="Record the frames and timestamps to this directory.")
+    parser.add_argument('--raw', action='store_true',
+                        help="Record uncompressed frames instead of JPEG (about 10x larger, bit-exact replay).")
+    args = parser.parse_args()
+    test_webcam(args.record, args.raw)